@@ -13,6 +13,9 @@ sys.path.insert(0, base_dir)
 
 # Import your models here for 'autogenerate' support
 from app.models.domain import Domain
+from app.models.domain_template import DomainTemplate
+from app.models.client import DomainClient
+from app.models.identity_provider import DomainIdentityProvider
 from app.core.database import Base
 
 # This is the Alembic Config object, which provides
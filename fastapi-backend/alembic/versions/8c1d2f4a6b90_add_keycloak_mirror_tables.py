@@ -0,0 +1,67 @@
+"""add keycloak client and identity provider mirror tables
+
+Revision ID: 8c1d2f4a6b90
+Revises: 5e707f46356c
+Create Date: 2025-07-18 10:12:31.482019
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects.postgresql import JSONB
+
+
+# revision identifiers, used by Alembic.
+revision = '8c1d2f4a6b90'
+down_revision = '5e707f46356c'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column('domains', sa.Column('mirror_synced_at', sa.DateTime(timezone=True), nullable=True))
+
+    op.create_table(
+        'domain_clients',
+        sa.Column('id', sa.Integer(), primary_key=True),
+        sa.Column('domain_id', sa.Integer(), sa.ForeignKey('domains.id', ondelete='CASCADE'), nullable=False),
+        sa.Column('keycloak_id', sa.String(36), nullable=False),
+        sa.Column('client_id', sa.String(255), nullable=False),
+        sa.Column('name', sa.String(255), nullable=True),
+        sa.Column('description', sa.String(500), nullable=True),
+        sa.Column('enabled', sa.Boolean(), nullable=True),
+        sa.Column('public_client', sa.Boolean(), nullable=True),
+        sa.Column('redirect_uris', JSONB, nullable=False),
+        sa.Column('root_url', sa.String(500), nullable=True),
+        sa.Column('base_url', sa.String(500), nullable=True),
+        sa.Column('admin_url', sa.String(500), nullable=True),
+        sa.Column('content_hash', sa.String(64), nullable=False),
+        sa.Column('synced_at', sa.DateTime(timezone=True), nullable=False),
+        sa.UniqueConstraint('domain_id', 'keycloak_id', name='uq_domain_clients_domain_keycloak_id'),
+    )
+    op.create_index('ix_domain_clients_domain_client_id', 'domain_clients', ['domain_id', 'client_id'])
+
+    op.create_table(
+        'domain_identity_providers',
+        sa.Column('id', sa.Integer(), primary_key=True),
+        sa.Column('domain_id', sa.Integer(), sa.ForeignKey('domains.id', ondelete='CASCADE'), nullable=False),
+        sa.Column('alias', sa.String(255), nullable=False),
+        sa.Column('internal_id', sa.String(36), nullable=True),
+        sa.Column('display_name', sa.String(255), nullable=True),
+        sa.Column('provider_id', sa.String(255), nullable=False),
+        sa.Column('enabled', sa.Boolean(), nullable=True),
+        sa.Column('trust_email', sa.Boolean(), nullable=True),
+        sa.Column('store_token', sa.Boolean(), nullable=True),
+        sa.Column('add_read_token_role_on_create', sa.Boolean(), nullable=True),
+        sa.Column('first_broker_login_flow_alias', sa.String(255), nullable=True),
+        sa.Column('config', JSONB, nullable=False),
+        sa.Column('content_hash', sa.String(64), nullable=False),
+        sa.Column('synced_at', sa.DateTime(timezone=True), nullable=False),
+        sa.UniqueConstraint('domain_id', 'alias', name='uq_domain_identity_providers_domain_alias'),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('domain_identity_providers')
+    op.drop_index('ix_domain_clients_domain_client_id', table_name='domain_clients')
+    op.drop_table('domain_clients')
+    op.drop_column('domains', 'mirror_synced_at')
@@ -0,0 +1,31 @@
+"""add indexes for keyset pagination and filtering of domains
+
+Revision ID: b4e9a7c3d215
+Revises: 8c1d2f4a6b90
+Create Date: 2025-07-21 14:03:52.917266
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b4e9a7c3d215'
+down_revision = '8c1d2f4a6b90'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_index('ix_domains_is_active_id', 'domains', ['is_active', 'id'])
+    op.create_index('ix_domains_is_active_name', 'domains', ['is_active', 'name'])
+    op.create_index(
+        'ix_domains_display_name_prefix', 'domains', ['display_name'],
+        postgresql_ops={'display_name': 'varchar_pattern_ops'}
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_domains_display_name_prefix', table_name='domains')
+    op.drop_index('ix_domains_is_active_name', table_name='domains')
+    op.drop_index('ix_domains_is_active_id', table_name='domains')
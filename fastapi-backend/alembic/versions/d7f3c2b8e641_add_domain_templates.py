@@ -0,0 +1,38 @@
+"""add domain templates
+
+Revision ID: d7f3c2b8e641
+Revises: b4e9a7c3d215
+Create Date: 2025-07-24 09:41:07.350184
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects.postgresql import JSONB
+
+
+# revision identifiers, used by Alembic.
+revision = 'd7f3c2b8e641'
+down_revision = 'b4e9a7c3d215'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'domain_templates',
+        sa.Column('id', sa.Integer(), primary_key=True),
+        sa.Column('name', sa.String(255), nullable=True),
+        sa.Column('description', sa.String(500), nullable=True),
+        sa.Column('realm_settings', JSONB, nullable=False),
+        sa.Column('clients', JSONB, nullable=False),
+        sa.Column('identity_providers', JSONB, nullable=False),
+        sa.Column('theme', JSONB, nullable=True),
+    )
+    op.create_index('ix_domain_templates_id', 'domain_templates', ['id'])
+    op.create_index('ix_domain_templates_name', 'domain_templates', ['name'], unique=True)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_domain_templates_name', table_name='domain_templates')
+    op.drop_index('ix_domain_templates_id', table_name='domain_templates')
+    op.drop_table('domain_templates')
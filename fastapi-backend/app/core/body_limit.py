@@ -0,0 +1,60 @@
+"""Request body limits enforced before FastAPI parses the body.
+
+FastAPI reads the whole body (spooling multipart files to disk) before the
+endpoint or its dependencies run, so a size check in the endpoint only
+bounds what is kept, not what is received. Routes declared with a
+``body_limit_route`` class reject a too large ``Content-Length`` up front
+and stop reading a body without one as soon as it passes the limit.
+"""
+
+from typing import Callable, Type
+
+from fastapi import HTTPException, status
+from fastapi.routing import APIRoute
+from starlette.requests import Request
+from starlette.types import Message
+
+
+def _too_large(limit: int) -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+        detail=f"Request body exceeds the maximum size of {limit} bytes"
+    )
+
+
+def body_limit_route(limit: Callable[[], int]) -> Type[APIRoute]:
+    """Route class rejecting request bodies larger than ``limit()`` bytes.
+
+    ``limit`` is called per request, so it can follow settings.
+
+    Example:
+        router.add_api_route("/upload", upload, methods=["POST"],
+                             route_class_override=body_limit_route(lambda: settings.UPLOAD_MAX_BYTES))
+    """
+
+    class BodyLimitRoute(APIRoute):
+        def get_route_handler(self):
+            handler = super().get_route_handler()
+
+            async def limited_handler(request: Request):
+                max_bytes = limit()
+                length = request.headers.get("content-length")
+                if length is not None and length.isdigit() and int(length) > max_bytes:
+                    raise _too_large(max_bytes)
+                received = 0
+                receive = request.receive
+
+                async def limited_receive() -> Message:
+                    nonlocal received
+                    message = await receive()
+                    if message["type"] == "http.request":
+                        received += len(message.get("body", b""))
+                        if received > max_bytes:
+                            raise _too_large(max_bytes)
+                    return message
+
+                return await handler(Request(request.scope, limited_receive))
+
+            return limited_handler
+
+    return BodyLimitRoute
@@ -0,0 +1,118 @@
+"""In-process caching primitives.
+
+Keys are tuples whose first element is the realm (domain) name, e.g.
+``("example-domain", "clients")`` or ``("example-domain", "idp", "google")``,
+so every entry belonging to a realm can be invalidated at once.
+"""
+
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional, Tuple
+
+MISSING = object()
+
+
+class TTLCache:
+    """Bounded LRU cache whose entries expire after a time-to-live.
+
+    Cached values are shared between callers and must be treated as
+    read-only. Not thread-safe: meant to be used from the event loop.
+    """
+
+    def __init__(self, maxsize: int = 1024, ttl: float = 60.0):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: "OrderedDict[Hashable, Tuple[float, Any]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        # Invalidation counters: per realm, and for invalidations of everything
+        self._generations: Dict[Hashable, int] = {}
+        self._cleared = 0
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return self.get(key, record=False) is not MISSING
+
+    def get(self, key: Hashable, default: Any = MISSING, record: bool = True) -> Any:
+        """Return the cached value, or ``default`` if absent or expired"""
+        entry = self._data.get(key)
+        if entry is not None:
+            expires_at, value = entry
+            if expires_at > time.monotonic():
+                self._data.move_to_end(key)
+                if record:
+                    self.hits += 1
+                return value
+            del self._data[key]
+        if record:
+            self.misses += 1
+        return default
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None):
+        """Store a value, evicting the least recently used entry when full"""
+        self._data[key] = (time.monotonic() + (self.ttl if ttl is None else ttl), value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+            self.evictions += 1
+
+    @staticmethod
+    def _realm(key: Hashable) -> Hashable:
+        return key[0] if isinstance(key, tuple) and key else key
+
+    def _bump(self, key: Hashable):
+        realm = self._realm(key)
+        self._generations[realm] = self._generations.get(realm, 0) + 1
+
+    def generation(self, key: Hashable) -> int:
+        """Counter that changes whenever ``key`` may have been invalidated.
+
+        Tracked per realm, so it also moves when another entry of the same
+        realm is invalidated. A loader that read a value before a write can
+        compare generations and skip storing the stale value.
+        """
+        return self._cleared + self._generations.get(self._realm(key), 0)
+
+    def delete(self, key: Hashable):
+        """Drop a single entry if present"""
+        self._bump(key)
+        self._data.pop(key, None)
+
+    def invalidate_prefix(self, *prefix: Hashable) -> int:
+        """Drop every tuple key starting with ``prefix``; returns the count"""
+        if prefix:
+            self._bump(prefix)
+        else:
+            self._cleared += 1
+        size = len(prefix)
+        stale = [
+            key for key in self._data
+            if isinstance(key, tuple) and key[:size] == prefix
+        ]
+        for key in stale:
+            del self._data[key]
+        return len(stale)
+
+    def realms(self) -> set:
+        """Realm names that currently have cached entries"""
+        return {key[0] for key in self._data if isinstance(key, tuple) and key}
+
+    def clear(self):
+        self._cleared += 1
+        self._data.clear()
+
+    def stats(self) -> dict:
+        """Hit/miss counters and occupancy"""
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": self.hits / lookups if lookups else 0.0,
+            "evictions": self.evictions,
+            "size": len(self._data),
+            "maxsize": self.maxsize,
+            "ttl": self.ttl,
+        }
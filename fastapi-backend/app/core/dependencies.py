@@ -1,6 +1,12 @@
-from fastapi import Depends, HTTPException, status
-from app.services.security_service import SecurityService, TokenData
-from typing import List, Optional
+from functools import lru_cache
+from fastapi import Depends, HTTPException, Request, status
+from app.core.database import get_db
+from app.core.permissions import Action, compile_actions
+from app.services.keycloak_service import KeycloakService
+from app.services.logo_variants import LogoVariantPipeline
+from app.services.storage import StorageBackend
+from app.services.security_service import SecurityService, TokenData, oauth2_scheme
+from typing import FrozenSet, List, Optional
 
 security_service = SecurityService()
 
@@ -12,11 +18,59 @@ Provides decorators and dependency functions to:
 - Simplify common role checks
 """
 
-async def get_current_user(token: str = Depends(security_service.verify_token)):
-    return token
+def get_keycloak_service(request: Request) -> KeycloakService:
+    """Return the worker-wide KeycloakService built at application startup.
 
-async def has_required_scopes(required_scopes: Optional[List[str]] = None):
+    Raises:
+        HTTPException 503: If the service has not been started
+    """
+    keycloak = getattr(request.app.state, "keycloak_service", None)
+    if keycloak is None:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Keycloak service is not available"
+        )
+    return keycloak
+
+def get_storage(request: Request) -> StorageBackend:
+    """Return the worker-wide theme asset storage backend.
+
+    Raises:
+        HTTPException 503: If storage has not been configured
+    """
+    storage = getattr(request.app.state, "storage", None)
+    if storage is None:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Asset storage is not available"
+        )
+    return storage
+
+def get_logo_pipeline(request: Request) -> Optional[LogoVariantPipeline]:
+    """Return the logo variant pipeline, or None when variants are disabled"""
+    return getattr(request.app.state, "logo_pipeline", None)
+
+async def get_current_user(token: str = Depends(oauth2_scheme)) -> TokenData:
+    # verify_token is called rather than used as the dependency: FastAPI would
+    # read its required_scopes parameter from the request body
+    return await security_service.verify_token(token)
+
+@lru_cache(maxsize=None)
+def _scopes_dependency(required: FrozenSet[str]):
+    async def dependency(current_user: TokenData = Depends(get_current_user)):
+        if not current_user.permissions.has_scopes(required):
+            raise HTTPException(
+                status_code=status.HTTP_403_FORBIDDEN,
+                detail="Not enough permissions"
+            )
+        return current_user
+    return dependency
+
+def has_required_scopes(required_scopes: Optional[List[str]] = None):
     """Dependency factory for checking required scopes.
+
+    The requirement is compiled into a frozenset when the route is
+    declared, and equal requirements share one dependency function.
     
     Args:
         required_scopes: List of scopes to check against token
@@ -32,17 +86,33 @@ async def has_required_scopes(required_scopes: Optional[List[str]] = None):
         async def protected_route(user = Depends(has_required_scopes(["admin"]))):
             # Only accessible with admin scope
     """
-    async def dependency(current_user: TokenData = Depends(get_current_user)):
-        if required_scopes:
-            for scope in required_scopes:
-                if scope not in current_user.scopes:
-                    raise HTTPException(
-                        status_code=status.HTTP_403_FORBIDDEN,
-                        detail="Not enough permissions"
-                    )
+    return _scopes_dependency(frozenset(required_scopes or ()))
+
+@lru_cache(maxsize=None)
+def _domain_permission_dependency(required: Action):
+    async def dependency(domain_name: str, current_user: TokenData = Depends(get_current_user)):
+        if not current_user.permissions.allows(domain_name, required):
+            raise HTTPException(
+                status_code=status.HTTP_403_FORBIDDEN,
+                detail=f"Not enough permissions on domain {domain_name}"
+            )
         return current_user
     return dependency
 
+def domain_permission_required(*actions: str):
+    """Dependency factory for actions on the domain in the ``domain_name`` path parameter.
+
+    Granted by ``domain:<domain>:<action>`` scopes (see
+    ``app.core.permissions``) or the ``admin`` scope.
+
+    Raises:
+        HTTPException 403: If an action is not granted on the domain
+
+    Example:
+        @router.put("/{domain_name}/theme", dependencies=[Depends(domain_permission_required("theme:write"))])
+    """
+    return _domain_permission_dependency(compile_actions(actions))
+
 # Common role dependencies
 async def admin_required(current_user: TokenData = Depends(has_required_scopes(["admin"]))) -> TokenData:
     """Convenience dependency that enforces admin privileges.
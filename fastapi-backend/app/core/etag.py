@@ -0,0 +1,62 @@
+"""Strong ETags and conditional request helpers.
+
+An ETag is a hash of the data a response is built from (database content
+hashes, raw Keycloak representations, ...), so ``If-None-Match`` can be
+answered with a 304 before any response model is built or serialized, and
+``If-Match`` gives write routes optimistic concurrency.
+"""
+
+import hashlib
+import json
+from typing import Any, Optional
+
+from fastapi import HTTPException, Request, Response, status
+
+
+def make_etag(*parts: Any) -> str:
+    """Strong ETag for JSON-serializable ``parts``"""
+    raw = json.dumps(parts, sort_keys=True, separators=(",", ":"), default=str).encode()
+    return f'"{hashlib.sha256(raw).hexdigest()[:32]}"'
+
+
+def _parse_etags(header: str) -> list:
+    return [tag.strip() for tag in header.split(",") if tag.strip()]
+
+
+def not_modified(request: Request, etag: str) -> Optional[Response]:
+    """Return a 304 response if ``If-None-Match`` matches ``etag``, else None.
+
+    Uses the weak comparison required for ``If-None-Match``.
+    """
+    header = request.headers.get("if-none-match")
+    if not header:
+        return None
+    for tag in _parse_etags(header):
+        if tag == "*" or tag.removeprefix("W/") == etag:
+            return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag})
+    return None
+
+
+def check_if_match(header: str, etag: Optional[str]):
+    """Check an ``If-Match`` header value against the current ``etag``.
+
+    ``etag`` is None when the resource does not exist, which no header
+    value (not even ``*``) matches.
+
+    Raises:
+        HTTPException 412: If the header does not match the current representation
+    """
+    tags = _parse_etags(header)
+    if etag is not None and ("*" in tags or etag in tags):
+        return
+    raise HTTPException(
+        status_code=status.HTTP_412_PRECONDITION_FAILED,
+        detail="Resource has changed; fetch it again and retry with the new ETag"
+    )
+
+
+def require_match(request: Request, etag: Optional[str]):
+    """Enforce the request's ``If-Match`` header, if any, against ``etag``"""
+    header = request.headers.get("if-match")
+    if header:
+        check_if_match(header, etag)
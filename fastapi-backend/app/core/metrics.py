@@ -0,0 +1,209 @@
+"""Prometheus metrics served at ``/metrics``.
+
+Collected:
+
+- ``http_request_duration_seconds``: latency per route template, method
+  and status, recorded by the pure ASGI ``MetricsMiddleware``
+- ``keycloak_calls_total`` / ``keycloak_call_duration_seconds``: every
+  public ``KeycloakService`` coroutine, by outcome (``ok``, the HTTP status
+  of a failed call, or ``error``)
+- ``db_pool_*``: checked-out and overflow connections of the SQLAlchemy
+  pool, and the time spent waiting for a connection
+- ``cache_*``: hits, misses, size and hit ratio of the in-process caches
+
+Pool and cache figures are read when Prometheus scrapes, so they cost
+nothing per request.
+"""
+
+import functools
+import inspect
+import time
+from typing import Callable, Dict, Optional
+
+from prometheus_client import CONTENT_TYPE_LATEST, REGISTRY, Counter, Histogram, generate_latest
+from prometheus_client.core import CounterMetricFamily, GaugeMetricFamily
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+from starlette.requests import Request
+from starlette.responses import Response
+from starlette.routing import Mount
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from app.core.cache import TTLCache
+
+UNMATCHED_ROUTE = "unmatched"
+
+HTTP_REQUEST_DURATION = Histogram(
+    "http_request_duration_seconds",
+    "HTTP request latency by route template",
+    ["method", "route", "status"],
+)
+KEYCLOAK_CALLS = Counter(
+    "keycloak_calls_total",
+    "KeycloakService calls by outcome",
+    ["method", "status"],
+)
+KEYCLOAK_CALL_DURATION = Histogram(
+    "keycloak_call_duration_seconds",
+    "KeycloakService call latency, including cache hits",
+    ["method"],
+)
+DB_POOL_WAIT = Histogram(
+    "db_pool_wait_seconds",
+    "Time spent obtaining a connection from the database pool",
+    buckets=(0.0005, 0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0),
+)
+
+
+class TimedAsyncQueuePool(AsyncAdaptedQueuePool):
+    """Async queue pool that records how long each checkout waits"""
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            DB_POOL_WAIT.observe(time.perf_counter() - start)
+
+
+class PoolCollector:
+    """Reports the current occupancy of a SQLAlchemy pool at scrape time"""
+
+    def __init__(self, engine):
+        self.engine = engine
+
+    def collect(self):
+        pool = self.engine.sync_engine.pool
+        for name, documentation, value in (
+            ("db_pool_size", "Configured number of pooled connections", pool.size()),
+            ("db_pool_checked_out", "Connections currently checked out", pool.checkedout()),
+            ("db_pool_overflow", "Connections open beyond the pool size", max(pool.overflow(), 0)),
+            ("db_pool_idle", "Idle connections in the pool", pool.checkedin()),
+        ):
+            gauge = GaugeMetricFamily(name, documentation)
+            gauge.add_metric([], value)
+            yield gauge
+
+
+class CacheCollector:
+    """Reports TTLCache counters at scrape time.
+
+    Caches are given as callables so caches built at startup (or not built
+    at all) can be registered when the module is imported.
+    """
+
+    def __init__(self, caches: Dict[str, Callable[[], Optional[TTLCache]]]):
+        self.caches = caches
+
+    def collect(self):
+        hits = CounterMetricFamily("cache_hits", "Cache hits", labels=["cache"])
+        misses = CounterMetricFamily("cache_misses", "Cache misses", labels=["cache"])
+        evictions = CounterMetricFamily("cache_evictions", "Entries evicted to stay within maxsize", labels=["cache"])
+        size = GaugeMetricFamily("cache_entries", "Entries currently cached", labels=["cache"])
+        ratio = GaugeMetricFamily("cache_hit_ratio", "Hits per lookup since startup", labels=["cache"])
+        for name, provider in self.caches.items():
+            cache = provider()
+            if cache is None:
+                continue
+            stats = cache.stats()
+            hits.add_metric([name], stats["hits"])
+            misses.add_metric([name], stats["misses"])
+            evictions.add_metric([name], stats["evictions"])
+            size.add_metric([name], stats["size"])
+            ratio.add_metric([name], stats["hit_ratio"])
+        yield from (hits, misses, evictions, size, ratio)
+
+
+def register_collectors(engine, caches: Dict[str, Callable[[], Optional[TTLCache]]]):
+    REGISTRY.register(PoolCollector(engine))
+    REGISTRY.register(CacheCollector(caches))
+
+
+def route_template(scope: Scope) -> str:
+    """Template of the route that handled a request (``/api/v1/domains/{domain_name}``).
+
+    Only meaningful once the router has run, which records the matched
+    endpoint in the scope. The endpoint -> template map is built on the
+    first request and kept on ``app.state`` (routers define ``__eq__`` and
+    cannot be used as dict keys).
+    """
+    app = scope.get("app")
+    if app is None:
+        return UNMATCHED_ROUTE
+    templates = getattr(app.state, "route_templates", None)
+    if templates is None:
+        templates = {}
+        for route in app.router.routes:
+            endpoint = route.app if isinstance(route, Mount) else getattr(route, "endpoint", None)
+            if endpoint is not None:
+                templates.setdefault(endpoint, route.path)
+        app.state.route_templates = templates
+    return templates.get(scope.get("endpoint"), UNMATCHED_ROUTE)
+
+
+def _call_status(error: Exception) -> str:
+    # HTTPException and KeycloakAdminError both carry the HTTP status
+    status_code = getattr(error, "status_code", None)
+    return str(status_code) if isinstance(status_code, int) else "error"
+
+
+def _observed(name: str, method):
+    # Children are resolved once, not on every call
+    duration = KEYCLOAK_CALL_DURATION.labels(name)
+    succeeded = KEYCLOAK_CALLS.labels(name, "ok")
+
+    @functools.wraps(method)
+    async def wrapper(*args, **kwargs):
+        start = time.perf_counter()
+        try:
+            result = await method(*args, **kwargs)
+        except Exception as e:
+            KEYCLOAK_CALLS.labels(name, _call_status(e)).inc()
+            raise
+        finally:
+            duration.observe(time.perf_counter() - start)
+        succeeded.inc()
+        return result
+    return wrapper
+
+
+def instrument_calls(cls):
+    """Class decorator recording count, latency and outcome of public coroutine methods"""
+    for name, method in list(vars(cls).items()):
+        if not name.startswith("_") and name not in ("start", "close") and inspect.iscoroutinefunction(method):
+            setattr(cls, name, _observed(name, method))
+    return cls
+
+
+class MetricsMiddleware:
+    """Pure ASGI middleware timing every HTTP request.
+
+    Requests are labeled with the matched route template (``/api/v1/domains/{domain_name}``)
+    rather than the raw path, so label cardinality stays bounded.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        status_code = 500
+        start = time.perf_counter()
+
+        async def send_wrapper(message: Message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            HTTP_REQUEST_DURATION.labels(
+                scope["method"], route_template(scope), str(status_code)
+            ).observe(time.perf_counter() - start)
+
+
+async def metrics_endpoint(request: Request) -> Response:
+    """Prometheus exposition of every registered metric"""
+    return Response(generate_latest(REGISTRY), media_type=CONTENT_TYPE_LATEST)
@@ -0,0 +1,78 @@
+"""Opaque cursor helpers for keyset pagination.
+
+A cursor is the URL-safe base64 encoding of a small JSON object describing
+where the previous page ended (for example the sort key and id of its last
+row). Clients must treat it as opaque and pass it back unchanged.
+"""
+
+import base64
+import json
+from typing import Any, Optional
+
+from fastapi import HTTPException, status
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.sql import Select
+from sqlalchemy.sql.expression import ClauseElement, Executable
+
+
+def encode_cursor(position: dict) -> str:
+    raw = json.dumps(position, separators=(",", ":"), sort_keys=True).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, **expected: Any) -> dict:
+    """Decode a cursor, checking that ``expected`` fields match.
+
+    Raises:
+        HTTPException 400: If the cursor is malformed or was issued for a
+            different ordering/query
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        position = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        if not isinstance(position, dict):
+            raise ValueError("cursor is not an object")
+    except ValueError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid pagination cursor"
+        )
+    for field, value in expected.items():
+        if position.get(field) != value:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Pagination cursor does not match the requested ordering"
+            )
+    return position
+
+
+class _ExplainJSON(Executable, ClauseElement):
+    """``EXPLAIN (FORMAT JSON)`` wrapper that keeps the statement's bound parameters"""
+
+    inherit_cache = False
+
+    def __init__(self, stmt: Select):
+        self.stmt = stmt
+
+
+@compiles(_ExplainJSON, "postgresql")
+def _compile_explain_json(element, compiler, **kw):
+    return "EXPLAIN (FORMAT JSON) " + compiler.process(element.stmt, **kw)
+
+
+async def estimate_row_count(db: AsyncSession, stmt: Select) -> Optional[int]:
+    """Planner estimate of the rows ``stmt`` returns, without a full COUNT(*).
+
+    Uses ``EXPLAIN (FORMAT JSON)``, which reads table statistics rather than
+    scanning, so the cost is independent of table size. Returns None if no
+    estimate is available.
+    """
+    result = await db.execute(_ExplainJSON(stmt))
+    plan = result.scalar()
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    try:
+        return int(plan[0]["Plan"]["Plan Rows"])
+    except (LookupError, TypeError, ValueError):
+        return None
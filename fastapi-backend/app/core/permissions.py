@@ -0,0 +1,87 @@
+"""Scope and per-domain permission evaluation.
+
+Token scopes are plain strings. Besides global scopes such as ``admin``
+and ``user``, a scope of the form ``domain:<domain>:<action>`` grants one
+action on one domain (``domain:acme:theme:write``); ``*`` may be used for
+the domain (every domain) or the action (every action). The ``admin``
+scope grants every action on every domain.
+
+Route requirements are compiled once, when the route is declared: scope
+requirements into frozensets and domain actions into an ``Action``
+bitmask. A token's scopes are resolved into ``Permissions`` once per
+token (the result is cached on its ``TokenData``), so each check during a
+request is a subset test or a mask comparison.
+"""
+
+from dataclasses import dataclass
+from enum import IntFlag
+from typing import Dict, FrozenSet, Iterable, Mapping
+
+ADMIN_SCOPE = "admin"
+DOMAIN_SCOPE_PREFIX = "domain:"
+ALL_DOMAINS = "*"
+
+
+class Action(IntFlag):
+    """Actions that can be granted on a domain"""
+    READ = 1
+    THEME_WRITE = 2
+    CLIENTS_WRITE = 4
+    IDENTITY_PROVIDERS_WRITE = 8
+    ALL = READ | THEME_WRITE | CLIENTS_WRITE | IDENTITY_PROVIDERS_WRITE
+
+
+ACTION_NAMES: Dict[str, Action] = {
+    "read": Action.READ,
+    "theme:write": Action.THEME_WRITE,
+    "clients:write": Action.CLIENTS_WRITE,
+    "identity-providers:write": Action.IDENTITY_PROVIDERS_WRITE,
+    "*": Action.ALL,
+}
+
+
+def compile_actions(actions: Iterable[str]) -> Action:
+    """Turn action names into one bitmask.
+
+    Raises:
+        ValueError: If an action name is unknown (a programming error, so
+            it surfaces when the route module is imported)
+    """
+    mask = Action(0)
+    for name in actions:
+        try:
+            mask |= ACTION_NAMES[name]
+        except KeyError:
+            raise ValueError(f"Unknown domain action {name}; expected one of {', '.join(ACTION_NAMES)}")
+    return mask
+
+
+@dataclass(frozen=True)
+class Permissions:
+    """Effective permissions of one token"""
+    scopes: FrozenSet[str]
+    domain_actions: Mapping[str, int]
+
+    def has_scopes(self, required: FrozenSet[str]) -> bool:
+        return required <= self.scopes
+
+    def allows(self, domain: str, required: int) -> bool:
+        """Whether every action in the ``required`` mask is granted on ``domain``"""
+        if ADMIN_SCOPE in self.scopes:
+            return True
+        granted = self.domain_actions.get(domain, 0) | self.domain_actions.get(ALL_DOMAINS, 0)
+        return granted & required == required
+
+
+def resolve_permissions(scopes: Iterable[str]) -> Permissions:
+    """Parse a token's scopes; malformed or unknown domain scopes grant nothing"""
+    scope_set = frozenset(scopes)
+    domain_actions: Dict[str, int] = {}
+    for scope in scope_set:
+        if not scope.startswith(DOMAIN_SCOPE_PREFIX):
+            continue
+        domain, _, action = scope[len(DOMAIN_SCOPE_PREFIX):].partition(":")
+        mask = ACTION_NAMES.get(action)
+        if domain and mask is not None:
+            domain_actions[domain] = domain_actions.get(domain, 0) | mask
+    return Permissions(scopes=scope_set, domain_actions=domain_actions)
@@ -0,0 +1,187 @@
+"""On-demand request profiling.
+
+A request is profiled when an admin sends the ``PROFILER_HEADER`` header
+(``X-Profile: 1``) or when it is picked by ``PROFILER_SAMPLE_RATE``.
+pyinstrument samples the request's own async context every
+``PROFILER_INTERVAL_SECONDS``, so concurrent requests do not pollute the
+profile. The result is stored as speedscope JSON (open it at
+https://www.speedscope.app for a flamegraph) in a ring of at most
+``PROFILER_MAX_PROFILES`` files in ``PROFILER_DIR``, and its id is
+returned in the ``X-Profile-Id`` response header.
+"""
+
+import asyncio
+import json
+import os
+import random
+import secrets
+import time
+from pathlib import Path
+from typing import List, Optional
+
+from fastapi import HTTPException
+from loguru import logger
+from starlette.datastructures import Headers
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from app.core.dependencies import security_service
+from app.core.metrics import route_template
+from app.core.settings import settings
+
+try:
+    from pyinstrument import Profiler
+    from pyinstrument.renderers import SpeedscopeRenderer
+except ImportError:  # Optional: requests are then never profiled
+    Profiler = None
+
+PROFILE_SUFFIX = ".speedscope.json"
+META_SUFFIX = ".meta.json"
+
+
+class ProfileStore:
+    """Bounded on-disk ring of request profiles.
+
+    Each profile is a speedscope file plus a small metadata sidecar; ids
+    start with the creation time in milliseconds, so sorting ids sorts by
+    age. Workers share the directory, and each one prunes the oldest
+    profiles after writing.
+    """
+
+    def __init__(self, directory: str, max_profiles: int):
+        self.directory = Path(directory)
+        self.max_profiles = max_profiles
+
+    @staticmethod
+    def new_id() -> str:
+        return f"{int(time.time() * 1000):013d}-{secrets.token_hex(4)}"
+
+    @staticmethod
+    def valid_id(profile_id: str) -> bool:
+        created, _, suffix = profile_id.partition("-")
+        return len(created) == 13 and created.isdigit() and len(suffix) == 8 and all(
+            c in "0123456789abcdef" for c in suffix
+        )
+
+    def path(self, profile_id: str) -> Optional[Path]:
+        """Path of a stored profile, or None if the id is malformed or unknown"""
+        if not self.valid_id(profile_id):
+            return None
+        path = self.directory / f"{profile_id}{PROFILE_SUFFIX}"
+        return path if path.is_file() else None
+
+    def _ids(self) -> List[str]:
+        try:
+            names = os.listdir(self.directory)
+        except FileNotFoundError:
+            return []
+        return sorted(name[:-len(META_SUFFIX)] for name in names if name.endswith(META_SUFFIX))
+
+    def save(self, profile_id: str, speedscope: str, meta: dict):
+        """Write a profile and drop the oldest ones beyond ``max_profiles`` (blocking)"""
+        self.directory.mkdir(parents=True, exist_ok=True)
+        for suffix, content in ((PROFILE_SUFFIX, speedscope), (META_SUFFIX, json.dumps(meta))):
+            tmp = self.directory / f".{profile_id}{suffix}.tmp"
+            tmp.write_text(content, encoding="utf-8")
+            os.replace(tmp, self.directory / f"{profile_id}{suffix}")
+        ids = self._ids()
+        for stale in ids[:max(len(ids) - self.max_profiles, 0)]:
+            for suffix in (META_SUFFIX, PROFILE_SUFFIX):
+                try:
+                    os.remove(self.directory / f"{stale}{suffix}")
+                except FileNotFoundError:
+                    pass
+
+    def entries(self) -> List[dict]:
+        """Metadata of the stored profiles, newest first (blocking)"""
+        profiles = []
+        for profile_id in reversed(self._ids()):
+            try:
+                meta = json.loads((self.directory / f"{profile_id}{META_SUFFIX}").read_text(encoding="utf-8"))
+            except (FileNotFoundError, ValueError):
+                continue
+            profiles.append(meta)
+        return profiles
+
+
+profile_store = ProfileStore(settings.PROFILER_DIR, settings.PROFILER_MAX_PROFILES)
+
+
+class ProfilerMiddleware:
+    """Pure ASGI middleware profiling the requests selected for it.
+
+    At most ``PROFILER_MAX_CONCURRENT`` requests are profiled at a time;
+    further triggers are ignored, keeping the overhead bounded.
+    """
+
+    def __init__(self, app: ASGIApp, store: ProfileStore = profile_store):
+        self.app = app
+        self.store = store
+        self.header = settings.PROFILER_HEADER.lower()
+        self._active = 0
+
+    @staticmethod
+    async def _is_admin(headers: Headers) -> bool:
+        scheme, _, token = headers.get("authorization", "").partition(" ")
+        if scheme.lower() != "bearer" or not token:
+            return False
+        try:
+            await security_service.verify_token(token, required_scopes=["admin"])
+        except HTTPException:
+            return False
+        return True
+
+    async def _trigger(self, scope: Scope) -> Optional[str]:
+        """Why this request is profiled ("header" or "sample"), or None"""
+        headers = Headers(scope=scope)
+        if headers.get(self.header, "").lower() in ("1", "true") and await self._is_admin(headers):
+            return "header"
+        if settings.PROFILER_SAMPLE_RATE > 0 and random.random() < settings.PROFILER_SAMPLE_RATE:
+            return "sample"
+        return None
+
+    def _store_profile(self, profile_id: str, session, meta: dict):
+        self.store.save(profile_id, SpeedscopeRenderer().render(session), meta)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http" or Profiler is None or self._active >= settings.PROFILER_MAX_CONCURRENT:
+            await self.app(scope, receive, send)
+            return
+        trigger = await self._trigger(scope)
+        if trigger is None:
+            await self.app(scope, receive, send)
+            return
+
+        profile_id = self.store.new_id()
+        status_code = 500
+
+        async def send_wrapper(message: Message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                message["headers"] = [*message.get("headers", []), (b"x-profile-id", profile_id.encode())]
+            await send(message)
+
+        self._active += 1
+        profiler = Profiler(interval=settings.PROFILER_INTERVAL_SECONDS, async_mode="enabled")
+        started = time.time()
+        profiler.start()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            session = profiler.stop()
+            self._active -= 1
+            meta = {
+                "id": profile_id,
+                "method": scope["method"],
+                "path": scope["path"],
+                "route": route_template(scope),
+                "status": status_code,
+                "trigger": trigger,
+                "duration_ms": round((time.time() - started) * 1000, 1),
+                "created_at": started,
+            }
+            try:
+                # Rendering a long session is CPU bound: keep it off the event loop too
+                await asyncio.to_thread(self._store_profile, profile_id, session, meta)
+                logger.info(f"Stored profile {profile_id} of {scope['method']} {scope['path']} ({meta['duration_ms']} ms)")
+            except Exception as e:
+                logger.warning(f"Could not store profile of {scope['method']} {scope['path']}: {e}")
@@ -0,0 +1,295 @@
+"""Static asset serving for the ``/static`` mount.
+
+Replaces Starlette's ``StaticFiles`` for theme assets with:
+
+- an in-memory index of file metadata, so a request costs a dict lookup
+  instead of a ``stat`` (content-hashed files never change and are never
+  re-checked; other files are re-checked at most every
+  ``STATIC_INDEX_REVALIDATE_SECONDS``)
+- ``Cache-Control: immutable`` for content-hashed names
+  (``<sha256>[-<width>].<ext>``) and short, revalidated caching otherwise
+- strong ETags with ``If-None-Match`` / ``If-Modified-Since`` 304s
+- single ``Range`` requests (with ``If-Range``) answered with 206
+- pre-compressed ``.br`` / ``.gz`` siblings chosen by ``Accept-Encoding``
+"""
+
+import asyncio
+import mimetypes
+import os
+import re
+import stat
+import time
+from dataclasses import dataclass, field
+from email.utils import formatdate, parsedate_to_datetime
+from typing import Dict, Optional, Tuple
+
+import aiofiles
+from loguru import logger
+from starlette.datastructures import Headers
+from starlette.responses import FileResponse, PlainTextResponse, Response, StreamingResponse
+from starlette.types import Receive, Scope, Send
+from app.core.settings import settings
+from app.services.storage import IMMUTABLE_CACHE_CONTROL
+
+HASHED_NAME = re.compile(r"^(?P<hash>[0-9a-f]{64})(?:-\d+)?\.[A-Za-z0-9]+$")
+# Pre-compressed siblings in order of preference
+ENCODINGS = (("br", ".br"), ("gzip", ".gz"))
+CHUNK_SIZE = 64 * 1024
+
+
+@dataclass
+class AssetEntry:
+    path: str
+    stat_result: os.stat_result
+    content_type: str
+    etag: str
+    last_modified: str
+    immutable: bool
+    encoded: Dict[str, Tuple[str, os.stat_result]] = field(default_factory=dict)
+    checked_at: float = 0.0
+
+
+def _make_entry(path: str) -> Optional[AssetEntry]:
+    """Stat a file and its compressed siblings; None if it is not a regular file"""
+    try:
+        st = os.stat(path)
+    except (FileNotFoundError, NotADirectoryError):
+        return None
+    if not stat.S_ISREG(st.st_mode):
+        return None
+    name = os.path.basename(path)
+    hashed = HASHED_NAME.match(name)
+    if hashed:
+        etag = f'"{hashed.group("hash")[:32]}-{st.st_size:x}"'
+    else:
+        etag = f'"{st.st_mtime_ns:x}-{st.st_size:x}"'
+    encoded = {}
+    for encoding, suffix in ENCODINGS:
+        try:
+            sibling = os.stat(path + suffix)
+        except FileNotFoundError:
+            continue
+        if stat.S_ISREG(sibling.st_mode) and sibling.st_size < st.st_size:
+            encoded[encoding] = (path + suffix, sibling)
+    return AssetEntry(
+        path=path,
+        stat_result=st,
+        content_type=mimetypes.guess_type(name)[0] or "application/octet-stream",
+        etag=etag,
+        last_modified=formatdate(st.st_mtime, usegmt=True),
+        immutable=bool(hashed),
+        encoded=encoded,
+        checked_at=time.monotonic(),
+    )
+
+
+def _parse_range(header: str, size: int) -> Optional[Tuple[int, int]]:
+    """Parse a single ``bytes=`` range into inclusive offsets.
+
+    Returns None for headers that should be ignored (multiple ranges,
+    other units, malformed); raises ValueError if the range cannot be
+    satisfied.
+    """
+    unit, _, spec = header.partition("=")
+    if unit.strip().lower() != "bytes" or "," in spec:
+        return None
+    start_text, dash, end_text = spec.strip().partition("-")
+    if not dash:
+        return None
+    try:
+        if start_text:
+            start = int(start_text)
+            end = int(end_text) if end_text else size - 1
+        else:
+            # Suffix range: the last N bytes
+            start = size - int(end_text)
+            end = size - 1
+    except ValueError:
+        return None
+    if start >= size or end < start or (not start_text and start == size):
+        raise ValueError("range not satisfiable")
+    return max(start, 0), min(end, size - 1)
+
+
+def _accepted_encodings(header: str) -> Dict[str, float]:
+    """Map each coding in an ``Accept-Encoding`` header to its q-value.
+
+    A missing q is 1; a malformed one counts as 0 (not acceptable).
+    """
+    accepted = {}
+    for part in header.split(","):
+        coding, *params = part.split(";")
+        coding = coding.strip().lower()
+        if not coding:
+            continue
+        q = 1.0
+        for param in params:
+            name, _, value = param.partition("=")
+            if name.strip().lower() == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        accepted[coding] = q
+    return accepted
+
+
+def _choose_encoding(header: str, available: Dict[str, Tuple[str, os.stat_result]]) -> Optional[str]:
+    """Best pre-compressed coding the client accepts; None for the identity file"""
+    accepted = _accepted_encodings(header)
+    best, best_q = None, 0.0
+    # ENCODINGS is in preference order, so a tie keeps the earlier coding
+    for encoding, _ in ENCODINGS:
+        q = accepted.get(encoding, accepted.get("*", 0.0))
+        if encoding in available and q > best_q:
+            best, best_q = encoding, q
+    return best
+
+
+class AssetFiles:
+    """ASGI app serving files below ``directory`` from an in-memory index"""
+
+    def __init__(self, directory: str):
+        self.directory = os.path.realpath(directory)
+        self.index: Dict[str, AssetEntry] = {}
+
+    async def load_index(self):
+        """Index every file below the directory (run once at startup)"""
+        def scan() -> Dict[str, AssetEntry]:
+            entries = {}
+            for root, _, files in os.walk(self.directory):
+                for name in files:
+                    if name.endswith(tuple(suffix for _, suffix in ENCODINGS)):
+                        continue
+                    path = os.path.join(root, name)
+                    entry = _make_entry(path)
+                    if entry:
+                        entries[os.path.relpath(path, self.directory).replace(os.sep, "/")] = entry
+            return entries
+
+        self.index = await asyncio.to_thread(scan)
+        logger.info(f"Indexed {len(self.index)} static assets in {self.directory}")
+
+    async def _lookup(self, relpath: str) -> Optional[AssetEntry]:
+        entry = self.index.get(relpath)
+        if entry and (
+            entry.immutable
+            or time.monotonic() - entry.checked_at < settings.STATIC_INDEX_REVALIDATE_SECONDS
+        ):
+            return entry
+        path = os.path.realpath(os.path.join(self.directory, relpath))
+        if not path.startswith(self.directory + os.sep):
+            return None
+        entry = await asyncio.to_thread(_make_entry, path)
+        if entry:
+            self.index[relpath] = entry
+        else:
+            self.index.pop(relpath, None)
+        return entry
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        assert scope["type"] == "http"
+        response = await self._respond(scope)
+        await response(scope, receive, send)
+
+    async def _respond(self, scope: Scope) -> Response:
+        if scope["method"] not in ("GET", "HEAD"):
+            return PlainTextResponse("Method Not Allowed", status_code=405, headers={"Allow": "GET, HEAD"})
+        relpath = scope["path"]
+        root_path = scope.get("root_path", "")
+        if root_path and relpath.startswith(root_path + "/"):
+            # Starlette versions that keep the mount prefix in the path
+            relpath = relpath[len(root_path):]
+        relpath = relpath.lstrip("/")
+        entry = await self._lookup(relpath) if relpath and ".." not in relpath.split("/") else None
+        if entry is None:
+            return PlainTextResponse("Not Found", status_code=404)
+
+        request_headers = Headers(scope=scope)
+        headers = {
+            "Cache-Control": (
+                IMMUTABLE_CACHE_CONTROL if entry.immutable
+                else f"public, max-age={settings.STATIC_MAX_AGE_SECONDS}, must-revalidate"
+            ),
+            "Accept-Ranges": "bytes",
+            "Last-Modified": entry.last_modified,
+        }
+        if entry.encoded:
+            headers["Vary"] = "Accept-Encoding"
+
+        # Conditional GET: If-None-Match wins over If-Modified-Since
+        if_none_match = request_headers.get("if-none-match")
+        if if_none_match is not None:
+            current = {entry.etag} | {self._encoded_etag(entry, encoding) for encoding in entry.encoded}
+            for tag in if_none_match.split(","):
+                tag = tag.strip().removeprefix("W/")
+                if tag == "*" or tag in current:
+                    return Response(status_code=304, headers={**headers, "ETag": entry.etag if tag == "*" else tag})
+        elif self._not_modified_since(request_headers.get("if-modified-since"), entry):
+            return Response(status_code=304, headers={**headers, "ETag": entry.etag})
+
+        size = entry.stat_result.st_size
+        range_header = request_headers.get("range")
+        if range_header and self._range_applies(request_headers.get("if-range"), entry):
+            try:
+                byte_range = _parse_range(range_header, size)
+            except ValueError:
+                return Response(status_code=416, headers={**headers, "Content-Range": f"bytes */{size}"})
+            if byte_range is not None:
+                start, end = byte_range
+                headers.update({
+                    "ETag": entry.etag,
+                    "Content-Range": f"bytes {start}-{end}/{size}",
+                    "Content-Length": str(end - start + 1),
+                })
+                body = self._read_range(entry.path, start, end) if scope["method"] == "GET" else iter(())
+                return StreamingResponse(body, status_code=206, headers=headers, media_type=entry.content_type)
+
+        encoding = _choose_encoding(request_headers.get("accept-encoding", ""), entry.encoded)
+        if encoding is not None:
+            path, st = entry.encoded[encoding]
+            headers["Content-Encoding"] = encoding
+            headers["ETag"] = self._encoded_etag(entry, encoding)
+            return FileResponse(
+                path, stat_result=st, headers=headers, media_type=entry.content_type, method=scope["method"]
+            )
+        headers["ETag"] = entry.etag
+        return FileResponse(
+            entry.path, stat_result=entry.stat_result, headers=headers,
+            media_type=entry.content_type, method=scope["method"]
+        )
+
+    @staticmethod
+    def _encoded_etag(entry: AssetEntry, encoding: str) -> str:
+        # Each encoding is a different representation and needs its own strong tag
+        return f'{entry.etag[:-1]}-{encoding}"'
+
+    @staticmethod
+    def _not_modified_since(header: Optional[str], entry: AssetEntry) -> bool:
+        if not header:
+            return False
+        try:
+            return int(entry.stat_result.st_mtime) <= parsedate_to_datetime(header).timestamp()
+        except (TypeError, ValueError):
+            return False
+
+    @staticmethod
+    def _range_applies(if_range: Optional[str], entry: AssetEntry) -> bool:
+        """A Range is honoured unless If-Range names a different version"""
+        if not if_range:
+            return True
+        if if_range.startswith('"'):
+            return if_range == entry.etag
+        return if_range == entry.last_modified
+
+    @staticmethod
+    async def _read_range(path: str, start: int, end: int):
+        async with aiofiles.open(path, "rb") as f:
+            await f.seek(start)
+            remaining = end - start + 1
+            while remaining > 0:
+                chunk = await f.read(min(CHUNK_SIZE, remaining))
+                if not chunk:
+                    break
+                remaining -= len(chunk)
+                yield chunk
@@ -0,0 +1,240 @@
+"""Opt-in distributed tracing (``TRACING_ENABLED``).
+
+When enabled, spans are recorded for:
+
+- every HTTP request (``TracingMiddleware``), continuing the trace of an
+  incoming W3C ``traceparent`` header and named after the route template
+- every public ``KeycloakService`` coroutine (``trace_calls``); the admin
+  client injects ``traceparent`` into its requests to Keycloak
+- every SQL statement (``instrument_engine``)
+
+Spans go to the exporter selected by ``TRACING_EXPORTER``: ``otlp``
+(OTLP/HTTP), ``file`` (OTLP/JSON lines in ``TRACING_FILE_PATH``),
+``memory`` (kept in process, for tests), ``console`` or a
+``package.module:factory`` returning any ``SpanExporter``.
+
+While tracing is disabled the wrappers reduce to a ``None`` check and no
+middleware or SQL listeners are installed.
+"""
+
+import base64
+import functools
+import importlib
+import inspect
+import json
+import os
+import threading
+from typing import Optional, Sequence
+
+from sqlalchemy import event
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from app.core.metrics import route_template
+from app.core.settings import settings
+
+try:
+    from opentelemetry import propagate
+    from opentelemetry.sdk.resources import Resource
+    from opentelemetry.sdk.trace import ReadableSpan, TracerProvider
+    from opentelemetry.sdk.trace.export import (
+        BatchSpanProcessor,
+        ConsoleSpanExporter,
+        SimpleSpanProcessor,
+        SpanExporter,
+        SpanExportResult,
+    )
+    from opentelemetry.sdk.trace.export.in_memory_span_exporter import InMemorySpanExporter
+    from opentelemetry.sdk.trace.sampling import ParentBased, TraceIdRatioBased
+    from opentelemetry.trace import SpanKind, Status, StatusCode
+except ImportError:  # Only needed for TRACING_ENABLED=true
+    propagate = None
+    SpanExporter = object
+
+try:
+    from google.protobuf.json_format import MessageToDict
+    from opentelemetry.exporter.otlp.proto.common.trace_encoder import encode_spans
+except ImportError:  # Only needed for the "file" exporter
+    encode_spans = None
+
+_provider: Optional["TracerProvider"] = None
+_tracer = None
+# OTLP/JSON encodes ids as hex, protobuf's JSON mapping as base64
+_ID_FIELDS = ("traceId", "spanId", "parentSpanId")
+
+
+def _hex_ids(item: dict):
+    for field in _ID_FIELDS:
+        if field in item:
+            item[field] = base64.b64decode(item[field]).hex()
+
+
+class OTLPFileSpanExporter(SpanExporter):
+    """Appends spans to a file as OTLP/JSON, one export request per line.
+
+    The lines can be replayed to a collector (``otlpjsonfile`` receiver)
+    or inspected offline.
+    """
+
+    def __init__(self, path: str):
+        if encode_spans is None:
+            raise RuntimeError("opentelemetry-exporter-otlp-proto-common is required for the file exporter")
+        self.path = path
+        self._lock = threading.Lock()
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+    def export(self, spans: Sequence["ReadableSpan"]) -> "SpanExportResult":
+        request = MessageToDict(encode_spans(spans))
+        for resource_spans in request.get("resourceSpans", []):
+            for scope_spans in resource_spans.get("scopeSpans", []):
+                for span in scope_spans.get("spans", []):
+                    _hex_ids(span)
+                    for link in span.get("links", []):
+                        _hex_ids(link)
+        line = json.dumps(request, separators=(",", ":"))
+        with self._lock, open(self.path, "a", encoding="utf-8") as f:
+            f.write(line + "\n")
+        return SpanExportResult.SUCCESS
+
+    def shutdown(self):
+        pass
+
+
+def build_exporter(name: str) -> "SpanExporter":
+    """Create the exporter named by ``TRACING_EXPORTER``"""
+    if name == "memory":
+        return InMemorySpanExporter()
+    if name == "console":
+        return ConsoleSpanExporter()
+    if name == "file":
+        return OTLPFileSpanExporter(settings.TRACING_FILE_PATH)
+    if name == "otlp":
+        from opentelemetry.exporter.otlp.proto.http.trace_exporter import OTLPSpanExporter
+        return OTLPSpanExporter(endpoint=settings.TRACING_OTLP_ENDPOINT)
+    module, _, factory = name.partition(":")
+    if not factory:
+        raise ValueError(f"Unknown tracing exporter {name}; expected otlp, file, memory, console or module:factory")
+    return getattr(importlib.import_module(module), factory)()
+
+
+def setup_tracing(exporter: Optional["SpanExporter"] = None) -> "TracerProvider":
+    """Start recording spans, to ``exporter`` or the configured one"""
+    global _provider, _tracer
+    if propagate is None:
+        raise RuntimeError("opentelemetry-sdk is required for TRACING_ENABLED")
+    exporter = exporter or build_exporter(settings.TRACING_EXPORTER)
+    provider = TracerProvider(
+        resource=Resource.create({"service.name": settings.TRACING_SERVICE_NAME}),
+        sampler=ParentBased(TraceIdRatioBased(settings.TRACING_SAMPLE_RATIO)),
+    )
+    # In-memory spans must be visible as soon as they end
+    processor = SimpleSpanProcessor if isinstance(exporter, InMemorySpanExporter) else BatchSpanProcessor
+    provider.add_span_processor(processor(exporter))
+    _provider = provider
+    _tracer = provider.get_tracer("unilock")
+    return provider
+
+
+def shutdown_tracing():
+    """Flush pending spans and stop recording"""
+    global _provider, _tracer
+    if _provider is not None:
+        _provider.shutdown()
+    _provider = None
+    _tracer = None
+
+
+def _traced(name: str, method):
+    @functools.wraps(method)
+    async def wrapper(*args, **kwargs):
+        if _tracer is None:
+            return await method(*args, **kwargs)
+        with _tracer.start_as_current_span(name):
+            return await method(*args, **kwargs)
+    return wrapper
+
+
+def trace_calls(cls):
+    """Class decorator wrapping public coroutine methods in spans named ``Class.method``"""
+    for name, method in list(vars(cls).items()):
+        if not name.startswith("_") and name not in ("start", "close") and inspect.iscoroutinefunction(method):
+            setattr(cls, name, _traced(f"{cls.__name__}.{name}", method))
+    return cls
+
+
+async def inject_trace_headers(request):
+    """httpx request hook adding ``traceparent`` for the current span"""
+    if _tracer is not None:
+        propagate.inject(request.headers)
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if _tracer is None or context is None:
+        return
+    operation = statement.split(None, 1)[0].upper() if statement.strip() else "SQL"
+    context._trace_span = _tracer.start_span(
+        operation,
+        kind=SpanKind.CLIENT,
+        attributes={
+            "db.system": "postgresql",
+            "db.statement": statement,
+            "db.name": conn.engine.url.database or "",
+        },
+    )
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    span = getattr(context, "_trace_span", None)
+    if span is not None:
+        span.end()
+        context._trace_span = None
+
+
+def _handle_error(exception_context):
+    span = getattr(exception_context.execution_context, "_trace_span", None)
+    if span is not None:
+        span.record_exception(exception_context.original_exception)
+        span.set_status(Status(StatusCode.ERROR))
+        span.end()
+        exception_context.execution_context._trace_span = None
+
+
+def instrument_engine(engine):
+    """Record a span for every statement executed on ``engine``"""
+    sync_engine = engine.sync_engine
+    event.listen(sync_engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(sync_engine, "after_cursor_execute", _after_cursor_execute)
+    event.listen(sync_engine, "handle_error", _handle_error)
+
+
+class TracingMiddleware:
+    """Pure ASGI middleware recording a server span per HTTP request"""
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http" or _tracer is None:
+            await self.app(scope, receive, send)
+            return
+        carrier = {key.decode("latin-1"): value.decode("latin-1") for key, value in scope["headers"]}
+        method = scope["method"]
+        with _tracer.start_as_current_span(
+            method,
+            context=propagate.extract(carrier),
+            kind=SpanKind.SERVER,
+            attributes={"http.method": method, "http.target": scope["path"]},
+        ) as span:
+            async def send_wrapper(message: Message):
+                if message["type"] == "http.response.start":
+                    span.set_attribute("http.status_code", message["status"])
+                    if message["status"] >= 500:
+                        span.set_status(Status(StatusCode.ERROR))
+                await send(message)
+
+            try:
+                await self.app(scope, receive, send_wrapper)
+            finally:
+                route = route_template(scope)
+                span.set_attribute("http.route", route)
+                span.update_name(f"{method} {route}")
@@ -1,13 +1,21 @@
-<<<<<<< HEAD
 from fastapi import FastAPI, Depends, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.staticfiles import StaticFiles
 import uvicorn
 from loguru import logger
 from pathlib import Path
-from app.routes import domains
-from app.core.dependencies import admin_required
+from app.routes import domain_templates, domains, profiles
+from app.core.database import engine
+from app.core.dependencies import admin_required, security_service
+from app.core.metrics import MetricsMiddleware, metrics_endpoint, register_collectors
+from app.core.profiling import ProfilerMiddleware
 from app.core.settings import settings
+from app.core.static_files import AssetFiles
+from app.core.tracing import TracingMiddleware, instrument_engine, setup_tracing, shutdown_tracing
+from app.services.keycloak_events import AdminEventListener
+from app.services.keycloak_service import KeycloakService
+from app.services.logo_variants import LogoVariantPipeline
+from app.services.mirror_service import MirrorReconciler
+from app.services.storage import build_storage
 
 # Initialize the FastAPI application
 app = FastAPI(
@@ -26,18 +34,76 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["ETag", "X-Next-Cursor", "X-Total-Count-Estimate", "X-Profile-Id"],
 )
+# Profiles requests sent by admins with X-Profile: 1 (and a PROFILER_SAMPLE_RATE share of all requests)
+app.add_middleware(ProfilerMiddleware)
+app.add_middleware(MetricsMiddleware)
+
+# Opt-in tracing of requests, Keycloak calls and SQL statements
+if settings.TRACING_ENABLED:
+    setup_tracing()
+    instrument_engine(engine)
+    app.add_middleware(TracingMiddleware)
+
+# Pool and cache metrics are read at scrape time
+register_collectors(engine, {
+    "keycloak": lambda: getattr(getattr(app.state, "keycloak_service", None), "cache", None),
+    "tokens": lambda: security_service.token_cache,
+})
+app.add_route("/metrics", metrics_endpoint, include_in_schema=False)
 
 # Configure logging
 logger.add("logs/app.log", rotation="500 MB", retention="10 days")
 
 # Create static directories if they don't exist
-static_dir = Path("static")
+static_dir = Path(settings.STORAGE_LOCAL_ROOT)
 logos_dir = static_dir / "logos"
 logos_dir.mkdir(parents=True, exist_ok=True)
 
-# Mount static files directory
-app.mount("/static", StaticFiles(directory="static"), name="static")
+# Mount static files directory (theme assets when STORAGE_BACKEND=local)
+static_files = AssetFiles(directory=str(static_dir))
+app.mount(settings.STORAGE_LOCAL_URL_PREFIX, static_files, name="static")
+
+@app.on_event("startup")
+async def start_keycloak_service():
+    """Build the shared Keycloak admin service once per worker"""
+    await static_files.load_index()
+    await security_service.jwks.start()
+    app.state.keycloak_service = KeycloakService()
+    await app.state.keycloak_service.start()
+    app.state.mirror_reconciler = None
+    if settings.MIRROR_SYNC_ENABLED:
+        app.state.mirror_reconciler = MirrorReconciler(app.state.keycloak_service)
+        await app.state.mirror_reconciler.start()
+    app.state.admin_event_listener = None
+    if settings.KEYCLOAK_ADMIN_EVENTS_ENABLED:
+        app.state.admin_event_listener = AdminEventListener(
+            app.state.keycloak_service,
+            on_change=app.state.mirror_reconciler.mark_dirty if app.state.mirror_reconciler else None
+        )
+        await app.state.admin_event_listener.start()
+    app.state.storage = build_storage()
+    app.state.logo_pipeline = None
+    if settings.LOGO_VARIANTS_ENABLED:
+        if LogoVariantPipeline.available():
+            app.state.logo_pipeline = LogoVariantPipeline(app.state.keycloak_service, app.state.storage)
+            await app.state.logo_pipeline.start()
+        else:
+            logger.warning("Pillow is not installed; logos will be served as uploaded")
+
+@app.on_event("shutdown")
+async def stop_keycloak_service():
+    """Stop the token refresher and close pooled Keycloak connections"""
+    for task_owner in ("logo_pipeline", "mirror_reconciler", "admin_event_listener"):
+        background = getattr(app.state, task_owner, None)
+        if background is not None:
+            await background.close()
+    keycloak = getattr(app.state, "keycloak_service", None)
+    if keycloak is not None:
+        await keycloak.close()
+    await security_service.jwks.close()
+    shutdown_tracing()
 
 # Include all routers
 from app.routes import auth
@@ -46,8 +112,18 @@ from app.routes import auth
 app.include_router(auth.router)
 
 # Protected routes
+# Domain routes check admin or per-domain permissions route by route
 app.include_router(
     domains.router,
+    prefix="/api/v1"
+)
+app.include_router(
+    domain_templates.router,
+    dependencies=[Depends(admin_required)],
+    prefix="/api/v1"
+)
+app.include_router(
+    profiles.router,
     dependencies=[Depends(admin_required)],
     prefix="/api/v1"
 )
@@ -57,6 +133,14 @@ async def health_check():
     """Basic health check endpoint"""
     return {"status": "ok", "version": app.version}
 
+@app.get("/api/v1/cache/stats")
+async def cache_stats(current_user=Depends(admin_required)):
+    """Hit/miss counters for the Keycloak read cache and the verified-token cache"""
+    return {
+        "keycloak": app.state.keycloak_service.cache.stats(),
+        "tokens": security_service.cache_stats(),
+    }
+
 @app.get("/secure-test")
 async def secure_test(current_user=Depends(admin_required)):
     """Test endpoint for admin access"""
@@ -71,12 +155,3 @@ if __name__ == "__main__":
         reload=True,
         log_level="info"
     )
-=======
-from fastapi import FastAPI
-
-app = FastAPI()
-
-@app.get("/")
-def read_root():
-    return {"message": "Welcome to Unilock"}
->>>>>>> db91a5192e96e6e8b41e9bb543a166b3257a9e05
@@ -0,0 +1,44 @@
+from sqlalchemy import Column, Integer, String, Boolean, DateTime, ForeignKey, Index, UniqueConstraint
+from sqlalchemy.dialects.postgresql import JSONB
+from app.core.database import Base
+
+class DomainClient(Base):
+    """Local mirror of a Keycloak client, kept in sync by the mirror reconciler"""
+    __tablename__ = "domain_clients"
+    __table_args__ = (
+        UniqueConstraint("domain_id", "keycloak_id", name="uq_domain_clients_domain_keycloak_id"),
+        Index("ix_domain_clients_domain_client_id", "domain_id", "client_id"),
+    )
+
+    id = Column(Integer, primary_key=True)
+    domain_id = Column(Integer, ForeignKey("domains.id", ondelete="CASCADE"), nullable=False)
+    keycloak_id = Column(String(36), nullable=False)  # Internal Keycloak client UUID
+    client_id = Column(String(255), nullable=False)  # OAuth clientId
+    name = Column(String(255), nullable=True)
+    description = Column(String(500), nullable=True)
+    enabled = Column(Boolean, default=True)
+    public_client = Column(Boolean, default=True)
+    redirect_uris = Column(JSONB, nullable=False, default=list)
+    root_url = Column(String(500), nullable=True)
+    base_url = Column(String(500), nullable=True)
+    admin_url = Column(String(500), nullable=True)
+    content_hash = Column(String(64), nullable=False)  # Hash of the mirrored fields, used for diffing
+    synced_at = Column(DateTime(timezone=True), nullable=False)
+
+    def __repr__(self):
+        return f"<DomainClient {self.client_id} (domain {self.domain_id})>"
+
+    def to_schema_dict(self) -> dict:
+        """Fields in the shape of the Client API schema"""
+        return {
+            "id": self.keycloak_id,
+            "clientId": self.client_id,
+            "name": self.name,
+            "description": self.description,
+            "enabled": self.enabled,
+            "publicClient": self.public_client,
+            "redirectUris": self.redirect_uris or [],
+            "rootUrl": self.root_url,
+            "baseUrl": self.base_url,
+            "adminUrl": self.admin_url,
+        }
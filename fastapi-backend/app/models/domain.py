@@ -1,23 +1,36 @@
-from sqlalchemy import Column, Integer, String, Boolean
+from sqlalchemy import Column, Integer, String, Boolean, DateTime, Index
 from sqlalchemy.dialects.postgresql import JSONB
 from app.core.database import Base
 
+DEFAULT_THEME = {
+    "primaryColor": "#3b82f6",
+    "secondaryColor": "#6b7280",
+    "logoUrl": None,
+    "loginTheme": None
+}
+
 class Domain(Base):
     """Represents a domain/realm in our system with user-friendly metadata"""
     __tablename__ = "domains"
+    __table_args__ = (
+        # Keyset pagination of active/inactive domains by id or name
+        Index("ix_domains_is_active_id", "is_active", "id"),
+        Index("ix_domains_is_active_name", "is_active", "name"),
+        # LIKE 'prefix%' lookups on display_name regardless of collation
+        Index(
+            "ix_domains_display_name_prefix", "display_name",
+            postgresql_ops={"display_name": "varchar_pattern_ops"}
+        ),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     name = Column(String(255), unique=True, index=True)  # Keycloak realm name
     display_name = Column(String(255))  # User-friendly display name
     description = Column(String(500), nullable=True)
     is_active = Column(Boolean, default=True)
-    theme_config = Column(JSONB, nullable=True, default={
-        "primaryColor": "#3b82f6",
-        "secondaryColor": "#6b7280",
-        "logoUrl": None,
-        "loginTheme": None
-    })  # Stores theme preferences as JSON
+    theme_config = Column(JSONB, nullable=True, default=lambda: dict(DEFAULT_THEME))  # Stores theme preferences as JSON
     default_client_redirect = Column(String(500), nullable=True)  # Default redirect URI
+    mirror_synced_at = Column(DateTime(timezone=True), nullable=True)  # Last client/IdP mirror reconcile
 
     def __repr__(self):
         return f"<Domain {self.name} ({self.display_name})>"
@@ -25,12 +38,6 @@ class Domain(Base):
     @property
     def theme(self):
         """Get theme configuration with defaults"""
-        default_theme = {
-            "primaryColor": "#3b82f6",
-            "secondaryColor": "#6b7280",
-            "logoUrl": None,
-            "loginTheme": None
-        }
         if not self.theme_config:
-            return default_theme
-        return {**default_theme, **self.theme_config}
+            return dict(DEFAULT_THEME)
+        return {**DEFAULT_THEME, **self.theme_config}
@@ -0,0 +1,40 @@
+from sqlalchemy import Column, Integer, String
+from sqlalchemy.dialects.postgresql import JSONB
+from app.core.database import Base
+from app.models.domain import DEFAULT_THEME
+
+class DomainTemplate(Base):
+    """Reusable domain blueprint applied when a new domain is created"""
+    __tablename__ = "domain_templates"
+
+    id = Column(Integer, primary_key=True, index=True)
+    name = Column(String(255), unique=True, index=True)
+    description = Column(String(500), nullable=True)
+    realm_settings = Column(JSONB, nullable=False, default=dict)  # Extra top-level realm representation fields
+    clients = Column(JSONB, nullable=False, default=list)  # Keycloak client representations
+    identity_providers = Column(JSONB, nullable=False, default=list)  # Keycloak IdP representations
+    theme = Column(JSONB, nullable=True)  # Theme config (colors, logo, login theme)
+
+    def __repr__(self):
+        return f"<DomainTemplate {self.name}>"
+
+    @property
+    def theme_config(self) -> dict:
+        """Template theme merged over the default theme"""
+        return {**DEFAULT_THEME, **(self.theme or {})}
+
+    def realm_representation(self) -> dict:
+        """Realm settings plus theme attributes, sent with the realm-create call"""
+        theme = self.theme_config
+        representation = dict(self.realm_settings or {})
+        attributes = dict(representation.get("attributes") or {})
+        attributes.update({
+            "primaryColor": theme["primaryColor"],
+            "secondaryColor": theme["secondaryColor"],
+        })
+        if theme.get("logoUrl"):
+            attributes["logoUrl"] = theme["logoUrl"]
+        representation["attributes"] = attributes
+        if theme.get("loginTheme"):
+            representation["loginTheme"] = theme["loginTheme"]
+        return representation
@@ -0,0 +1,43 @@
+from sqlalchemy import Column, Integer, String, Boolean, DateTime, ForeignKey, UniqueConstraint
+from sqlalchemy.dialects.postgresql import JSONB
+from app.core.database import Base
+
+class DomainIdentityProvider(Base):
+    """Local mirror of a Keycloak identity provider, kept in sync by the mirror reconciler"""
+    __tablename__ = "domain_identity_providers"
+    __table_args__ = (
+        UniqueConstraint("domain_id", "alias", name="uq_domain_identity_providers_domain_alias"),
+    )
+
+    id = Column(Integer, primary_key=True)
+    domain_id = Column(Integer, ForeignKey("domains.id", ondelete="CASCADE"), nullable=False)
+    alias = Column(String(255), nullable=False)
+    internal_id = Column(String(36), nullable=True)
+    display_name = Column(String(255), nullable=True)
+    provider_id = Column(String(255), nullable=False)
+    enabled = Column(Boolean, default=True)
+    trust_email = Column(Boolean, default=False)
+    store_token = Column(Boolean, default=False)
+    add_read_token_role_on_create = Column(Boolean, default=False)
+    first_broker_login_flow_alias = Column(String(255), nullable=True)
+    config = Column(JSONB, nullable=False, default=dict)
+    content_hash = Column(String(64), nullable=False)  # Hash of the mirrored fields, used for diffing
+    synced_at = Column(DateTime(timezone=True), nullable=False)
+
+    def __repr__(self):
+        return f"<DomainIdentityProvider {self.alias} (domain {self.domain_id})>"
+
+    def to_schema_dict(self) -> dict:
+        """Fields in the shape of the IdentityProvider API schema"""
+        return {
+            "alias": self.alias,
+            "internalId": self.internal_id,
+            "displayName": self.display_name,
+            "providerId": self.provider_id,
+            "enabled": self.enabled,
+            "trustEmail": self.trust_email,
+            "storeToken": self.store_token,
+            "addReadTokenRoleOnCreate": self.add_read_token_role_on_create,
+            "firstBrokerLoginFlowAlias": self.first_broker_login_flow_alias or "first broker login",
+            "config": self.config or {},
+        }
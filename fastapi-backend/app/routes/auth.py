@@ -1,6 +1,5 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from app.services.security_service import SecurityService
-from app.core.dependencies import admin_required, user_required
+from fastapi import APIRouter, Body, Depends, HTTPException, status
+from app.core.dependencies import admin_required, security_service, user_required
 from datetime import timedelta
 
 router = APIRouter(
@@ -11,12 +10,11 @@ router = APIRouter(
         403: {"description": "Forbidden"}
     }
 )
-security_service = SecurityService()
-
 """Authentication API endpoints.
 
 Provides routes for:
 - Token generation (mock implementation)
+- Token revocation
 - Role-based access testing
 """
 
@@ -41,6 +39,23 @@ async def login_for_access_token() -> dict:
     )
     return {"access_token": access_token, "token_type": "bearer"}
 
+@router.post("/revoke", dependencies=[Depends(admin_required)])
+async def revoke_token(token: str = Body(..., embed=True)) -> dict:
+    """Revoke an access token before it expires.
+
+    The token is dropped from the verified-token cache and rejected by
+    this worker until its ``exp``.
+
+    Raises:
+        HTTPException 400: If the token is not a valid token
+    """
+    if not security_service.revoke_token(token):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Token is not valid"
+        )
+    return {"message": "Token revoked"}
+
 @router.get("/test-admin", dependencies=[Depends(admin_required)])
 async def test_admin_access() -> dict:
     """Validate admin-only access.
@@ -0,0 +1,127 @@
+from fastapi import APIRouter, Depends, HTTPException, status
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List
+
+from app.models.domain_template import DomainTemplate
+from app.schemas.domain_template import (
+    DomainTemplateCreate,
+    DomainTemplateResponse,
+    DomainTemplateUpdate,
+)
+from app.core.dependencies import get_db
+
+router = APIRouter(
+    prefix="/api/v1/domain-templates",
+    tags=["Domain Templates"],
+    responses={
+        401: {"description": "Unauthorized - Requires authentication"},
+        403: {"description": "Forbidden - Requires admin privileges"},
+        404: {"description": "Not Found - Template doesn't exist"}
+    }
+)
+
+"""Domain Template API
+
+Named blueprints (clients, identity providers, theme and realm settings)
+applied by ``POST /api/v1/domains`` when a ``template`` is given.
+"""
+
+async def _get_template_or_404(db: AsyncSession, template_name: str) -> DomainTemplate:
+    template = (await db.execute(
+        select(DomainTemplate).where(DomainTemplate.name == template_name)
+    )).scalars().first()
+    if not template:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Domain template {template_name} not found"
+        )
+    return template
+
+def _template_fields(template: DomainTemplateUpdate) -> dict:
+    data = template.dict(exclude={"name"})
+    if template.theme is not None:
+        data["theme"] = {key: (str(value) if value is not None else None) for key, value in template.theme.dict().items()}
+    return data
+
+@router.post(
+    "/",
+    response_model=DomainTemplateResponse,
+    status_code=status.HTTP_201_CREATED,
+    summary="Create a domain template"
+)
+async def create_domain_template(
+    template: DomainTemplateCreate,
+    db: AsyncSession = Depends(get_db)
+) -> DomainTemplateResponse:
+    """Store a new named domain template.
+
+    Raises:
+        HTTPException 400: If a template with this name already exists
+    """
+    existing = (await db.execute(
+        select(DomainTemplate.id).where(DomainTemplate.name == template.name)
+    )).first()
+    if existing:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Domain template {template.name} already exists"
+        )
+    db_template = DomainTemplate(name=template.name, **_template_fields(template))
+    db.add(db_template)
+    await db.commit()
+    await db.refresh(db_template)
+    return db_template
+
+@router.get(
+    "/",
+    response_model=List[DomainTemplateResponse],
+    summary="List domain templates"
+)
+async def list_domain_templates(db: AsyncSession = Depends(get_db)) -> List[DomainTemplateResponse]:
+    """Return all domain templates ordered by name"""
+    result = await db.execute(select(DomainTemplate).order_by(DomainTemplate.name))
+    return result.scalars().all()
+
+@router.get(
+    "/{template_name}",
+    response_model=DomainTemplateResponse,
+    summary="Get a domain template"
+)
+async def get_domain_template(
+    template_name: str,
+    db: AsyncSession = Depends(get_db)
+) -> DomainTemplateResponse:
+    """Return a single domain template"""
+    return await _get_template_or_404(db, template_name)
+
+@router.put(
+    "/{template_name}",
+    response_model=DomainTemplateResponse,
+    summary="Replace a domain template"
+)
+async def update_domain_template(
+    template_name: str,
+    template: DomainTemplateUpdate,
+    db: AsyncSession = Depends(get_db)
+) -> DomainTemplateResponse:
+    """Replace the contents of a template; existing domains are not changed"""
+    db_template = await _get_template_or_404(db, template_name)
+    for field, value in _template_fields(template).items():
+        setattr(db_template, field, value)
+    await db.commit()
+    return db_template
+
+@router.delete(
+    "/{template_name}",
+    status_code=status.HTTP_204_NO_CONTENT,
+    summary="Delete a domain template"
+)
+async def delete_domain_template(
+    template_name: str,
+    db: AsyncSession = Depends(get_db)
+):
+    """Delete a template; domains created from it are not changed"""
+    db_template = await _get_template_or_404(db, template_name)
+    await db.delete(db_template)
+    await db.commit()
@@ -1,13 +1,25 @@
-from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File
-from sqlalchemy.orm import Session
-from typing import List
-import aiofiles
-
-from app.models.domain import Domain
-from app.schemas.domain import DomainCreate, DomainResponse, DomainListResponse
-from app.schemas.client import Client, ClientListResponse
+from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File, Query, Request, Response
+from fastapi.responses import StreamingResponse
+from sqlalchemy import cast, func, insert, select, update
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.ext.asyncio import AsyncSession
+from pydantic import ValidationError
+from typing import AsyncIterator, List, Optional
+import asyncio
+import json
+from loguru import logger
+
+from app.models.client import DomainClient
+from app.models.domain import Domain, DEFAULT_THEME
+from app.models.domain_template import DomainTemplate
+from app.models.identity_provider import DomainIdentityProvider
+from app.schemas.domain import DomainBulkCreate, DomainCreate, DomainResponse, DomainOrder
+from app.schemas.client import Client, ClientBulkResponse, ClientCreate, ClientListResponse
 from app.schemas.identity_provider import (
     IdentityProvider,
+    IdentityProviderBulkStateResponse,
+    IdentityProviderBulkStateUpdate,
+    IdentityProviderStateResult,
     IdentityProviderUpdate,
     IdentityProviderListResponse,
 )
@@ -15,10 +27,23 @@ from app.schemas.theme import (
     ThemeConfig,
     ThemeConfigResponse,
     ThemeConfigUpdate,
+    LogoDirectUploadComplete,
+    LogoDirectUploadRequest,
+    LogoDirectUploadResponse,
     LogoUploadResponse,
 )
 from app.services.keycloak_service import KeycloakService
-from app.core.dependencies import get_db, get_keycloak_service # Use dependencies module
+from app.services.logo_storage import LOGO_KEY_PREFIX, LogoUploadRoute, logo_content_type, logo_extension, logo_key, store_logo
+from app.services.storage import StorageBackend
+from app.services.logo_variants import LogoVariantPipeline, best_variant
+from app.services.mirror_service import mark_identity_provider_state, mark_identity_provider_states, mirror_is_fresh, record_clients
+from app.core.database import SessionLocal
+from app.core.dependencies import admin_required, domain_permission_required, get_current_user, get_db, get_keycloak_service, get_logo_pipeline, get_storage # Use dependencies module
+from app.core.permissions import Action
+from app.core.settings import settings
+from app.services.security_service import TokenData
+from app.core.pagination import decode_cursor, encode_cursor, estimate_row_count
+from app.core.etag import make_etag, not_modified, require_match
 
 router = APIRouter(
     prefix="/api/v1/domains",
@@ -36,22 +61,149 @@ Provides CRUD operations for managing Keycloak realms through a simplified inter
 Each domain corresponds to a Keycloak realm with additional metadata.
 """
 
+# Compiled once per action; admin tokens pass every check. Routes that
+# are not about a single domain (create, bulk create, list) stay admin-only.
+domain_read_required = domain_permission_required("read")
+clients_write_required = domain_permission_required("clients:write")
+identity_providers_write_required = domain_permission_required("identity-providers:write")
+theme_write_required = domain_permission_required("theme:write")
+
+def _like_pattern(text: str, contains: bool) -> str:
+    """Escape LIKE wildcards in user input and build a prefix/contains pattern"""
+    escaped = text.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+    return f"%{escaped}%" if contains else f"{escaped}%"
+
+
+def _listing_position(cursor: Optional[str], mirrored: bool) -> dict:
+    """Decode a client/IdP listing cursor, defaulting to the first page.
+
+    Mirror cursors resume after a sort key; live cursors carry the Keycloak
+    ``first`` offset. A live cursor stays live even if the mirror becomes
+    available mid-pagination.
+    """
+    if not cursor:
+        return {"src": "mirror" if mirrored else "live"}
+    position = decode_cursor(cursor)
+    if position.get("src") == "mirror" and mirrored and isinstance(position.get("after"), str):
+        return position
+    if position.get("src") == "live" and isinstance(position.get("first"), int) and position["first"] >= 0:
+        return position
+    raise HTTPException(
+        status_code=status.HTTP_400_BAD_REQUEST,
+        detail="Invalid pagination cursor"
+    )
+
+
+async def _load_templates(db: AsyncSession, names: set) -> dict:
+    """Fetch the named domain templates with a single query"""
+    if not names:
+        return {}
+    result = await db.execute(select(DomainTemplate).where(DomainTemplate.name.in_(names)))
+    return {template.name: template for template in result.scalars()}
+
+
+async def _merge_domain_theme(db: AsyncSession, domain_name: str, changes: dict) -> dict:
+    """Merge ``changes`` into a domain's stored theme with a single UPDATE.
+
+    The merge happens in Postgres (``jsonb ||``), so concurrent writers of
+    different keys do not overwrite each other. The caller commits.
+
+    Raises:
+        HTTPException 404: If the domain is not found
+    """
+    stored = (await db.execute(
+        update(Domain)
+        .where(Domain.name == domain_name)
+        .values(theme_config=func.coalesce(Domain.theme_config, cast({}, JSONB)).op("||")(cast(changes, JSONB)))
+        .returning(Domain.theme_config)
+        .execution_options(synchronize_session=False)
+    )).first()
+    if stored is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Domain {domain_name} not found"
+        )
+    return {**DEFAULT_THEME, **(stored.theme_config or {})}
+
+async def _use_logo(
+    db: AsyncSession,
+    keycloak: KeycloakService,
+    storage: StorageBackend,
+    logo_pipeline: Optional[LogoVariantPipeline],
+    domain_name: str,
+    key: str
+) -> str:
+    """Make a stored logo the domain's logo and schedule its variants; returns its URL"""
+    url = storage.url(key)
+    await _merge_domain_theme(db, domain_name, {"logoUrl": url, "logoVariants": None})
+    await keycloak.update_theme(realm=domain_name, theme_config={"logoUrl": url})
+    await db.commit()
+    if logo_pipeline is not None:
+        logo_pipeline.submit(domain_name, key)
+    return url
+
+async def _provision_realm(
+    keycloak: KeycloakService,
+    domain: DomainCreate,
+    template: Optional[DomainTemplate]
+):
+    """Create the realm for a domain and apply its template.
+
+    Template realm settings and theme attributes travel with the
+    realm-create call; template clients and identity providers are added
+    with one partial import, so the cost does not grow with the template.
+    """
+    realm_settings = template.realm_representation() if template else None
+    await keycloak.create_realm(domain.name, domain.display_name, realm_settings=realm_settings)
+    if template and (template.clients or template.identity_providers):
+        try:
+            await keycloak.import_resources(domain.name, template.clients, template.identity_providers)
+        except Exception:
+            # Do not leave a half-provisioned realm behind
+            try:
+                await keycloak.delete_realm(domain.name)
+            except HTTPException:
+                logger.error(f"Could not remove partially provisioned realm {domain.name}")
+            raise
+
+
+# Background realm cleanups started for aborted bulk requests (kept referenced until done)
+_realm_cleanups: set = set()
+
+async def _remove_realms(keycloak: KeycloakService, names: list):
+    """Best-effort deletion of realms whose domains could not be recorded"""
+    semaphore = asyncio.Semaphore(settings.BULK_PROVISION_CONCURRENCY)
+
+    async def remove(name: str):
+        async with semaphore:
+            try:
+                await keycloak.delete_realm(name)
+            except Exception as e:
+                logger.error(f"Could not remove orphaned realm {name}: {e}")
+
+    await asyncio.gather(*(remove(name) for name in names))
+    if names:
+        logger.warning(f"Removed {len(names)} realms whose domain records were not saved")
+
+
 @router.post(
     "/", 
     response_model=DomainResponse, 
     status_code=status.HTTP_201_CREATED,
     summary="Create a new domain",
-    response_description="The created domain details"
+    response_description="The created domain details",
+    dependencies=[Depends(admin_required)]
 )
 async def create_domain(
     domain: DomainCreate,
-    db: Session = Depends(get_db),
-    keycloak: KeycloakService = Depends(KeycloakService)
+    db: AsyncSession = Depends(get_db),
+    keycloak: KeycloakService = Depends(get_keycloak_service)
 ) -> DomainResponse:
     """Create a new domain (Keycloak realm) with metadata.
     
     Creates both:
-    - A Keycloak realm
+    - A Keycloak realm (with the clients, identity providers, theme and
+      realm settings of ``domain.template`` when one is given)
     - A domain record in local database
     
     Args:
@@ -61,7 +213,7 @@ async def create_domain(
         DomainResponse: Created domain with metadata
         
     Raises:
-        HTTPException 400: If domain name already exists
+        HTTPException 400: If domain name already exists or the template is unknown
         HTTPException 500: If Keycloak realm creation fails
         
     Example:
@@ -70,20 +222,32 @@ async def create_domain(
             "name": "example-domain",
             "display_name": "Example Domain",
             "description": "Example description",
-            "default_client_redirect": "https://example.com"
+            "default_client_redirect": "https://example.com",
+            "template": "saas-tenant"
         }
     """
     # Check if domain name already exists in our database
-    existing_domain = db.query(Domain).filter(Domain.name == domain.name).first()
+    existing_domain = (await db.execute(
+        select(Domain.id).where(Domain.name == domain.name)
+    )).first()
     if existing_domain:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail=f"Domain with name {domain.name} already exists"
         )
 
+    template = None
+    if domain.template:
+        template = (await _load_templates(db, {domain.template})).get(domain.template)
+        if template is None:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Domain template {domain.template} not found"
+            )
+
     # Create the realm in Keycloak
     try:
-        await keycloak.create_realm(domain.name, domain.display_name)
+        await _provision_realm(keycloak, domain, template)
     except HTTPException as e:
         raise e
     except Exception as e:
@@ -97,50 +261,266 @@ async def create_domain(
         name=domain.name,
         display_name=domain.display_name,
         description=domain.description,
-        default_client_redirect=domain.default_client_redirect
+        default_client_redirect=domain.default_client_redirect,
+        theme_config=template.theme_config if template else dict(DEFAULT_THEME)
     )
     db.add(db_domain)
-    db.commit()
-    db.refresh(db_domain)
+    await db.commit()
+    await db.refresh(db_domain)
 
     return db_domain
 
+def _ndjson(item: dict) -> bytes:
+    return (json.dumps(item) + "\n").encode()
+
+@router.post(
+    "/bulk",
+    status_code=status.HTTP_200_OK,
+    summary="Provision many domains",
+    response_description="Newline-delimited JSON stream of per-domain results",
+    response_class=StreamingResponse,
+    dependencies=[Depends(admin_required)]
+)
+async def bulk_create_domains(
+    payload: DomainBulkCreate,
+    concurrency: int = Query(
+        settings.BULK_PROVISION_CONCURRENCY, ge=1, le=settings.BULK_PROVISION_MAX_CONCURRENCY,
+        description="Maximum number of realms created at the same time"
+    ),
+    db: AsyncSession = Depends(get_db),
+    keycloak: KeycloakService = Depends(get_keycloak_service)
+) -> StreamingResponse:
+    """Provision a batch of domains (Keycloak realms) in one request.
+
+    Existing names are found with a single lookup, realms are created with at
+    most ``concurrency`` Keycloak calls in flight, and all successfully
+    provisioned domains are inserted in one batch.
+
+    Results are streamed as NDJSON while they happen, one line per domain
+    with its ``index`` in the request and a ``status`` of ``exists``,
+    ``duplicate``, ``failed`` or ``created``, followed by a final
+    ``summary`` line. Failures are reported as soon as they occur.
+
+    Realms are never left without a domain record: if the batch insert
+    fails they are deleted again, and if the client goes away first,
+    realm creations that have not started are cancelled while started ones
+    finish and are then deleted in the background.
+
+    Args:
+        payload: Domains to create
+        concurrency: Maximum concurrent realm creations
+
+    Returns:
+        application/x-ndjson stream of per-item results
+
+    Example:
+        POST /api/v1/domains/bulk?concurrency=10
+        {"domains": [{"name": "tenant-a", "display_name": "Tenant A"}, ...]}
+    """
+    items = payload.domains
+    names = {item.name for item in items}
+    existing = set((await db.execute(
+        select(Domain.name).where(Domain.name.in_(names))
+    )).scalars().all())
+    templates = await _load_templates(db, {item.template for item in items if item.template})
+
+    async def provision() -> AsyncIterator[bytes]:
+        counts = {"created": 0, "exists": 0, "duplicate": 0, "failed": 0}
+        pending: dict[int, DomainCreate] = {}
+        seen: set = set()
+        for index, item in enumerate(items):
+            if item.name in existing:
+                counts["exists"] += 1
+                yield _ndjson({"index": index, "name": item.name, "status": "exists"})
+            elif item.name in seen:
+                counts["duplicate"] += 1
+                yield _ndjson({"index": index, "name": item.name, "status": "duplicate"})
+            else:
+                seen.add(item.name)
+                pending[index] = item
+
+        semaphore = asyncio.Semaphore(concurrency)
+        started: list[int] = []
+
+        async def create_realm(index: int, item: DomainCreate):
+            async with semaphore:
+                started.append(index)
+                try:
+                    template = None
+                    if item.template:
+                        template = templates.get(item.template)
+                        if template is None:
+                            return index, f"Domain template {item.template} not found"
+                    await _provision_realm(keycloak, item, template)
+                    return index, None
+                except HTTPException as e:
+                    return index, e.detail
+                except Exception as e:
+                    return index, str(e)
+
+        provisioned: list[int] = []
+        tasks = {index: asyncio.create_task(create_realm(index, item)) for index, item in pending.items()}
+        # True once every created realm is either recorded or removed again
+        settled = False
+
+        async def remove_abandoned(in_flight: list):
+            # Cancelling a started creation could leave a realm we cannot account for,
+            # so let those finish and remove whatever they created
+            outcomes = await asyncio.gather(*(tasks[index] for index in in_flight), return_exceptions=True)
+            created = set(provisioned) | {
+                index for index, outcome in zip(in_flight, outcomes)
+                if isinstance(outcome, tuple) and outcome[1] is None
+            }
+            await _remove_realms(keycloak, [pending[index].name for index in sorted(created)])
+
+        try:
+            for finished in asyncio.as_completed(tasks.values()):
+                index, error = await finished
+                if error is None:
+                    provisioned.append(index)
+                else:
+                    counts["failed"] += 1
+                    yield _ndjson({"index": index, "name": pending[index].name, "status": "failed", "detail": error})
+
+            ids = None
+            if provisioned:
+                provisioned.sort()
+                rows = [
+                    {
+                        "name": pending[index].name,
+                        "display_name": pending[index].display_name,
+                        "description": pending[index].description,
+                        "default_client_redirect": pending[index].default_client_redirect,
+                        "theme_config": (
+                            templates[pending[index].template].theme_config
+                            if pending[index].template else dict(DEFAULT_THEME)
+                        ),
+                    }
+                    for index in provisioned
+                ]
+                try:
+                    async with SessionLocal() as session:
+                        result = await session.execute(
+                            insert(Domain).values(rows).returning(Domain.id, Domain.name)
+                        )
+                        ids = {name: domain_id for domain_id, name in result.all()}
+                        await session.commit()
+                except Exception as e:
+                    logger.error(f"Bulk domain insert failed after creating {len(rows)} realms: {e}")
+                    await _remove_realms(keycloak, [pending[index].name for index in provisioned])
+                    error = str(e)
+            settled = True
+        finally:
+            if not settled:
+                # The client went away (or the insert was interrupted) before the domains were recorded
+                for index, task in tasks.items():
+                    if index not in started:
+                        task.cancel()
+                cleanup = asyncio.create_task(remove_abandoned(list(started)))
+                _realm_cleanups.add(cleanup)
+                cleanup.add_done_callback(_realm_cleanups.discard)
+
+        for index in provisioned:
+            name = pending[index].name
+            if ids is None:
+                counts["failed"] += 1
+                yield _ndjson({
+                    "index": index, "name": name, "status": "failed",
+                    "detail": f"Domain record could not be saved, realm removed: {error}"
+                })
+            else:
+                counts["created"] += 1
+                yield _ndjson({"index": index, "name": name, "status": "created", "id": ids.get(name)})
+
+        yield _ndjson({"summary": counts})
+
+    return StreamingResponse(provision(), media_type="application/x-ndjson")
+
 @router.get(
     "/",
     response_model=List[DomainResponse],
     summary="List all domains",
-    response_description="Paginated list of domains"
+    response_description="Paginated list of domains",
+    dependencies=[Depends(admin_required)]
 )
-def list_domains(
-    skip: int = 0,
-    limit: int = 100,
-    db: Session = Depends(get_db)
+async def list_domains(
+    response: Response,
+    cursor: Optional[str] = Query(None, description="Opaque cursor from a previous X-Next-Cursor header"),
+    limit: int = Query(100, ge=1, le=500),
+    order_by: DomainOrder = DomainOrder.id,
+    is_active: Optional[bool] = None,
+    display_name_prefix: Optional[str] = Query(None, min_length=1, max_length=255),
+    include_total: bool = False,
+    db: AsyncSession = Depends(get_db)
 ) -> List[DomainResponse]:
-    """Retrieve a paginated list of domains.
+    """Retrieve a page of domains using keyset (cursor) pagination.
+
+    Pages are stable while domains are being created: each page resumes
+    strictly after the last row of the previous one instead of skipping an
+    offset. The cursor for the next page is returned in the
+    ``X-Next-Cursor`` header (absent on the last page).
     
     Args:
-        skip: Number of items to skip (pagination offset)
-        limit: Maximum number of items to return (pagination limit)
+        cursor: Cursor returned with the previous page
+        limit: Maximum number of items to return
+        order_by: Sort key, ``id`` or ``name``
+        is_active: Only return active (or inactive) domains
+        display_name_prefix: Only return domains whose display name starts with this
+        include_total: Add a planner-estimated total in ``X-Total-Count-Estimate``
 
     Returns:
         List of domain objects with metadata
 
+    Raises:
+        HTTPException 400: If the cursor is invalid or was issued for another ordering
+
     Example:
-        GET /api/v1/domains?skip=0&limit=10
+        GET /api/v1/domains?limit=10&order_by=name&is_active=true
     """
-    domains = db.query(Domain).offset(skip).limit(limit).all()
+    sort_column = Domain.id if order_by == DomainOrder.id else Domain.name
+
+    query = select(Domain)
+    if is_active is not None:
+        query = query.where(Domain.is_active.is_(is_active))
+    if display_name_prefix:
+        query = query.where(Domain.display_name.like(_like_pattern(display_name_prefix, contains=False), escape="\\"))
+
+    if include_total:
+        estimate = await estimate_row_count(db, query)
+        if estimate is not None:
+            response.headers["X-Total-Count-Estimate"] = str(estimate)
+
+    page_query = query
+    if cursor:
+        after = decode_cursor(cursor, order=order_by.value).get("after")
+        if not isinstance(after, int if order_by == DomainOrder.id else str):
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Invalid pagination cursor"
+            )
+        page_query = page_query.where(sort_column > after)
+    result = await db.execute(page_query.order_by(sort_column).limit(limit + 1))
+    domains = result.scalars().all()
+
+    if len(domains) > limit:
+        domains = domains[:limit]
+        last = getattr(domains[-1], order_by.value)
+        response.headers["X-Next-Cursor"] = encode_cursor({"order": order_by.value, "after": last})
     return domains
 
 @router.get(
     "/{domain_name}",
     response_model=DomainResponse,
     summary="Get domain details",
-    response_description="Domain details including Keycloak realm info"
+    response_description="Domain details including Keycloak realm info",
+    dependencies=[Depends(domain_read_required)]
 )
 async def get_domain(
     domain_name: str,
-    db: Session = Depends(get_db),
-    keycloak: KeycloakService = Depends(KeycloakService)
+    request: Request,
+    response: Response,
+    db: AsyncSession = Depends(get_db),
+    keycloak: KeycloakService = Depends(get_keycloak_service)
 ) -> DomainResponse:
     """Retrieve comprehensive details for a specific domain.
 
@@ -152,7 +532,8 @@ async def get_domain(
         domain_name: Unique name of the domain to retrieve
 
     Returns:
-        Combined domain metadata and Keycloak realm details
+        Combined domain metadata and Keycloak realm details, with a strong
+        ``ETag``; a matching ``If-None-Match`` gets an empty 304
 
     Raises:
         HTTPException 404: If domain doesn't exist
@@ -160,7 +541,9 @@ async def get_domain(
     Example:
         GET /api/v1/domains/example-domain
     """
-    domain = db.query(Domain).filter(Domain.name == domain_name).first()
+    domain = (await db.execute(
+        select(Domain).where(Domain.name == domain_name)
+    )).scalars().first()
     if not domain:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -170,46 +553,112 @@ async def get_domain(
     # Get additional info from Keycloak
     try:
         realm_info = await keycloak.get_realm_info(domain_name)
-        return {
-            **domain.__dict__,
-            "keycloak_info": realm_info
-        }
     except HTTPException:
         # If we can't get Keycloak info, just return the basic domain info
+        realm_info = None
+
+    etag = make_etag({column.name: getattr(domain, column.name) for column in Domain.__table__.columns}, realm_info)
+    cached = not_modified(request, etag)
+    if cached:
+        return cached
+    response.headers["ETag"] = etag
+    if realm_info is None:
         return domain
+    return {
+        **domain.__dict__,
+        "keycloak_info": realm_info
+    }
 
 
 @router.get(
     "/{domain_name}/clients",
     response_model=ClientListResponse, # Use the new schema
     summary="List clients (applications) for a domain",
-    response_description="List of clients configured in the specified domain"
+    response_description="Page of clients configured in the specified domain",
+    dependencies=[Depends(domain_read_required)]
 )
 async def list_domain_clients(
     domain_name: str,
+    request: Request,
+    response: Response,
+    cursor: Optional[str] = Query(None, description="Opaque cursor from a previous next_cursor"),
+    limit: int = Query(100, ge=1, le=500),
+    search: Optional[str] = Query(None, min_length=1, max_length=255, description="clientId substring"),
+    db: AsyncSession = Depends(get_db),
     keycloak: KeycloakService = Depends(get_keycloak_service) # Use dependency injection
 ) -> ClientListResponse:
-    """Retrieve all clients (applications) associated with a specific domain (realm).
+    """Retrieve a page of clients (applications) of a specific domain (realm).
+
+    Served from the local client mirror once it has been reconciled for the
+    domain, falling back to a live Keycloak read otherwise. On the live path
+    paging and the clientId search are pushed down to Keycloak and only the
+    fields of the Client schema are fetched.
 
     Args:
         domain_name: The name of the domain (realm) to query.
+        cursor: Cursor returned as ``next_cursor`` with the previous page.
+        limit: Maximum number of clients to return.
+        search: Only return clients whose clientId contains this text.
 
     Returns:
-        A list of client details.
+        A page of client details, the next cursor and the mirror freshness
+        timestamp, with a strong ``ETag``; a matching ``If-None-Match`` gets
+        an empty 304.
 
     Raises:
-        HTTPException 400: If Keycloak encounters an error listing clients.
+        HTTPException 400: If Keycloak encounters an error listing clients or the cursor is invalid.
         HTTPException 404: If the domain itself is not found (implicitly handled by KeycloakService).
         
     Example:
-        GET /api/v1/domains/example-domain/clients
+        GET /api/v1/domains/example-domain/clients?limit=50&search=portal
     """
+    domain = (await db.execute(
+        select(Domain).where(Domain.name == domain_name)
+    )).scalars().first()
+    mirrored = bool(domain) and mirror_is_fresh(domain.mirror_synced_at)
+    position = _listing_position(cursor, mirrored)
+
+    if position["src"] == "mirror":
+        query = select(DomainClient).where(DomainClient.domain_id == domain.id)
+        if search:
+            query = query.where(DomainClient.client_id.ilike(_like_pattern(search, contains=True), escape="\\"))
+        if "after" in position:
+            query = query.where(DomainClient.client_id > position["after"])
+        rows = (await db.execute(
+            query.order_by(DomainClient.client_id).limit(limit + 1)
+        )).scalars().all()
+        next_cursor = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            next_cursor = encode_cursor({"src": "mirror", "after": rows[-1].client_id})
+        etag = make_etag([row.content_hash for row in rows], next_cursor, domain.mirror_synced_at)
+        cached = not_modified(request, etag)
+        if cached:
+            return cached
+        response.headers["ETag"] = etag
+        return ClientListResponse(
+            clients=[Client(**row.to_schema_dict()) for row in rows],
+            next_cursor=next_cursor,
+            synced_at=domain.mirror_synced_at
+        )
+
     try:
+        first = position.get("first", 0)
         # The KeycloakService already handles potential 404s if the realm doesn't exist
-        keycloak_clients = await keycloak.list_clients(realm=domain_name)
+        keycloak_clients = await keycloak.list_clients(
+            realm=domain_name, first=first, max_results=limit + 1, search=search
+        )
+        next_cursor = None
+        if len(keycloak_clients) > limit:
+            keycloak_clients = keycloak_clients[:limit]
+            next_cursor = encode_cursor({"src": "live", "first": first + limit})
+        etag = make_etag(keycloak_clients, next_cursor)
+        cached = not_modified(request, etag)
+        if cached:
+            return cached
+        response.headers["ETag"] = etag
         
         # Map the raw Keycloak client data to our Pydantic schema
-        # Note: Keycloak client data structure might need inspection to ensure fields match Client schema
         # We need to handle potential missing fields gracefully
         clients_response = []
         for client_data in keycloak_clients:
@@ -221,20 +670,16 @@ async def list_domain_clients(
                  "description": client_data.get("description"),
                  "enabled": client_data.get("enabled", True),
                  "publicClient": client_data.get("publicClient", True),
-                 "redirectUris": client_data.get("redirectUris", []),
+                 "redirectUris": client_data.get("redirectUris") or [],
                  "rootUrl": client_data.get("rootUrl"),
                  "baseUrl": client_data.get("baseUrl"),
                  "adminUrl": client_data.get("adminUrl"),
              }
-             # Filter out None values if the Pydantic model doesn't expect them for required fields
-             # (id and clientId are required by our schema)
+             # id and clientId are required by our schema
              if client_dict["id"] and client_dict["clientId"]:
                  clients_response.append(Client(**client_dict))
-             else:
-                 # Log or handle clients missing essential IDs if necessary
-                 pass 
                  
-        return ClientListResponse(clients=clients_response)
+        return ClientListResponse(clients=clients_response, next_cursor=next_cursor)
     except HTTPException as e:
         # Re-raise HTTPExceptions from the service layer
         raise e
@@ -246,34 +691,264 @@ async def list_domain_clients(
         )
 
 
+async def _read_client_definitions(request: Request) -> list:
+    """Parse a JSON array/object or an NDJSON stream of client definitions.
+
+    NDJSON bodies are parsed line by line as they arrive. Lines that are
+    not valid JSON are kept as ``None`` so they can be reported per item.
+    """
+    limit = settings.BULK_CLIENT_MAX_ITEMS
+    too_many = HTTPException(
+        status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+        detail=f"At most {limit} clients can be registered per request"
+    )
+    content_type = request.headers.get("content-type", "")
+    if "ndjson" in content_type or "jsonl" in content_type:
+        items: list = []
+        buffer = b""
+        async for chunk in request.stream():
+            buffer += chunk
+            *lines, buffer = buffer.split(b"\n")
+            for line in lines:
+                if line.strip():
+                    try:
+                        items.append(json.loads(line))
+                    except ValueError:
+                        items.append(None)
+                    if len(items) > limit:
+                        raise too_many
+        if buffer.strip():
+            try:
+                items.append(json.loads(buffer))
+            except ValueError:
+                items.append(None)
+    else:
+        try:
+            body = await request.json()
+        except ValueError:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Request body must be a JSON array, a JSON object or NDJSON"
+            )
+        items = body if isinstance(body, list) else [body]
+    if len(items) > limit:
+        raise too_many
+    return items
+
+
+@router.post(
+    "/{domain_name}/clients",
+    response_model=ClientBulkResponse,
+    summary="Register clients (applications) in a domain",
+    response_description="Per-item registration status",
+    dependencies=[Depends(clients_write_required)]
+)
+async def register_domain_clients(
+    domain_name: str,
+    request: Request,
+    db: AsyncSession = Depends(get_db),
+    keycloak: KeycloakService = Depends(get_keycloak_service)
+) -> ClientBulkResponse:
+    """Register one or many public clients in a domain (realm).
+
+    Accepts a single client object, a JSON array of clients, or an
+    ``application/x-ndjson`` stream with one client per line. Existing
+    clientIds are found with one Keycloak lookup; the remaining clients are
+    created through partial imports of up to ``BULK_CLIENT_IMPORT_CHUNK``
+    clients each instead of one call per client.
+
+    Args:
+        domain_name: The name of the domain (realm).
+
+    Returns:
+        One result per submitted item (``created``, ``exists``, ``duplicate``,
+        ``invalid`` or ``failed``) and a summary of counts.
+
+    Raises:
+        HTTPException 400: If the body cannot be parsed or Keycloak rejects the lookup.
+        HTTPException 413: If more than ``BULK_CLIENT_MAX_ITEMS`` clients are sent.
+
+    Example:
+        POST /api/v1/domains/example-domain/clients
+        Content-Type: application/x-ndjson
+
+        {"clientId": "portal", "redirectUris": ["https://portal.example.com/*"]}
+        {"clientId": "admin-ui", "redirectUris": ["https://admin.example.com/*"]}
+    """
+    definitions = await _read_client_definitions(request)
+    results: list = [None] * len(definitions)
+    accepted = {}
+    for index, definition in enumerate(definitions):
+        try:
+            client = ClientCreate.parse_obj(definition)
+        except ValidationError as e:
+            results[index] = {"index": index, "status": "invalid", "detail": str(e)}
+            continue
+        if client.clientId in accepted:
+            results[index] = {"index": index, "clientId": client.clientId, "status": "duplicate"}
+            continue
+        accepted[client.clientId] = index
+        definitions[index] = client
+
+    existing = await keycloak.list_client_ids(domain_name) if accepted else set()
+    to_create = []
+    for client_id, index in accepted.items():
+        if client_id in existing:
+            results[index] = {"index": index, "clientId": client_id, "status": "exists"}
+        else:
+            to_create.append(definitions[index])
+
+    created = []
+    chunk_size = settings.BULK_CLIENT_IMPORT_CHUNK
+    for start in range(0, len(to_create), chunk_size):
+        chunk = to_create[start:start + chunk_size]
+        representations = [
+            {
+                **client.dict(),
+                "standardFlowEnabled": True,
+                "implicitFlowEnabled": False,
+                "directAccessGrantsEnabled": True,
+            }
+            for client in chunk
+        ]
+        try:
+            outcome = await keycloak.import_resources(domain_name, clients=representations, identity_providers=[])
+        except HTTPException as e:
+            for client in chunk:
+                index = accepted[client.clientId]
+                results[index] = {"index": index, "clientId": client.clientId, "status": "failed", "detail": e.detail}
+            continue
+        imported = {
+            item.get("resourceName"): item
+            for item in outcome.get("results", [])
+            if item.get("resourceType") == "CLIENT"
+        }
+        for client, representation in zip(chunk, representations):
+            index = accepted[client.clientId]
+            item = imported.get(client.clientId)
+            if item is None:
+                # Not reported by the import, so its creation cannot be confirmed
+                results[index] = {
+                    "index": index, "clientId": client.clientId, "status": "failed",
+                    "detail": "Client missing from the partial import results"
+                }
+            elif item.get("action") == "SKIPPED":
+                results[index] = {"index": index, "clientId": client.clientId, "status": "exists"}
+            else:
+                results[index] = {"index": index, "clientId": client.clientId, "status": "created", "id": item.get("id")}
+                if item.get("id"):
+                    created.append({**representation, "id": item["id"]})
+
+    await record_clients(db, domain_name, created)
+
+    summary = {key: 0 for key in ("created", "exists", "duplicate", "invalid", "failed")}
+    for result in results:
+        summary[result["status"]] += 1
+    return ClientBulkResponse(results=results, summary=summary)
+
+
 @router.get(
     "/{domain_name}/identity-providers",
     response_model=IdentityProviderListResponse,
     summary="List identity providers for a domain",
-    response_description="List of identity providers configured in the specified domain"
+    response_description="Page of identity providers configured in the specified domain",
+    dependencies=[Depends(domain_read_required)]
 )
 async def list_domain_identity_providers(
     domain_name: str,
+    request: Request,
+    response: Response,
+    cursor: Optional[str] = Query(None, description="Opaque cursor from a previous next_cursor"),
+    limit: int = Query(100, ge=1, le=500),
+    search: Optional[str] = Query(None, min_length=1, max_length=255, description="Alias prefix"),
+    brief: bool = Query(False, description="Omit provider-specific config"),
+    db: AsyncSession = Depends(get_db),
     keycloak: KeycloakService = Depends(get_keycloak_service)
 ) -> IdentityProviderListResponse:
-    """Retrieve all identity providers associated with a specific domain (realm).
+    """Retrieve a page of identity providers of a specific domain (realm).
+
+    Served from the local identity provider mirror once it has been
+    reconciled for the domain, falling back to a live Keycloak read
+    otherwise. On the live path paging, search and the brief representation
+    are pushed down to Keycloak.
 
     Args:
         domain_name: The name of the domain (realm) to query.
+        cursor: Cursor returned as ``next_cursor`` with the previous page.
+        limit: Maximum number of providers to return.
+        search: Only return providers whose alias starts with this text.
+        brief: Return providers without their config.
 
     Returns:
-        A list of identity provider details.
+        A page of identity provider details, the next cursor and the mirror
+        freshness timestamp, with a strong ``ETag``; a matching
+        ``If-None-Match`` gets an empty 304.
 
     Raises:
-        HTTPException 400: If Keycloak encounters an error listing providers.
+        HTTPException 400: If Keycloak encounters an error listing providers or the cursor is invalid.
         HTTPException 404: If the domain itself is not found.
         
     Example:
-        GET /api/v1/domains/example-domain/identity-providers
+        GET /api/v1/domains/example-domain/identity-providers?brief=true
     """
+    domain = (await db.execute(
+        select(Domain).where(Domain.name == domain_name)
+    )).scalars().first()
+    mirrored = bool(domain) and mirror_is_fresh(domain.mirror_synced_at)
+    position = _listing_position(cursor, mirrored)
+
+    if position["src"] == "mirror":
+        query = select(DomainIdentityProvider).where(DomainIdentityProvider.domain_id == domain.id)
+        if search:
+            query = query.where(DomainIdentityProvider.alias.like(_like_pattern(search, contains=False), escape="\\"))
+        if "after" in position:
+            query = query.where(DomainIdentityProvider.alias > position["after"])
+        rows = (await db.execute(
+            query.order_by(DomainIdentityProvider.alias).limit(limit + 1)
+        )).scalars().all()
+        next_cursor = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            next_cursor = encode_cursor({"src": "mirror", "after": rows[-1].alias})
+        # State changes made through the API update ``enabled`` in place without
+        # rehashing the row, so it is part of the tag
+        etag = make_etag(
+            [(row.content_hash, row.enabled) for row in rows], next_cursor, brief, domain.mirror_synced_at
+        )
+        cached = not_modified(request, etag)
+        if cached:
+            return cached
+        response.headers["ETag"] = etag
+        providers = []
+        for row in rows:
+            fields = row.to_schema_dict()
+            if brief:
+                fields["config"] = {}
+            providers.append(IdentityProvider(**fields))
+        return IdentityProviderListResponse(
+            providers=providers,
+            next_cursor=next_cursor,
+            synced_at=domain.mirror_synced_at
+        )
+
     try:
-        idps = await keycloak.list_identity_providers(realm=domain_name)
-        return IdentityProviderListResponse(providers=[IdentityProvider(**idp) for idp in idps])
+        first = position.get("first", 0)
+        idps = await keycloak.list_identity_providers(
+            realm=domain_name, first=first, max_results=limit + 1, search=search, brief=brief
+        )
+        next_cursor = None
+        if len(idps) > limit:
+            idps = idps[:limit]
+            next_cursor = encode_cursor({"src": "live", "first": first + limit})
+        etag = make_etag(idps, next_cursor)
+        cached = not_modified(request, etag)
+        if cached:
+            return cached
+        response.headers["ETag"] = etag
+        return IdentityProviderListResponse(
+            providers=[IdentityProvider(**idp) for idp in idps],
+            next_cursor=next_cursor
+        )
     except HTTPException as e:
         raise e
     except Exception as e:
@@ -287,11 +962,14 @@ async def list_domain_identity_providers(
     "/{domain_name}/identity-providers/{provider_alias}",
     response_model=IdentityProvider,
     summary="Get identity provider details",
-    response_description="Detailed configuration for the specified identity provider"
+    response_description="Detailed configuration for the specified identity provider",
+    dependencies=[Depends(domain_read_required)]
 )
 async def get_domain_identity_provider(
     domain_name: str,
     provider_alias: str,
+    request: Request,
+    response: Response,
     keycloak: KeycloakService = Depends(get_keycloak_service)
 ) -> IdentityProvider:
     """Get detailed information about a specific identity provider.
@@ -301,7 +979,9 @@ async def get_domain_identity_provider(
         provider_alias: The alias/ID of the identity provider.
 
     Returns:
-        Detailed identity provider configuration.
+        Detailed identity provider configuration, with a strong ``ETag``
+        that ``PATCH .../state`` accepts in ``If-Match``; a matching
+        ``If-None-Match`` gets an empty 304.
 
     Raises:
         HTTPException 404: If the domain or provider is not found.
@@ -311,6 +991,11 @@ async def get_domain_identity_provider(
     """
     try:
         idp = await keycloak.get_identity_provider(realm=domain_name, alias=provider_alias)
+        etag = make_etag(idp)
+        cached = not_modified(request, etag)
+        if cached:
+            return cached
+        response.headers["ETag"] = etag
         return IdentityProvider(**idp)
     except HTTPException as e:
         raise e
@@ -321,16 +1006,114 @@ async def get_domain_identity_provider(
         )
 
 
+@router.patch(
+    "/identity-providers/state",
+    response_model=IdentityProviderBulkStateResponse,
+    summary="Update the state of many identity providers",
+    response_description="Per-change results and a summary"
+)
+async def bulk_update_identity_provider_states(
+    payload: IdentityProviderBulkStateUpdate,
+    concurrency: int = Query(
+        settings.BULK_IDP_STATE_CONCURRENCY, ge=1, le=settings.BULK_IDP_STATE_MAX_CONCURRENCY,
+        description="Maximum number of Keycloak calls in flight"
+    ),
+    db: AsyncSession = Depends(get_db),
+    keycloak: KeycloakService = Depends(get_keycloak_service),
+    current_user: TokenData = Depends(get_current_user)
+) -> IdentityProviderBulkStateResponse:
+    """Enable or disable identity providers across any number of domains.
+
+    Each realm's providers are read once; providers already in the
+    requested state are reported as ``unchanged`` without a write, and the
+    remaining updates run with at most ``concurrency`` Keycloak calls in
+    flight. A repeated (realm, alias) pair is reported as ``duplicate``;
+    the first occurrence wins.
+
+    Args:
+        payload: The (realm, alias, enabled) changes to apply
+        concurrency: Maximum concurrent Keycloak calls
+
+    Returns:
+        One result per change with a status of ``updated``, ``unchanged``,
+        ``duplicate``, ``not_found`` or ``failed``, plus a summary of counts.
+
+    Raises:
+        HTTPException 403: If ``identity-providers:write`` is missing on any
+            of the domains; nothing is changed then
+
+    Example:
+        PATCH /api/v1/domains/identity-providers/state?concurrency=16
+        {
+            "changes": [
+                {"realm": "tenant-a", "alias": "google", "enabled": false},
+                {"realm": "tenant-b", "alias": "google", "enabled": false}
+            ]
+        }
+    """
+    denied = sorted({
+        change.realm for change in payload.changes
+        if not current_user.permissions.allows(change.realm, Action.IDENTITY_PROVIDERS_WRITE)
+    })
+    if denied:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail=f"Not enough permissions on domains {', '.join(denied)}"
+        )
+
+    by_realm: dict = {}
+    first_index: dict = {}
+    for index, change in enumerate(payload.changes):
+        key = (change.realm, change.alias)
+        if key not in first_index:
+            first_index[key] = index
+            by_realm.setdefault(change.realm, {})[change.alias] = change.enabled
+
+    semaphore = asyncio.Semaphore(concurrency)
+    realms = list(by_realm)
+    outcomes = await asyncio.gather(*(
+        keycloak.set_identity_provider_states(realm, by_realm[realm], semaphore) for realm in realms
+    ))
+    outcome_by_key = {
+        (realm, alias): outcome
+        for realm, realm_outcomes in zip(realms, outcomes)
+        for alias, outcome in realm_outcomes.items()
+    }
+
+    results = []
+    summary = {key: 0 for key in ("updated", "unchanged", "duplicate", "not_found", "failed")}
+    for index, change in enumerate(payload.changes):
+        key = (change.realm, change.alias)
+        if first_index[key] != index:
+            outcome, detail = "duplicate", None
+        else:
+            outcome, detail = outcome_by_key[key]
+        summary[outcome] += 1
+        results.append(IdentityProviderStateResult(
+            index=index, realm=change.realm, alias=change.alias,
+            enabled=change.enabled, status=outcome, detail=detail
+        ))
+
+    await mark_identity_provider_states(db, [
+        (result.realm, result.alias, result.enabled)
+        for result in results if result.status == "updated"
+    ])
+    return IdentityProviderBulkStateResponse(results=results, summary=summary)
+
+
 @router.patch(
     "/{domain_name}/identity-providers/{provider_alias}/state",
     response_model=dict,
     summary="Update identity provider state",
-    response_description="Result of the state update operation"
+    response_description="Result of the state update operation",
+    dependencies=[Depends(identity_providers_write_required)]
 )
 async def update_domain_identity_provider_state(
     domain_name: str,
     provider_alias: str,
     state: IdentityProviderUpdate,
+    request: Request,
+    db: AsyncSession = Depends(get_db),
     keycloak: KeycloakService = Depends(get_keycloak_service)
 ) -> dict:
     """Enable or disable an identity provider.
@@ -340,12 +1123,16 @@ async def update_domain_identity_provider_state(
         provider_alias: The alias/ID of the identity provider.
         state: The new state (enabled/disabled).
 
+    Send the ``ETag`` of a previous read of the provider as ``If-Match`` to
+    only apply the change if the provider has not changed since.
+
     Returns:
         Status of the update operation.
 
     Raises:
         HTTPException 404: If the domain or provider is not found.
         HTTPException 400: If the update operation fails.
+        HTTPException 412: If ``If-Match`` does not match the current provider.
         
     Example:
         PATCH /api/v1/domains/example-domain/identity-providers/google/state
@@ -357,8 +1144,10 @@ async def update_domain_identity_provider_state(
         result = await keycloak.update_identity_provider_state(
             realm=domain_name,
             alias=provider_alias,
-            enabled=state.enabled
+            enabled=state.enabled,
+            if_match=request.headers.get("if-match")
         )
+        await mark_identity_provider_state(db, domain_name, provider_alias, state.enabled)
         return result
     except HTTPException as e:
         raise e
@@ -373,19 +1162,34 @@ async def update_domain_identity_provider_state(
     "/{domain_name}/theme",
     response_model=ThemeConfigResponse,
     summary="Get theme configuration",
-    response_description="Current theme configuration for the domain"
+    response_description="Current theme configuration for the domain",
+    dependencies=[Depends(domain_read_required)]
 )
 async def get_domain_theme(
     domain_name: str,
-    keycloak: KeycloakService = Depends(get_keycloak_service)
+    request: Request,
+    response: Response,
+    logo_width: Optional[int] = Query(
+        None, ge=1, le=4096, description="Display width used to pick logoVariantUrl"
+    ),
+    db: AsyncSession = Depends(get_db)
 ) -> ThemeConfigResponse:
     """Get the current theme configuration for a domain.
 
+    The theme is read from the domain's ``theme_config``; Keycloak is not
+    contacted. Once the variants of an uploaded logo have been generated,
+    ``logoVariantUrl`` is the smallest one at least ``logo_width`` wide (the
+    largest without ``logo_width``), in WebP when the ``Accept`` header
+    allows it and PNG otherwise.
+
     Args:
         domain_name: The name of the domain (realm).
+        logo_width: Width at which the logo will be displayed.
 
     Returns:
-        Current theme configuration including colors and logo URL.
+        Current theme configuration including colors and logo URL, with a
+        strong ``ETag`` that ``PUT /theme`` accepts in ``If-Match``; a
+        matching ``If-None-Match`` gets an empty 304.
 
     Raises:
         HTTPException 404: If the domain is not found.
@@ -393,41 +1197,65 @@ async def get_domain_theme(
     Example:
         GET /api/v1/domains/example-domain/theme
     """
-    try:
-        theme_config = await keycloak.get_theme(realm=domain_name)
-        return ThemeConfigResponse(**theme_config)
-    except HTTPException as e:
-        raise e
-    except Exception as e:
+    domain = (await db.execute(
+        select(Domain).where(Domain.name == domain_name)
+    )).scalars().first()
+    if not domain:
         raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=f"An unexpected error occurred while fetching theme configuration: {str(e)}"
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Domain {domain_name} not found"
         )
+    theme = domain.theme
+    # The variant pick depends only on the URL and Accept, so the tag of the
+    # stored theme stays valid for If-Match on PUT /theme
+    etag = make_etag(theme)
+    cached = not_modified(request, etag)
+    if cached:
+        cached.headers["Vary"] = "Accept"
+        return cached
+    response.headers["ETag"] = etag
+    response.headers["Vary"] = "Accept"
+    return ThemeConfigResponse(
+        **theme,
+        logoVariantUrl=best_variant(theme.get("logoVariants"), logo_width, request.headers.get("accept", ""))
+    )
 
 
 @router.put(
     "/{domain_name}/theme",
     response_model=ThemeConfigResponse,
     summary="Update theme configuration",
-    response_description="Updated theme configuration"
+    response_description="Updated theme configuration",
+    dependencies=[Depends(theme_write_required)]
 )
 async def update_domain_theme(
     domain_name: str,
     theme_config: ThemeConfigUpdate,
+    request: Request,
+    response: Response,
+    db: AsyncSession = Depends(get_db),
     keycloak: KeycloakService = Depends(get_keycloak_service)
 ) -> ThemeConfigResponse:
     """Update the theme configuration for a domain.
 
+    The stored theme is merged with the given fields in one database
+    update, the changed fields are pushed to the realm in one Keycloak
+    request, and the response is built from the merged row.
+
+    Send the ``ETag`` of a previous read as ``If-Match`` to only apply the
+    update if the theme has not changed since.
+
     Args:
         domain_name: The name of the domain (realm).
         theme_config: New theme configuration.
 
     Returns:
-        Updated theme configuration.
+        Updated theme configuration and its new ``ETag``.
 
     Raises:
         HTTPException 404: If the domain is not found.
         HTTPException 400: If the theme update fails.
+        HTTPException 412: If ``If-Match`` does not match the current theme.
         
     Example:
         PUT /api/v1/domains/example-domain/theme
@@ -436,34 +1264,60 @@ async def update_domain_theme(
             "secondaryColor": "#6b7280"
         }
     """
+    changes = {
+        key: (str(value) if value is not None else None)
+        for key, value in theme_config.dict(exclude_unset=True).items()
+    }
     try:
-        updated_config = await keycloak.update_theme(
-            realm=domain_name,
-            theme_config=theme_config.model_dump(exclude_unset=True)
-        )
-        return ThemeConfigResponse(**updated_config)
+        if request.headers.get("if-match"):
+            # Lock the row so the check and the merge see the same theme
+            current = (await db.execute(
+                select(Domain.theme_config).where(Domain.name == domain_name).with_for_update()
+            )).first()
+            if current is None:
+                raise HTTPException(
+                    status_code=status.HTTP_404_NOT_FOUND,
+                    detail=f"Domain {domain_name} not found"
+                )
+            require_match(request, make_etag({**DEFAULT_THEME, **(current.theme_config or {})}))
+        stored = dict(changes)
+        if "logoUrl" in changes:
+            # Variants belong to the previous logo
+            stored["logoVariants"] = None
+        theme = await _merge_domain_theme(db, domain_name, stored)
+        await keycloak.update_theme(realm=domain_name, theme_config=changes)
+        await db.commit()
+        response.headers["ETag"] = make_etag(theme)
+        return ThemeConfigResponse(**theme)
     except HTTPException as e:
+        await db.rollback()
         raise e
     except Exception as e:
+        await db.rollback()
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"An unexpected error occurred while updating theme configuration: {str(e)}"
         )
 
 
-@router.post(
-    "/{domain_name}/theme/logo",
-    response_model=LogoUploadResponse,
-    summary="Upload domain logo",
-    response_description="URL of the uploaded logo"
-)
 async def upload_domain_logo(
     domain_name: str,
     logo: UploadFile = File(...),
-    keycloak: KeycloakService = Depends(get_keycloak_service)
+    db: AsyncSession = Depends(get_db),
+    keycloak: KeycloakService = Depends(get_keycloak_service),
+    storage: StorageBackend = Depends(get_storage),
+    logo_pipeline: Optional[LogoVariantPipeline] = Depends(get_logo_pipeline)
 ) -> LogoUploadResponse:
     """Upload a logo for a domain.
 
+    The file is streamed through a temporary file in chunks (never held in
+    memory as a whole) and stored under its SHA-256, so the returned URL is
+    immutable and identical logos are stored once. With the S3 storage
+    backend, prefer ``POST .../theme/logo/upload-url`` so the file does not
+    pass through the API at all. Resized WebP/PNG variants are
+    generated afterwards in a process pool and appear as ``logoVariants``
+    in the theme once ready.
+
     Args:
         domain_name: The name of the domain (realm).
         logo: The logo file to upload (image file).
@@ -473,7 +1327,9 @@ async def upload_domain_logo(
 
     Raises:
         HTTPException 404: If the domain is not found.
-        HTTPException 400: If the logo upload fails.
+        HTTPException 400: If the file type is not accepted or the theme update fails.
+        HTTPException 413: If the file exceeds ``LOGO_MAX_BYTES``; a request body
+            larger than that (plus multipart overhead) is refused before it is read.
         
     Example:
         POST /api/v1/domains/example-domain/theme/logo
@@ -482,21 +1338,147 @@ async def upload_domain_logo(
         logo: [binary file data]
     """
     try:
-        # Read the file content
-        content = await logo.read()
-        
-        # Upload the logo and get its URL
-        logo_url = await keycloak.upload_logo(
-            realm=domain_name,
-            logo_file=content,
-            filename=logo.filename
-        )
+        key = await store_logo(logo, storage)
+        logo_url = await _use_logo(db, keycloak, storage, logo_pipeline, domain_name, key)
         
         return LogoUploadResponse(url=logo_url)
     except HTTPException as e:
+        await db.rollback()
         raise e
     except Exception as e:
+        await db.rollback()
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"An unexpected error occurred while uploading logo: {str(e)}"
         )
+
+# Declared with add_api_route for its route class, which bounds the body before it is parsed
+router.add_api_route(
+    "/{domain_name}/theme/logo",
+    upload_domain_logo,
+    methods=["POST"],
+    response_model=LogoUploadResponse,
+    summary="Upload domain logo",
+    response_description="URL of the uploaded logo",
+    dependencies=[Depends(theme_write_required)],
+    route_class_override=LogoUploadRoute
+)
+
+
+@router.post(
+    "/{domain_name}/theme/logo/upload-url",
+    response_model=LogoDirectUploadResponse,
+    summary="Request a direct logo upload",
+    response_description="Presigned upload request, or the already stored logo",
+    dependencies=[Depends(theme_write_required)]
+)
+async def request_domain_logo_upload(
+    domain_name: str,
+    upload: LogoDirectUploadRequest,
+    db: AsyncSession = Depends(get_db),
+    storage: StorageBackend = Depends(get_storage)
+) -> LogoDirectUploadResponse:
+    """Get a presigned URL to upload a logo straight to storage.
+
+    The client computes the file's SHA-256 and size up front; both are
+    signed into the upload together with the content type, so storage
+    rejects any other content. When identical content is already stored,
+    ``exists`` is true and no upload is needed. Either way, finish with
+    ``POST .../theme/logo/complete``.
+
+    Args:
+        domain_name: The name of the domain (realm).
+        upload: File name, exact size and SHA-256 of the logo.
+
+    Returns:
+        The storage key, the final URL and the upload request to send.
+
+    Raises:
+        HTTPException 400: If the file type is not accepted.
+        HTTPException 404: If the domain is not found.
+        HTTPException 413: If the file exceeds ``LOGO_MAX_BYTES``.
+        HTTPException 501: If the storage backend does not support direct uploads.
+
+    Example:
+        POST /api/v1/domains/example-domain/theme/logo/upload-url
+        {"filename": "logo.png", "size": 48213, "sha256": "9f86d0..."}
+    """
+    ext = logo_extension(upload.filename)
+    if upload.size > settings.LOGO_MAX_BYTES:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"Logo exceeds the maximum size of {settings.LOGO_MAX_BYTES} bytes"
+        )
+    exists = (await db.execute(select(Domain.id).where(Domain.name == domain_name))).first()
+    if not exists:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Domain {domain_name} not found"
+        )
+
+    key = logo_key(upload.sha256, ext)
+    if await storage.exists(key):
+        return LogoDirectUploadResponse(key=key, url=storage.url(key), exists=True)
+    direct = await storage.presign_upload(key, logo_content_type(ext), upload.size, upload.sha256)
+    if direct is None:
+        raise HTTPException(
+            status_code=status.HTTP_501_NOT_IMPLEMENTED,
+            detail="The configured storage backend does not support direct uploads; use POST .../theme/logo"
+        )
+    return LogoDirectUploadResponse(key=key, url=storage.url(key), exists=False, upload=direct)
+
+
+@router.post(
+    "/{domain_name}/theme/logo/complete",
+    response_model=LogoUploadResponse,
+    summary="Use a directly uploaded logo",
+    response_description="URL of the logo",
+    dependencies=[Depends(theme_write_required)]
+)
+async def complete_domain_logo_upload(
+    domain_name: str,
+    completed: LogoDirectUploadComplete,
+    db: AsyncSession = Depends(get_db),
+    keycloak: KeycloakService = Depends(get_keycloak_service),
+    storage: StorageBackend = Depends(get_storage),
+    logo_pipeline: Optional[LogoVariantPipeline] = Depends(get_logo_pipeline)
+) -> LogoUploadResponse:
+    """Make a logo uploaded through ``upload-url`` the domain's logo.
+
+    Args:
+        domain_name: The name of the domain (realm).
+        completed: The key returned by ``upload-url``.
+
+    Returns:
+        URL of the logo.
+
+    Raises:
+        HTTPException 400: If the key is not a logo key or nothing was uploaded under it.
+        HTTPException 404: If the domain is not found.
+    """
+    key = completed.key
+    name = key[len(LOGO_KEY_PREFIX):] if key.startswith(LOGO_KEY_PREFIX) else ""
+    stem = name.rsplit(".", 1)[0]
+    if len(stem) != 64 or "/" in name or any(c not in "0123456789abcdef" for c in stem):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Invalid logo key {key}"
+        )
+    logo_extension(name)
+    if not await storage.exists(key):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Nothing has been uploaded to {key}"
+        )
+    try:
+        logo_url = await _use_logo(db, keycloak, storage, logo_pipeline, domain_name, key)
+        return LogoUploadResponse(url=logo_url)
+    except HTTPException as e:
+        await db.rollback()
+        raise e
+    except Exception as e:
+        await db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"An unexpected error occurred while setting the logo: {str(e)}"
+        )
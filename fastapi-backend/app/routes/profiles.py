@@ -0,0 +1,52 @@
+import asyncio
+
+from fastapi import APIRouter, HTTPException, status
+from fastapi.responses import FileResponse
+
+from app.core.profiling import profile_store
+from app.schemas.profile import ProfileListResponse
+
+router = APIRouter(
+    prefix="/api/v1/profiles",
+    tags=["Profiling"],
+    responses={
+        401: {"description": "Unauthorized - Requires authentication"},
+        403: {"description": "Forbidden - Requires admin privileges"},
+        404: {"description": "Not Found - Profile doesn't exist"}
+    }
+)
+
+"""Request Profile API
+
+Lists and downloads the profiles recorded by ``ProfilerMiddleware``
+(send ``X-Profile: 1`` with an admin token to profile a request).
+"""
+
+@router.get(
+    "/",
+    response_model=ProfileListResponse,
+    summary="List stored request profiles"
+)
+async def list_profiles() -> ProfileListResponse:
+    """List the profiles in the on-disk ring, newest first"""
+    return ProfileListResponse(items=await asyncio.to_thread(profile_store.entries))
+
+@router.get(
+    "/{profile_id}",
+    summary="Download a request profile",
+    response_description="speedscope JSON, viewable as a flamegraph at https://www.speedscope.app"
+)
+async def download_profile(profile_id: str) -> FileResponse:
+    """Download a profile as a speedscope file.
+
+    Raises:
+        HTTPException 404: If no profile with this id is stored (it may have
+            been rotated out of the ring)
+    """
+    path = await asyncio.to_thread(profile_store.path, profile_id)
+    if path is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Profile {profile_id} not found"
+        )
+    return FileResponse(path, media_type="application/json", filename=path.name)
@@ -1,5 +1,6 @@
+from datetime import datetime
 from pydantic import BaseModel, Field
-from typing import List, Optional
+from typing import Dict, List, Optional
 
 class ClientBase(BaseModel):
     clientId: str = Field(..., description="The client ID used for authentication flows")
@@ -12,6 +13,21 @@ class ClientBase(BaseModel):
     baseUrl: Optional[str] = Field(None, description="Default base URL for relative application links")
     adminUrl: Optional[str] = Field(None, description="URL for the client's administration console")
 
+class ClientCreate(ClientBase):
+    """Schema for registering a client (one item of a bulk request)"""
+    pass
+
+class ClientBulkItemResult(BaseModel):
+    index: int = Field(..., description="Position of the item in the request")
+    clientId: Optional[str] = None
+    status: str = Field(..., description="created, exists, duplicate, invalid or failed")
+    id: Optional[str] = Field(None, description="Internal Keycloak ID of a created client")
+    detail: Optional[str] = None
+
+class ClientBulkResponse(BaseModel):
+    results: List[ClientBulkItemResult]
+    summary: Dict[str, int]
+
 class Client(ClientBase):
     id: str = Field(..., description="Internal Keycloak ID for the client")
 
@@ -20,3 +36,5 @@ class Client(ClientBase):
 
 class ClientListResponse(BaseModel):
     clients: List[Client]
+    next_cursor: Optional[str] = Field(None, description="Cursor for the next page, null on the last page")
+    synced_at: Optional[datetime] = Field(None, description="When the local mirror was last reconciled (null when read live from Keycloak)")
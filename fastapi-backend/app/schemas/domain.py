@@ -1,5 +1,6 @@
+from enum import Enum
 from pydantic import BaseModel, Field
-from typing import Optional
+from typing import List, Optional
 
 class DomainBase(BaseModel):
     """Base schema for domain operations"""
@@ -8,10 +9,21 @@ class DomainBase(BaseModel):
     display_name: str = Field(..., min_length=3, max_length=255,
                             description="User-friendly display name")
 
+class DomainOrder(str, Enum):
+    """Sort keys supported by keyset pagination of domains"""
+    id = "id"
+    name = "name"
+
 class DomainCreate(DomainBase):
     """Schema for creating a new domain"""
     description: Optional[str] = Field(None, max_length=500)
     default_client_redirect: Optional[str] = Field(None, max_length=500)
+    template: Optional[str] = Field(None, max_length=255,
+                                    description="Name of a domain template to apply")
+
+class DomainBulkCreate(BaseModel):
+    """Schema for provisioning many domains in one request"""
+    domains: List[DomainCreate] = Field(..., min_items=1, max_items=1000)
 
 class DomainResponse(DomainBase):
     """Schema for returning domain information"""
@@ -0,0 +1,36 @@
+from pydantic import BaseModel, Field
+from typing import Any, Dict, List, Optional
+from app.schemas.theme import ThemeConfig
+
+class DomainTemplateBase(BaseModel):
+    """Base schema for domain templates"""
+    description: Optional[str] = Field(None, max_length=500)
+    realm_settings: Dict[str, Any] = Field(
+        default_factory=dict,
+        description="Extra realm representation fields (e.g. registrationAllowed, sslRequired)"
+    )
+    clients: List[Dict[str, Any]] = Field(
+        default_factory=list,
+        description="Keycloak client representations created in every new domain"
+    )
+    identity_providers: List[Dict[str, Any]] = Field(
+        default_factory=list,
+        description="Keycloak identity provider representations created in every new domain"
+    )
+    theme: Optional[ThemeConfig] = Field(None, description="Initial theme configuration")
+
+class DomainTemplateCreate(DomainTemplateBase):
+    """Schema for creating a domain template"""
+    name: str = Field(..., min_length=3, max_length=255, regex=r'^[a-z0-9-]+$',
+                    description="Template name (lowercase, numbers, hyphens only)")
+
+class DomainTemplateUpdate(DomainTemplateBase):
+    """Schema for replacing a domain template"""
+    pass
+
+class DomainTemplateResponse(DomainTemplateCreate):
+    """Schema for returning a domain template"""
+    id: int
+
+    class Config:
+        orm_mode = True
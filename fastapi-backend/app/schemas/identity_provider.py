@@ -1,5 +1,6 @@
+from datetime import datetime
 from pydantic import BaseModel, Field
-from typing import Dict, Optional, Any
+from typing import Dict, List, Optional, Any
 
 class IdentityProviderBase(BaseModel):
     alias: str = Field(..., description="Unique identifier for the identity provider")
@@ -26,6 +27,30 @@ class IdentityProviderUpdate(BaseModel):
     """Schema for updating an identity provider's state"""
     enabled: bool = Field(..., description="New enabled state for the provider")
 
+class IdentityProviderStateChange(BaseModel):
+    """One requested state change in a bulk update"""
+    realm: str = Field(..., description="Domain (realm) the provider belongs to")
+    alias: str = Field(..., description="Alias of the identity provider")
+    enabled: bool = Field(..., description="New enabled state for the provider")
+
+class IdentityProviderBulkStateUpdate(BaseModel):
+    """Schema for changing the state of many identity providers across realms"""
+    changes: List[IdentityProviderStateChange] = Field(..., min_items=1, max_items=1000)
+
+class IdentityProviderStateResult(BaseModel):
+    """Outcome of one state change in a bulk update"""
+    index: int = Field(..., description="Position of the change in the request")
+    realm: str
+    alias: str
+    enabled: bool
+    status: str = Field(..., description="updated, unchanged, duplicate, not_found or failed")
+    detail: Optional[str] = None
+
+class IdentityProviderBulkStateResponse(BaseModel):
+    """Aggregated result of a bulk state update"""
+    results: List[IdentityProviderStateResult]
+    summary: Dict[str, int]
+
 class IdentityProviderResponse(IdentityProvider):
     """Schema for identity provider responses"""
     pass
@@ -33,3 +58,5 @@ class IdentityProviderResponse(IdentityProvider):
 class IdentityProviderListResponse(BaseModel):
     """Schema for list of identity providers"""
     providers: list[IdentityProviderResponse]
+    next_cursor: Optional[str] = Field(None, description="Cursor for the next page, null on the last page")
+    synced_at: Optional[datetime] = Field(None, description="When the local mirror was last reconciled (null when read live from Keycloak)")
@@ -0,0 +1,17 @@
+from pydantic import BaseModel, Field
+from typing import List
+
+class ProfileSummary(BaseModel):
+    """Metadata of a stored request profile"""
+    id: str
+    method: str
+    path: str
+    route: str = Field(..., description="Route template that handled the request")
+    status: int
+    trigger: str = Field(..., description="header (requested by an admin) or sample")
+    duration_ms: float
+    created_at: float = Field(..., description="Unix timestamp of the request start")
+
+class ProfileListResponse(BaseModel):
+    """Stored request profiles, newest first"""
+    items: List[ProfileSummary]
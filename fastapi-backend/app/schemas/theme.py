@@ -1,5 +1,10 @@
-from pydantic import BaseModel, Field, HttpUrl
-from typing import Optional
+import re
+from pydantic import BaseModel, Field, HttpUrl, ValidationError, parse_obj_as, validator
+from typing import Dict, Optional
+from app.core.settings import settings
+
+# URL path of a logo uploaded to local storage
+UPLOADED_LOGO_PATH = re.compile(rf"{re.escape(settings.STORAGE_LOCAL_URL_PREFIX.rstrip('/'))}/logos/[0-9A-Za-z_-]+\.[0-9A-Za-z]+")
 
 class ThemeConfig(BaseModel):
     """Theme configuration for a domain/realm"""
@@ -13,18 +18,34 @@ class ThemeConfig(BaseModel):
         description="Secondary color in hex format (e.g., #6b7280)",
         pattern="^#[0-9a-fA-F]{6}$"
     )
-    logoUrl: Optional[HttpUrl] = Field(
+    logoUrl: Optional[str] = Field(
         None,
-        description="URL to the logo image"
+        description="http(s) URL of the logo image, or the /static/logos/... path of an uploaded logo"
     )
     loginTheme: Optional[str] = Field(
         None,
         description="Name of the Keycloak login theme to use"
     )
 
+    @validator("logoUrl")
+    def logo_url_is_http_or_uploaded(cls, value):
+        if value is None or UPLOADED_LOGO_PATH.fullmatch(value):
+            return value
+        try:
+            return str(parse_obj_as(HttpUrl, value))
+        except ValidationError:
+            raise ValueError("logoUrl must be an http(s) URL or an uploaded logo path (/static/logos/...)")
+
 class ThemeConfigResponse(ThemeConfig):
     """Response model for theme configuration"""
-    pass
+    logoVariants: Optional[Dict[str, Dict[str, str]]] = Field(
+        None,
+        description="Resized copies of an uploaded logo: format -> width -> URL (set once generated)"
+    )
+    logoVariantUrl: Optional[str] = Field(
+        None,
+        description="Best variant for the requested width and Accept header, if any"
+    )
 
 class ThemeConfigUpdate(ThemeConfig):
     """Update model for theme configuration"""
@@ -32,4 +53,28 @@ class ThemeConfigUpdate(ThemeConfig):
 
 class LogoUploadResponse(BaseModel):
     """Response model for logo upload"""
-    url: HttpUrl = Field(..., description="URL of the uploaded logo")
+    url: str = Field(..., description="Immutable, content-addressed URL of the uploaded logo")
+
+class LogoDirectUploadRequest(BaseModel):
+    """Describes a logo the client wants to upload straight to storage"""
+    filename: str = Field(..., description="Original file name; its extension selects the image type")
+    size: int = Field(..., gt=0, description="Exact size of the file in bytes")
+    sha256: str = Field(..., regex="^[0-9a-f]{64}$", description="Lower-case hex SHA-256 of the file")
+
+class LogoDirectUpload(BaseModel):
+    """Request the client must send to upload the file"""
+    method: str
+    url: str
+    headers: Dict[str, str] = Field(..., description="Headers that must be sent unchanged")
+    expires_in: int = Field(..., description="Seconds until the upload URL expires")
+
+class LogoDirectUploadResponse(BaseModel):
+    """Where to upload a logo, or that it is already stored"""
+    key: str = Field(..., description="Storage key to pass to the complete endpoint")
+    url: str = Field(..., description="URL the logo will be served from")
+    exists: bool = Field(..., description="Identical content is already stored; no upload needed")
+    upload: Optional[LogoDirectUpload] = None
+
+class LogoDirectUploadComplete(BaseModel):
+    """Confirms a direct upload and makes it the domain logo"""
+    key: str = Field(..., description="Key returned when the upload was requested")
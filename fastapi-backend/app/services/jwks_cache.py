@@ -0,0 +1,93 @@
+import asyncio
+import time
+from typing import Dict, Optional
+
+import httpx
+from loguru import logger
+from app.core.settings import settings
+from app.core.tracing import inject_trace_headers
+
+SUPPORTED_KEY_TYPES = ("RSA", "EC")
+
+
+class JWKSCache:
+    """Signing keys of the trusted Keycloak realms, kept in memory.
+
+    Keys of every realm in ``KEYCLOAK_JWT_REALMS`` are fetched at startup
+    and refreshed every ``KEYCLOAK_JWKS_REFRESH_SECONDS`` in the
+    background. Token validation only reads the in-memory keyset: an
+    unknown ``kid`` (for example right after a key rotation) schedules a
+    background refresh of that realm, rate limited to one per
+    ``KEYCLOAK_JWKS_MIN_REFRESH_INTERVAL_SECONDS``, instead of fetching on
+    the request path.
+    """
+
+    def __init__(self):
+        self.keys: Dict[str, Dict[str, dict]] = {}
+        self._fetched_at: Dict[str, float] = {}
+        self._refreshing: Dict[str, asyncio.Task] = {}
+        self._client: Optional[httpx.AsyncClient] = None
+        self._task: Optional[asyncio.Task] = None
+
+    @staticmethod
+    def trusts(realm: str) -> bool:
+        return realm in settings.KEYCLOAK_JWT_REALMS
+
+    def get_key(self, realm: str, kid: Optional[str]) -> Optional[dict]:
+        return self.keys.get(realm, {}).get(kid)
+
+    async def start(self):
+        if self._client is None:
+            self._client = httpx.AsyncClient(
+                base_url=str(settings.KEYCLOAK_URL).rstrip("/"),
+                timeout=settings.KEYCLOAK_HTTP_TIMEOUT_SECONDS,
+                event_hooks={"request": [inject_trace_headers]}
+            )
+        await asyncio.gather(*(self._refresh_quietly(realm) for realm in settings.KEYCLOAK_JWT_REALMS))
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def close(self):
+        tasks = [task for task in (self._task, *self._refreshing.values()) if task is not None]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._task = None
+        self._refreshing.clear()
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(settings.KEYCLOAK_JWKS_REFRESH_SECONDS)
+            await asyncio.gather(*(self._refresh_quietly(realm) for realm in settings.KEYCLOAK_JWT_REALMS))
+
+    def request_refresh(self, realm: str):
+        """Refresh a trusted realm's keys in the background, at most once per interval"""
+        if not self.trusts(realm) or self._client is None or realm in self._refreshing:
+            return
+        if time.monotonic() - self._fetched_at.get(realm, float("-inf")) < settings.KEYCLOAK_JWKS_MIN_REFRESH_INTERVAL_SECONDS:
+            return
+        task = asyncio.create_task(self._refresh_quietly(realm))
+        self._refreshing[realm] = task
+        task.add_done_callback(lambda _: self._refreshing.pop(realm, None))
+
+    async def _refresh_quietly(self, realm: str):
+        try:
+            await self.refresh(realm)
+        except Exception as e:
+            logger.warning(f"Failed to refresh JWKS for realm {realm}: {e}")
+
+    async def refresh(self, realm: str):
+        """Replace a realm's keyset with the signing keys Keycloak currently publishes"""
+        self._fetched_at[realm] = time.monotonic()
+        response = await self._client.get(f"/realms/{realm}/protocol/openid-connect/certs")
+        response.raise_for_status()
+        keys = {
+            jwk["kid"]: jwk
+            for jwk in response.json().get("keys", [])
+            if jwk.get("kid") and jwk.get("kty") in SUPPORTED_KEY_TYPES and jwk.get("use", "sig") == "sig"
+        }
+        self.keys[realm] = keys
+        logger.debug(f"Loaded {len(keys)} signing keys for realm {realm}")
@@ -0,0 +1,300 @@
+import asyncio
+import time
+from typing import Any, Optional
+
+import httpx
+from loguru import logger
+from app.core.settings import settings
+from app.core.tracing import inject_trace_headers
+
+
+class KeycloakAdminError(Exception):
+    """Raised when the Keycloak Admin REST API returns an error response"""
+
+    def __init__(self, status_code: int, message: str):
+        super().__init__(f"{status_code}: {message}")
+        self.status_code = status_code
+        self.message = message
+
+
+class KeycloakAdminClient:
+    """Non-blocking client for the Keycloak Admin REST API.
+
+    Mirrors the subset of the ``python_keycloak`` ``KeycloakAdmin`` interface
+    used by ``KeycloakService``, but every call is a coroutine running on a
+    shared ``httpx.AsyncClient`` with keep-alive connection pooling, so a slow
+    realm never blocks the event loop. The target realm is always passed
+    explicitly (or bound through ``realm()``); the client holds no per-realm
+    state and is safe to share between concurrent requests.
+
+    The admin access token is obtained lazily with a password grant against
+    ``user_realm_name`` and can be renewed with ``refresh_token``.
+    """
+
+    def __init__(
+        self,
+        server_url: str,
+        username: str,
+        password: str,
+        user_realm_name: str = "master",
+        client_id: str = "admin-cli",
+        verify: bool = True,
+        timeout: Optional[float] = None,
+    ):
+        self.server_url = server_url.rstrip("/")
+        self.username = username
+        self.password = password
+        self.user_realm_name = user_realm_name
+        self.client_id = client_id
+        self.token: dict = {}
+        self._token_expires_at = 0.0
+        self._token_lock = asyncio.Lock()
+        self._http = httpx.AsyncClient(
+            base_url=self.server_url,
+            verify=verify,
+            timeout=timeout or settings.KEYCLOAK_HTTP_TIMEOUT_SECONDS,
+            limits=httpx.Limits(
+                max_connections=settings.KEYCLOAK_HTTP_MAX_CONNECTIONS,
+                max_keepalive_connections=settings.KEYCLOAK_HTTP_MAX_KEEPALIVE_CONNECTIONS,
+            ),
+            event_hooks={"request": [inject_trace_headers]},
+        )
+
+    async def aclose(self):
+        """Close all pooled connections"""
+        await self._http.aclose()
+
+    # Token management
+
+    @property
+    def _token_url(self) -> str:
+        return f"/realms/{self.user_realm_name}/protocol/openid-connect/token"
+
+    def _store_token(self, token: dict):
+        self.token = token
+        self._token_expires_at = time.monotonic() + int(token.get("expires_in", 60))
+
+    async def get_token(self) -> dict:
+        """Obtain a new admin token with a password grant"""
+        response = await self._http.post(self._token_url, data={
+            "grant_type": "password",
+            "client_id": self.client_id,
+            "username": self.username,
+            "password": self.password,
+        })
+        self._raise_for_status(response)
+        self._store_token(response.json())
+        return self.token
+
+    async def refresh_token(self) -> dict:
+        """Renew the admin token using the stored refresh token"""
+        refresh_token = self.token.get("refresh_token")
+        if not refresh_token:
+            return await self.get_token()
+        response = await self._http.post(self._token_url, data={
+            "grant_type": "refresh_token",
+            "client_id": self.client_id,
+            "refresh_token": refresh_token,
+        })
+        self._raise_for_status(response)
+        self._store_token(response.json())
+        return self.token
+
+    async def _access_token(self) -> str:
+        if not self.token or time.monotonic() >= self._token_expires_at:
+            async with self._token_lock:
+                if not self.token or time.monotonic() >= self._token_expires_at:
+                    await self.get_token()
+        return self.token["access_token"]
+
+    # Request plumbing
+
+    @staticmethod
+    def _raise_for_status(response: httpx.Response):
+        if response.is_error:
+            raise KeycloakAdminError(response.status_code, response.text)
+
+    async def _request(
+        self,
+        method: str,
+        path: str,
+        timeout: Optional[float] = None,
+        **kwargs: Any,
+    ) -> httpx.Response:
+        """Send an authenticated admin request, re-authenticating once on 401"""
+        if timeout is not None:
+            kwargs["timeout"] = timeout
+        for attempt in range(2):
+            headers = {"Authorization": f"Bearer {await self._access_token()}"}
+            response = await self._http.request(method, f"/admin/realms{path}", headers=headers, **kwargs)
+            if response.status_code == 401 and attempt == 0:
+                logger.debug("Keycloak admin token rejected, logging in again")
+                self.token = {}
+                continue
+            self._raise_for_status(response)
+            return response
+        return response
+
+    def realm(self, realm_name: str) -> "RealmAdmin":
+        """Return a lightweight view bound to one realm over the shared pool"""
+        return RealmAdmin(self, realm_name)
+
+    # Realms
+
+    async def create_realm(self, payload: dict, timeout: Optional[float] = None):
+        """Create a realm from a realm representation"""
+        await self._request("POST", "", json=payload, timeout=timeout)
+
+    async def get_realm(self, realm_name: str, timeout: Optional[float] = None) -> dict:
+        """Get the representation of a realm"""
+        response = await self._request("GET", f"/{realm_name}", timeout=timeout)
+        return response.json()
+
+    async def update_realm(self, realm_name: str, payload: dict, timeout: Optional[float] = None):
+        """Update top-level realm settings and attributes"""
+        await self._request("PUT", f"/{realm_name}", json=payload, timeout=timeout)
+
+    async def delete_realm(self, realm_name: str, timeout: Optional[float] = None):
+        """Delete a realm and everything in it"""
+        await self._request("DELETE", f"/{realm_name}", timeout=timeout)
+
+    async def partial_import(self, realm_name: str, payload: dict, timeout: Optional[float] = None) -> dict:
+        """Import clients, identity providers, roles, ... into a realm in one call"""
+        response = await self._request("POST", f"/{realm_name}/partialImport", json=payload, timeout=timeout)
+        return response.json()
+
+    # Clients
+
+    @staticmethod
+    def _page_params(first: Optional[int], max_results: Optional[int]) -> dict:
+        params = {}
+        if first is not None:
+            params["first"] = first
+        if max_results is not None:
+            params["max"] = max_results
+        return params
+
+    async def get_clients(
+        self,
+        realm_name: str,
+        first: Optional[int] = None,
+        max_results: Optional[int] = None,
+        search: Optional[str] = None,
+        timeout: Optional[float] = None,
+    ) -> list:
+        """List clients of a realm, optionally paged and filtered by clientId substring.
+
+        Unlike the identity provider listing, Keycloak's client endpoint has
+        no brief representation: full representations come over the wire and
+        callers project them (see ``CLIENT_SUMMARY_FIELDS``). Paging keeps
+        each response bounded.
+        """
+        params = self._page_params(first, max_results)
+        if search:
+            params.update({"clientId": search, "search": "true"})
+        response = await self._request("GET", f"/{realm_name}/clients", params=params, timeout=timeout)
+        return response.json()
+
+    async def create_client(self, realm_name: str, payload: dict, timeout: Optional[float] = None) -> str:
+        """Create a client and return its internal Keycloak ID"""
+        response = await self._request("POST", f"/{realm_name}/clients", json=payload, timeout=timeout)
+        return response.headers.get("Location", "").rstrip("/").rsplit("/", 1)[-1]
+
+    # Identity providers
+
+    async def get_idps(
+        self,
+        realm_name: str,
+        first: Optional[int] = None,
+        max_results: Optional[int] = None,
+        search: Optional[str] = None,
+        brief_representation: bool = False,
+        timeout: Optional[float] = None,
+    ) -> list:
+        """List identity providers of a realm, optionally paged, filtered and without config"""
+        params = self._page_params(first, max_results)
+        if search:
+            params["search"] = search
+        if brief_representation:
+            params["briefRepresentation"] = "true"
+        response = await self._request(
+            "GET", f"/{realm_name}/identity-provider/instances", params=params, timeout=timeout
+        )
+        return response.json()
+
+    async def get_idp(self, realm_name: str, alias: str, timeout: Optional[float] = None) -> dict:
+        """Get a single identity provider by alias"""
+        response = await self._request(
+            "GET", f"/{realm_name}/identity-provider/instances/{alias}", timeout=timeout
+        )
+        return response.json()
+
+    async def update_idp(self, realm_name: str, alias: str, payload: dict, timeout: Optional[float] = None):
+        """Replace an identity provider representation"""
+        await self._request(
+            "PUT", f"/{realm_name}/identity-provider/instances/{alias}", json=payload, timeout=timeout
+        )
+
+    # Admin events
+
+    async def get_admin_events(
+        self,
+        realm_name: str,
+        date_from: Optional[str] = None,
+        resource_types: Optional[list] = None,
+        first: int = 0,
+        max_results: int = 100,
+        timeout: Optional[float] = None,
+    ) -> list:
+        """List admin events of a realm, newest first"""
+        params: list = [("first", first), ("max", max_results)]
+        if date_from:
+            params.append(("dateFrom", date_from))
+        for resource_type in resource_types or []:
+            params.append(("resourceTypes", resource_type))
+        response = await self._request(
+            "GET", f"/{realm_name}/admin-events", params=params, timeout=timeout
+        )
+        return response.json()
+
+
+class RealmAdmin:
+    """Admin API view bound to a single realm.
+
+    Holds no connection state of its own: every call is delegated to the
+    shared ``KeycloakAdminClient`` with the realm passed explicitly, so views
+    for different realms can be used concurrently.
+    """
+
+    __slots__ = ("client", "realm_name")
+
+    def __init__(self, client: KeycloakAdminClient, realm_name: str):
+        self.client = client
+        self.realm_name = realm_name
+
+    async def get_realm(self, timeout: Optional[float] = None) -> dict:
+        return await self.client.get_realm(self.realm_name, timeout=timeout)
+
+    async def update_realm(self, payload: dict, timeout: Optional[float] = None):
+        await self.client.update_realm(self.realm_name, payload, timeout=timeout)
+
+    async def partial_import(self, payload: dict, timeout: Optional[float] = None) -> dict:
+        return await self.client.partial_import(self.realm_name, payload, timeout=timeout)
+
+    async def get_clients(self, **kwargs) -> list:
+        return await self.client.get_clients(self.realm_name, **kwargs)
+
+    async def create_client(self, payload: dict, timeout: Optional[float] = None) -> str:
+        return await self.client.create_client(self.realm_name, payload, timeout=timeout)
+
+    async def get_idps(self, **kwargs) -> list:
+        return await self.client.get_idps(self.realm_name, **kwargs)
+
+    async def get_idp(self, alias: str, timeout: Optional[float] = None) -> dict:
+        return await self.client.get_idp(self.realm_name, alias, timeout=timeout)
+
+    async def update_idp(self, alias: str, payload: dict, timeout: Optional[float] = None):
+        await self.client.update_idp(self.realm_name, alias, payload, timeout=timeout)
+
+    async def get_admin_events(self, **kwargs) -> list:
+        return await self.client.get_admin_events(self.realm_name, **kwargs)
@@ -0,0 +1,172 @@
+import asyncio
+import json
+import time
+from datetime import datetime, timezone
+from typing import Callable, Optional
+
+from loguru import logger
+from app.core.settings import settings
+from app.services.keycloak_admin import KeycloakAdminError
+from app.services.keycloak_service import KeycloakService
+
+TRACKED_RESOURCE_TYPES = ["REALM", "CLIENT", "IDENTITY_PROVIDER"]
+IDP_PATH_PREFIX = "identity-provider/instances/"
+
+
+class AdminEventListener:
+    """Tails Keycloak admin events to keep the KeycloakService cache fresh.
+
+    Every poll, each realm that currently has cached entries is read from
+    its per-realm cursor (the time of the newest event already applied), and
+    only the entries touched by newer events are invalidated or patched.
+    Event times are in milliseconds and several events can share one, so
+    events at the cursor's time are read again and those already applied
+    are recognized by id (or content, for Keycloak versions without one). At
+    most ``KEYCLOAK_ADMIN_EVENTS_CONCURRENCY`` realms are read at a time.
+    This catches changes made directly in the Keycloak console, so the read
+    cache can safely use long TTLs.
+
+    Cursors live in memory alongside the cache they protect: a restarted
+    worker starts with an empty cache and so has no history to replay.
+    Realms need ``adminEventsEnabled`` (set for realms created through
+    ``KeycloakService.create_realm``); ``adminEventsDetailsEnabled`` lets
+    identity provider updates be patched in place instead of dropped.
+
+    ``on_change`` is called with the realm of every client or identity
+    provider event (used to reconcile the Postgres mirror of that realm).
+    """
+
+    def __init__(self, keycloak: KeycloakService, on_change: Optional[Callable[[str], None]] = None):
+        self.keycloak = keycloak
+        self.on_change = on_change
+        self.cursors: dict[str, int] = {}
+        # Keys of the applied events whose time equals the realm's cursor
+        self._applied_at_cursor: dict[str, set] = {}
+        self._last_poll_ms: Optional[int] = None
+        self._task: Optional[asyncio.Task] = None
+        self._semaphore = asyncio.Semaphore(settings.KEYCLOAK_ADMIN_EVENTS_CONCURRENCY)
+
+    async def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def close(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self):
+        while True:
+            try:
+                await self.poll()
+            except Exception as e:
+                logger.error(f"Failed to process Keycloak admin events: {e}")
+            await asyncio.sleep(settings.KEYCLOAK_ADMIN_EVENTS_POLL_SECONDS)
+
+    async def poll(self):
+        """Apply new admin events for every realm present in the cache"""
+        now_ms = int(time.time() * 1000)
+        realms = self.keycloak.cache.realms()
+        for realm in list(self.cursors):
+            if realm not in realms:
+                del self.cursors[realm]
+                self._applied_at_cursor.pop(realm, None)
+        for realm in realms:
+            if realm not in self.cursors:
+                # Entries for a newly seen realm were loaded after the previous poll
+                since = self._last_poll_ms if self._last_poll_ms is not None else now_ms
+                self.cursors[realm] = since - settings.KEYCLOAK_ADMIN_EVENTS_CLOCK_SKEW_MS
+        self._last_poll_ms = now_ms
+        await asyncio.gather(*(self._poll_realm(realm) for realm in realms))
+
+    async def _poll_realm(self, realm: str):
+        cursor = self.cursors.get(realm, 0)
+        try:
+            async with self._semaphore:
+                events = await self._events_since(realm, cursor)
+        except KeycloakAdminError as e:
+            if e.status_code in (403, 404):
+                # Realm deleted or events inaccessible: nothing cached can be trusted
+                self.keycloak.cache.invalidate_prefix(realm)
+                self.cursors.pop(realm, None)
+                self._applied_at_cursor.pop(realm, None)
+                return
+            raise
+        applied = self._applied_at_cursor.get(realm, set())
+        events = [event for event in events if self._event_key(event) not in applied]
+        if not events:
+            return
+        # Apply oldest first so the newest representation wins
+        for event in reversed(events):
+            self.apply(realm, event)
+        newest = max(cursor, max(event.get("time", cursor) for event in events))
+        at_newest = {self._event_key(event) for event in events if event.get("time") == newest}
+        self._applied_at_cursor[realm] = (applied | at_newest) if newest == cursor else at_newest
+        self.cursors[realm] = newest
+
+    @staticmethod
+    def _event_key(event: dict):
+        # Keycloak 23+ sends an event id; older versions are told apart by content
+        return event.get("id") or (
+            event.get("time"), event.get("operationType"), event.get("resourceType"),
+            event.get("resourcePath"), event.get("representation"),
+        )
+
+    async def _events_since(self, realm: str, cursor: int) -> list:
+        """Fetch events at or after ``cursor`` (newest first), page by page"""
+        date_from = datetime.fromtimestamp(cursor / 1000, tz=timezone.utc).strftime("%Y-%m-%d")
+        page_size = 100
+        events: list = []
+        first = 0
+        while True:
+            page = await self.keycloak.admin.get_admin_events(
+                realm,
+                date_from=date_from,
+                resource_types=TRACKED_RESOURCE_TYPES,
+                first=first,
+                max_results=page_size,
+            )
+            fresh = [event for event in page if event.get("time", 0) >= cursor]
+            events.extend(fresh)
+            if len(fresh) < len(page) or len(page) < page_size:
+                return events
+            first += page_size
+
+    def apply(self, realm: str, event: dict):
+        """Invalidate or patch the cache entries affected by one admin event"""
+        cache = self.keycloak.cache
+        resource_type = event.get("resourceType")
+        resource_path = event.get("resourcePath") or ""
+        operation = event.get("operationType")
+
+        if resource_type == "REALM":
+            cache.delete((realm, "realm"))
+        elif resource_type == "CLIENT":
+            cache.invalidate_prefix(realm, "clients")
+        elif resource_type == "IDENTITY_PROVIDER" and resource_path.startswith(IDP_PATH_PREFIX):
+            alias = resource_path[len(IDP_PATH_PREFIX):].split("/", 1)[0]
+            cache.invalidate_prefix(realm, "idps")
+            representation = self._representation(event)
+            if operation in ("CREATE", "UPDATE") and representation and representation.get("alias") == alias:
+                cache.set((realm, "idp", alias), representation)
+            else:
+                cache.delete((realm, "idp", alias))
+        else:
+            return
+        if resource_type != "REALM" and self.on_change is not None:
+            self.on_change(realm)
+        logger.debug(f"Applied admin event {operation} {resource_type} {resource_path} for realm {realm}")
+
+    @staticmethod
+    def _representation(event: dict) -> Optional[dict]:
+        raw = event.get("representation")
+        if not raw:
+            return None
+        try:
+            return json.loads(raw)
+        except ValueError:
+            return None
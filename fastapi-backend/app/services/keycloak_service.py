@@ -1,37 +1,170 @@
-from python_keycloak import KeycloakAdmin
+import asyncio
+from typing import Awaitable, Callable, Hashable, Optional, Tuple
+
 from loguru import logger
 from fastapi import HTTPException
+from app.core.cache import MISSING, TTLCache
+from app.core.etag import check_if_match, make_etag
+from app.core.metrics import instrument_calls
+from app.core.tracing import trace_calls
 from app.core.settings import settings
+from app.services.keycloak_admin import KeycloakAdminClient
+
+# Fields of the Client API schema; everything else (protocol mappers,
+# attributes, ...) is dropped before caching. Keycloak cannot project
+# clients server-side, so this happens after each page is fetched.
+CLIENT_SUMMARY_FIELDS = (
+    "id", "clientId", "name", "description", "enabled", "publicClient",
+    "redirectUris", "rootUrl", "baseUrl", "adminUrl",
+)
+# Theme settings stored as realm attributes (loginTheme is a top-level realm field)
+THEME_ATTRIBUTES = ("primaryColor", "secondaryColor", "logoUrl")
 
+@instrument_calls
+@trace_calls
 class KeycloakService:
+    """Long-lived Keycloak admin service.
+
+    One instance is built per worker at application startup and shared by
+    every request (see ``get_keycloak_service``). All Keycloak calls go
+    through a non-blocking admin client on a pooled async HTTP connection,
+    and a background task refreshes the admin access token before it
+    expires so requests never pay for a password grant.
+
+    Realm, client, identity provider and theme reads are served from a
+    bounded read-through TTL cache keyed by realm; writes made through this
+    service invalidate the affected entries.
+
+    Every public call is counted and timed for ``/metrics`` and, with
+    ``TRACING_ENABLED``, recorded as a span.
+    """
+
     def __init__(self):
         """Initialize Keycloak admin client with settings"""
+        self._refresh_task: Optional[asyncio.Task] = None
+        self.cache = TTLCache(
+            maxsize=settings.KEYCLOAK_CACHE_MAX_ENTRIES,
+            ttl=settings.KEYCLOAK_CACHE_TTL_SECONDS
+        )
+        # key -> (shared fetch, cache generation it started at)
+        self._inflight: dict[Hashable, Tuple[asyncio.Future, int]] = {}
+        self.admin = KeycloakAdminClient(
+            server_url=str(settings.KEYCLOAK_URL),
+            username=settings.KEYCLOAK_ADMIN_USERNAME,
+            password=settings.KEYCLOAK_ADMIN_PASSWORD,
+            user_realm_name=settings.KEYCLOAK_REALM,
+            verify=True
+        )
+
+    async def start(self):
+        """Log in to the Admin API and start the background token refresher"""
         try:
-            self.admin = KeycloakAdmin(
-                server_url=str(settings.KEYCLOAK_URL),
-                username=settings.KEYCLOAK_ADMIN_USERNAME,
-                password=settings.KEYCLOAK_ADMIN_PASSWORD,
-                realm_name=settings.KEYCLOAK_REALM,
-                verify=True
-            )
+            await self.admin.get_token()
             logger.info("Successfully connected to Keycloak Admin API")
         except Exception as e:
+            # Not fatal: the client logs in lazily on the first admin call
             logger.error(f"Failed to initialize Keycloak admin client: {e}")
-            raise HTTPException(
-                status_code=500,
-                detail="Failed to connect to Keycloak admin interface"
+        if self._refresh_task is None:
+            self._refresh_task = asyncio.create_task(self._refresh_token_loop())
+
+    async def close(self):
+        """Stop the token refresher and release pooled connections"""
+        if self._refresh_task is not None:
+            self._refresh_task.cancel()
+            try:
+                await self._refresh_task
+            except asyncio.CancelledError:
+                pass
+            self._refresh_task = None
+        await self.admin.aclose()
+
+    def _token_lifetime(self) -> int:
+        """Seconds the current admin access token was issued for"""
+        return int(self.admin.token.get("expires_in", settings.KEYCLOAK_TOKEN_REFRESH_FALLBACK_SECONDS))
+
+    async def _refresh_admin_token(self):
+        """Refresh the admin token, falling back to a new password grant"""
+        try:
+            await self.admin.refresh_token()
+        except Exception as e:
+            logger.warning(f"Admin token refresh failed, logging in again: {e}")
+            await self.admin.get_token()
+
+    async def _refresh_token_loop(self):
+        """Refresh the admin token shortly before each expiry"""
+        while True:
+            delay = max(
+                self._token_lifetime() - settings.KEYCLOAK_TOKEN_REFRESH_SKEW_SECONDS,
+                settings.KEYCLOAK_TOKEN_REFRESH_MIN_INTERVAL_SECONDS,
             )
+            await asyncio.sleep(delay)
+            try:
+                await self._refresh_admin_token()
+                logger.debug("Refreshed Keycloak admin token")
+            except Exception as e:
+                logger.error(f"Failed to refresh Keycloak admin token: {e}")
 
-    async def create_realm(self, realm_name: str, display_name: str):
-        """Create a new realm with basic configuration"""
+    async def _cached(self, key: Hashable, loader: Callable[[], Awaitable]):
+        """Read-through lookup; concurrent misses for one key share a single fetch.
+
+        A fetch that started before the key was invalidated is neither
+        cached nor joined by later callers. If the caller running the shared
+        fetch is cancelled, the callers waiting on it fetch again instead of
+        being cancelled too.
+        """
+        while True:
+            value = self.cache.get(key)
+            if value is not MISSING:
+                return value
+            generation = self.cache.generation(key)
+            pending = self._inflight.get(key)
+            if pending is None or pending[1] != generation:
+                return await self._load(key, loader, generation)
+            future = pending[0]
+            try:
+                return await asyncio.shield(future)
+            except asyncio.CancelledError:
+                if not future.cancelled():
+                    raise
+                # The loading caller was cancelled, not this one: try again
+
+    async def _load(self, key: Hashable, loader: Callable[[], Awaitable], generation: int):
+        entry = (asyncio.get_running_loop().create_future(), generation)
+        future = entry[0]
+        self._inflight[key] = entry
         try:
-            self.admin.create_realm({
-                "realm": realm_name,
-                "displayName": display_name,
+            value = await loader()
+        except Exception as e:
+            future.set_exception(e)
+            # Mark the exception as retrieved when nobody else was waiting
+            future.exception()
+            raise
+        else:
+            if self.cache.generation(key) == generation:
+                self.cache.set(key, value)
+            future.set_result(value)
+            return value
+        finally:
+            if not future.done():
+                future.cancel()
+            if self._inflight.get(key) is entry:
+                del self._inflight[key]
+
+    async def create_realm(self, realm_name: str, display_name: str, realm_settings: Optional[dict] = None):
+        """Create a new realm with basic configuration, optionally extended by template settings"""
+        try:
+            await self.admin.create_realm({
                 "enabled": True,
                 "registrationAllowed": False,
-                "loginWithEmailAllowed": True
+                "loginWithEmailAllowed": True,
+                # Admin events drive incremental cache invalidation
+                "adminEventsEnabled": True,
+                "adminEventsDetailsEnabled": True,
+                **(realm_settings or {}),
+                "realm": realm_name,
+                "displayName": display_name
             })
+            self.cache.invalidate_prefix(realm_name)
             logger.info(f"Created new realm: {realm_name}")
             return {"status": "success", "realm": realm_name}
         except Exception as e:
@@ -41,11 +174,48 @@ class KeycloakService:
                 detail=f"Keycloak error: {str(e)}"
             )
 
+    async def import_resources(self, realm: str, clients: list, identity_providers: list) -> dict:
+        """Create clients and identity providers in a single partial import.
+
+        Resources that already exist are skipped, so applying the same
+        template twice is harmless.
+        """
+        if not clients and not identity_providers:
+            return {"added": 0, "skipped": 0, "results": []}
+        try:
+            result = await self.admin.partial_import(realm, {
+                "ifResourceExists": "SKIP",
+                "clients": clients,
+                "identityProviders": identity_providers
+            })
+            self.cache.invalidate_prefix(realm, "clients")
+            self.cache.invalidate_prefix(realm, "idps")
+            logger.info(f"Imported {result.get('added', 0)} resources into realm {realm}")
+            return result
+        except Exception as e:
+            logger.error(f"Failed to import resources into realm {realm}: {e}")
+            raise HTTPException(
+                status_code=400,
+                detail=f"Keycloak error while importing resources: {str(e)}"
+            )
+
+    async def delete_realm(self, realm_name: str):
+        """Delete a realm"""
+        try:
+            await self.admin.delete_realm(realm_name)
+            self.cache.invalidate_prefix(realm_name)
+            logger.info(f"Deleted realm: {realm_name}")
+        except Exception as e:
+            logger.error(f"Failed to delete realm {realm_name}: {e}")
+            raise HTTPException(
+                status_code=400,
+                detail=f"Keycloak error: {str(e)}"
+            )
+
     async def create_client(self, realm: str, client_id: str, redirect_uris: list[str]):
         """Create a new client in the specified realm"""
         try:
-            self.admin.realm_name = realm  # Switch to target realm
-            client = self.admin.create_client({
+            client = await self.admin.realm(realm).create_client({
                 "clientId": client_id,
                 "redirectUris": redirect_uris,
                 "publicClient": True,
@@ -54,6 +224,7 @@ class KeycloakService:
                 "implicitFlowEnabled": False,
                 "directAccessGrantsEnabled": True
             })
+            self.cache.invalidate_prefix(realm, "clients")
             logger.info(f"Created client {client_id} in realm {realm}")
             return client
         except Exception as e:
@@ -63,11 +234,34 @@ class KeycloakService:
                 detail=f"Keycloak error: {str(e)}"
             )
 
+    async def list_client_ids(self, realm: str) -> set:
+        """All clientIds of a realm, read live page by page.
+
+        Only the ids of each page are kept. Paging stops at a short page, or
+        at a page that adds no new id (a server ignoring ``first``/``max``).
+        """
+        page_size = settings.MIRROR_SYNC_PAGE_SIZE
+        client_ids: set = set()
+        first = 0
+        try:
+            while True:
+                page = await self.admin.get_clients(realm, first=first, max_results=page_size)
+                known = len(client_ids)
+                client_ids.update(client.get("clientId") for client in page)
+                if len(page) < page_size or len(client_ids) == known:
+                    return client_ids
+                first += len(page)
+        except Exception as e:
+            logger.error(f"Failed to list client IDs for realm {realm}: {e}")
+            raise HTTPException(
+                status_code=400,
+                detail=f"Keycloak error while listing clients: {str(e)}"
+            )
+
     async def get_realm_info(self, realm: str):
         """Get information about a specific realm"""
         try:
-            self.admin.realm_name = realm
-            return self.admin.get_realm()
+            return await self._cached((realm, "realm"), lambda: self.admin.get_realm(realm))
         except Exception as e:
             logger.error(f"Failed to get realm info for {realm}: {e}")
             raise HTTPException(
@@ -75,11 +269,28 @@ class KeycloakService:
                 detail=f"Realm not found or inaccessible: {realm}"
             )
 
-    async def list_clients(self, realm: str):
-        """List all clients (applications) in the specified realm"""
+    async def _fetch_client_summaries(self, realm: str, **page) -> list:
+        clients = await self.admin.get_clients(realm, **page)
+        return [{field: client.get(field) for field in CLIENT_SUMMARY_FIELDS} for client in clients]
+
+    async def list_clients(
+        self,
+        realm: str,
+        first: Optional[int] = None,
+        max_results: Optional[int] = None,
+        search: Optional[str] = None
+    ):
+        """List clients (applications) in the specified realm.
+
+        Paging and clientId search are pushed down to Keycloak, and only the
+        fields of the Client schema are kept.
+        """
         try:
-            self.admin.realm_name = realm
-            clients = self.admin.get_clients()
+            page = {"first": first, "max_results": max_results, "search": search}
+            clients = await self._cached(
+                (realm, "clients", first, max_results, search),
+                lambda: self._fetch_client_summaries(realm, **page)
+            )
             logger.info(f"Retrieved {len(clients)} clients for realm {realm}")
             # Optionally filter or map fields if needed before returning
             return clients
@@ -90,11 +301,25 @@ class KeycloakService:
                 detail=f"Keycloak error while listing clients: {str(e)}"
             )
 
-    async def list_identity_providers(self, realm: str):
-        """List all identity providers in the specified realm"""
+    async def list_identity_providers(
+        self,
+        realm: str,
+        first: Optional[int] = None,
+        max_results: Optional[int] = None,
+        search: Optional[str] = None,
+        brief: bool = False
+    ):
+        """List identity providers in the specified realm.
+
+        Paging and search are pushed down to Keycloak; ``brief`` omits the
+        provider-specific config.
+        """
         try:
-            self.admin.realm_name = realm
-            idps = self.admin.get_idps()
+            page = {"first": first, "max_results": max_results, "search": search, "brief_representation": brief}
+            idps = await self._cached(
+                (realm, "idps", first, max_results, search, brief),
+                lambda: self.admin.get_idps(realm, **page)
+            )
             logger.info(f"Retrieved {len(idps)} identity providers for realm {realm}")
             return idps
         except Exception as e:
@@ -107,8 +332,7 @@ class KeycloakService:
     async def get_identity_provider(self, realm: str, alias: str):
         """Get details of a specific identity provider"""
         try:
-            self.admin.realm_name = realm
-            idp = self.admin.get_idp(alias)
+            idp = await self._cached((realm, "idp", alias), lambda: self.admin.get_idp(realm, alias))
             logger.info(f"Retrieved identity provider {alias} for realm {realm}")
             return idp
         except Exception as e:
@@ -118,15 +342,29 @@ class KeycloakService:
                 detail=f"Identity provider not found or inaccessible: {alias}"
             )
 
-    async def update_identity_provider_state(self, realm: str, alias: str, enabled: bool):
-        """Enable or disable an identity provider"""
+    async def update_identity_provider_state(
+        self, realm: str, alias: str, enabled: bool, if_match: Optional[str] = None
+    ):
+        """Enable or disable an identity provider.
+
+        ``if_match`` is an ``If-Match`` header value checked against the
+        ETag of the provider's current representation.
+        """
         try:
-            self.admin.realm_name = realm
-            idp = self.admin.get_idp(alias)
+            realm_admin = self.admin.realm(realm)
+            idp = await realm_admin.get_idp(alias)
+            if if_match:
+                check_if_match(if_match, make_etag(idp))
+            if idp.get('enabled') == enabled:
+                return {"status": "unchanged", "enabled": enabled}
             idp['enabled'] = enabled
-            self.admin.update_idp(alias, idp)
+            await realm_admin.update_idp(alias, idp)
+            self.cache.invalidate_prefix(realm, "idps")
+            self.cache.delete((realm, "idp", alias))
             logger.info(f"Updated identity provider {alias} state to enabled={enabled} in realm {realm}")
             return {"status": "success", "enabled": enabled}
+        except HTTPException:
+            raise
         except Exception as e:
             logger.error(f"Failed to update identity provider {alias} state in realm {realm}: {e}")
             raise HTTPException(
@@ -134,11 +372,63 @@ class KeycloakService:
                 detail=f"Failed to update identity provider state: {str(e)}"
             )
 
+    async def set_identity_provider_states(
+        self,
+        realm: str,
+        states: dict[str, bool],
+        semaphore: asyncio.Semaphore
+    ) -> dict[str, tuple]:
+        """Apply many enabled/disabled states to the identity providers of one realm.
+
+        The realm's providers are read once (uncached), providers already in
+        the requested state are skipped, and the remaining updates run
+        concurrently while holding ``semaphore``.
+
+        Returns:
+            ``alias -> (status, detail)`` with status ``updated``,
+            ``unchanged``, ``not_found`` or ``failed``
+        """
+        try:
+            async with semaphore:
+                current = {idp.get("alias"): idp for idp in await self.admin.get_idps(realm)}
+        except Exception as e:
+            logger.error(f"Failed to list identity providers for realm {realm}: {e}")
+            return {alias: ("failed", f"Keycloak error while listing identity providers: {str(e)}") for alias in states}
+
+        results: dict[str, tuple] = {}
+
+        async def apply(alias: str, idp: dict):
+            async with semaphore:
+                try:
+                    await self.admin.update_idp(realm, alias, {**idp, "enabled": states[alias]})
+                    results[alias] = ("updated", None)
+                except Exception as e:
+                    logger.error(f"Failed to update identity provider {alias} state in realm {realm}: {e}")
+                    results[alias] = ("failed", f"Failed to update identity provider state: {str(e)}")
+
+        pending = []
+        for alias, enabled in states.items():
+            idp = current.get(alias)
+            if idp is None:
+                results[alias] = ("not_found", f"Identity provider {alias} not found in realm {realm}")
+            elif idp.get("enabled") == enabled:
+                results[alias] = ("unchanged", None)
+            else:
+                pending.append(apply(alias, idp))
+        await asyncio.gather(*pending)
+
+        if pending:
+            self.cache.invalidate_prefix(realm, "idps")
+            for alias, (outcome, _) in results.items():
+                if outcome == "updated":
+                    self.cache.delete((realm, "idp", alias))
+            logger.info(f"Updated {len(pending)} identity provider states in realm {realm}")
+        return results
+
     async def get_theme(self, realm: str) -> dict:
         """Get theme configuration for a realm"""
         try:
-            self.admin.realm_name = realm
-            realm_data = self.admin.get_realm()
+            realm_data = await self._cached((realm, "realm"), lambda: self.admin.get_realm(realm))
             
             # Extract theme-related settings from realm data
             theme_config = {
@@ -157,70 +447,28 @@ class KeycloakService:
                 detail=f"Failed to get theme configuration: {str(e)}"
             )
 
-    async def update_theme(self, realm: str, theme_config: dict) -> dict:
-        """Update theme configuration for a realm"""
+    async def update_theme(self, realm: str, theme_config: dict):
+        """Push changed theme settings to the realm in a single request.
+
+        Only the given keys are sent: Keycloak merges realm attributes, so
+        the realm does not need to be read first. ``None`` clears a value.
+        """
         try:
-            self.admin.realm_name = realm
-            realm_data = self.admin.get_realm()
-            
-            # Update realm attributes with theme config
-            attributes = realm_data.get("attributes", {})
-            attributes.update({
-                "primaryColor": theme_config["primaryColor"],
-                "secondaryColor": theme_config["secondaryColor"],
-            })
-            if theme_config.get("logoUrl"):
-                attributes["logoUrl"] = theme_config["logoUrl"]
-            
-            # Update realm data
-            update_data = {
-                "attributes": attributes,
-                "loginTheme": theme_config.get("loginTheme", realm_data.get("loginTheme"))
+            attributes = {
+                key: theme_config[key] or ""
+                for key in THEME_ATTRIBUTES
+                if key in theme_config
             }
-            
-            self.admin.update_realm(realm, update_data)
+            update_data = {"attributes": attributes}
+            if "loginTheme" in theme_config:
+                update_data["loginTheme"] = theme_config["loginTheme"] or ""
+
+            await self.admin.update_realm(realm, update_data)
+            self.cache.delete((realm, "realm"))
             logger.info(f"Updated theme config for realm {realm}")
-            
-            return await self.get_theme(realm)
         except Exception as e:
             logger.error(f"Failed to update theme config for realm {realm}: {e}")
             raise HTTPException(
                 status_code=400,
                 detail=f"Failed to update theme configuration: {str(e)}"
             )
-
-    async def upload_logo(self, realm: str, logo_file: bytes, filename: str) -> str:
-        """Upload a logo for a realm and return its URL"""
-        try:
-            # TODO: Implement actual file storage (e.g., S3, local filesystem)
-            # For now, we'll assume a local storage path
-            import os
-            from pathlib import Path
-            
-            # Create logos directory if it doesn't exist
-            logos_dir = Path("static/logos")
-            logos_dir.mkdir(parents=True, exist_ok=True)
-            
-            # Generate unique filename
-            file_ext = os.path.splitext(filename)[1]
-            unique_filename = f"{realm}_logo{file_ext}"
-            file_path = logos_dir / unique_filename
-            
-            # Save the file
-            with open(file_path, "wb") as f:
-                f.write(logo_file)
-            
-            # Generate URL (in production, this would be a CDN or proper static file URL)
-            logo_url = f"/static/logos/{unique_filename}"
-            
-            # Update realm with logo URL
-            await self.update_theme(realm, {"logoUrl": logo_url})
-            
-            logger.info(f"Uploaded logo for realm {realm}")
-            return logo_url
-        except Exception as e:
-            logger.error(f"Failed to upload logo for realm {realm}: {e}")
-            raise HTTPException(
-                status_code=400,
-                detail=f"Failed to upload logo: {str(e)}"
-            )
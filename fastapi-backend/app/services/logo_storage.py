@@ -0,0 +1,87 @@
+import hashlib
+import mimetypes
+import os
+import tempfile
+
+import aiofiles
+import aiofiles.os
+from fastapi import HTTPException, UploadFile, status
+from loguru import logger
+from app.core.body_limit import body_limit_route
+from app.core.settings import settings
+from app.services.storage import StorageBackend
+
+# No SVG: logos are served from the API's own origin, where a scripted SVG would run
+LOGO_EXTENSIONS = {".png", ".jpg", ".jpeg", ".gif", ".webp"}
+LOGO_KEY_PREFIX = "logos/"
+# Room for the multipart boundaries and part headers around the file
+LOGO_MULTIPART_OVERHEAD_BYTES = 16 * 1024
+
+# Route class of the multipart logo upload: rejects oversized bodies before they are spooled
+LogoUploadRoute = body_limit_route(lambda: settings.LOGO_MAX_BYTES + LOGO_MULTIPART_OVERHEAD_BYTES)
+
+
+def logo_key(sha256_hex: str, ext: str) -> str:
+    """Content-addressed storage key of a logo"""
+    return f"{LOGO_KEY_PREFIX}{sha256_hex}{ext}"
+
+
+def logo_extension(filename: str) -> str:
+    """Lower-cased extension of an accepted logo file name.
+
+    Raises:
+        HTTPException 400: If the file type is not an accepted image type
+    """
+    ext = os.path.splitext(filename or "")[1].lower()
+    if ext not in LOGO_EXTENSIONS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Unsupported logo type {ext or '(none)'}; expected one of {', '.join(sorted(LOGO_EXTENSIONS))}"
+        )
+    return ext
+
+
+def logo_content_type(ext: str) -> str:
+    return mimetypes.guess_type(f"logo{ext}")[0] or "application/octet-stream"
+
+
+async def store_logo(upload: UploadFile, storage: StorageBackend) -> str:
+    """Stream an uploaded logo into storage under its content hash and return its key.
+
+    The upload is copied in ``LOGO_UPLOAD_CHUNK_BYTES`` chunks to a
+    temporary file while being hashed, and aborted as soon as it exceeds
+    ``LOGO_MAX_BYTES``. It is then stored as ``logos/<sha256><ext>``:
+    identical logos share one object, and a URL never changes content, so
+    it can be cached indefinitely.
+
+    Raises:
+        HTTPException 400: If the file type is not an accepted image type
+        HTTPException 413: If the file is larger than ``LOGO_MAX_BYTES``
+    """
+    ext = logo_extension(upload.filename)
+    fd, tmp_path = tempfile.mkstemp(prefix="logo-upload-", suffix=ext)
+    os.close(fd)
+    digest = hashlib.sha256()
+    size = 0
+    try:
+        async with aiofiles.open(tmp_path, "wb") as out:
+            while chunk := await upload.read(settings.LOGO_UPLOAD_CHUNK_BYTES):
+                size += len(chunk)
+                if size > settings.LOGO_MAX_BYTES:
+                    raise HTTPException(
+                        status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                        detail=f"Logo exceeds the maximum size of {settings.LOGO_MAX_BYTES} bytes"
+                    )
+                digest.update(chunk)
+                await out.write(chunk)
+
+        key = logo_key(digest.hexdigest(), ext)
+        if await storage.exists(key):
+            logger.info(f"Logo {key} already stored, reusing it")
+        else:
+            await storage.put_file(key, tmp_path, content_type=logo_content_type(ext))
+            logger.info(f"Stored logo {key} ({size} bytes)")
+        return key
+    finally:
+        if await aiofiles.os.path.exists(tmp_path):
+            await aiofiles.os.remove(tmp_path)
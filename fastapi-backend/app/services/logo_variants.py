@@ -0,0 +1,179 @@
+import asyncio
+import multiprocessing
+import os
+import shutil
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from typing import Optional
+
+from loguru import logger
+from sqlalchemy import cast, update
+from sqlalchemy.dialects.postgresql import JSONB
+from app.core.database import SessionLocal
+from app.core.settings import settings
+from app.models.domain import Domain
+from app.services.keycloak_service import KeycloakService
+from app.services.logo_storage import LOGO_KEY_PREFIX, logo_content_type
+from app.services.storage import StorageBackend
+
+try:
+    from PIL import Image
+except ImportError:  # Pillow is optional: logos are then served as uploaded
+    Image = None
+
+# Formats that can be resized into width variants
+RASTER_EXTENSIONS = {".png", ".jpg", ".jpeg", ".gif", ".webp"}
+# Pillow format names that differ from the file extension
+PIL_FORMATS = {"jpg": "JPEG"}
+# Pillow formats without an alpha channel
+OPAQUE_FORMATS = {"JPEG"}
+
+
+def render_variants(source_path: str, output_dir: str, stem: str, widths: list, formats: list) -> list:
+    """Write resized/re-encoded copies of a logo to ``output_dir``.
+
+    Runs in a worker process. Variants are named
+    ``<stem>-<width>.<format>``; widths larger than the source are skipped
+    rather than upscaled.
+
+    Returns:
+        ``(format, width, filename)`` for every variant written
+    """
+    variants = []
+    with Image.open(source_path) as image:
+        image.load()
+        if image.mode not in ("RGB", "RGBA"):
+            image = image.convert("RGBA")
+        for width in sorted(widths):
+            if width > image.width:
+                continue
+            height = max(1, round(image.height * width / image.width))
+            resized = image.resize((width, height), Image.LANCZOS)
+            for fmt in formats:
+                filename = f"{stem}-{width}.{fmt}"
+                pil_format = PIL_FORMATS.get(fmt, fmt.upper())
+                encoded = resized.convert("RGB") if pil_format in OPAQUE_FORMATS else resized
+                encoded.save(os.path.join(output_dir, filename), format=pil_format, optimize=True)
+                variants.append((fmt, width, filename))
+    return variants
+
+
+def best_variant(manifest: Optional[dict], width: Optional[int], accept: str) -> Optional[str]:
+    """Pick the smallest variant at least ``width`` wide, preferring WebP when accepted.
+
+    Without ``width`` the largest variant is returned. Returns None when
+    there is no usable variant.
+    """
+    if not manifest:
+        return None
+    formats = ["webp", "png"] if "image/webp" in accept else ["png"]
+    for fmt in formats:
+        by_width = {int(w): url for w, url in (manifest.get(fmt) or {}).items()}
+        if not by_width:
+            continue
+        if width is None:
+            return by_width[max(by_width)]
+        wide_enough = [w for w in by_width if w >= width]
+        return by_width[min(wide_enough) if wide_enough else max(by_width)]
+    return None
+
+
+class LogoVariantPipeline:
+    """Generates logo variants in a process pool after each upload.
+
+    Resizing and encoding are CPU bound, so they run in
+    ``LOGO_VARIANT_WORKERS`` worker processes instead of the event loop.
+    Variants are stored next to the source logo in the storage backend
+    (objects that already exist are not uploaded again). When they are
+    ready the manifest (``format -> width -> URL``) is stored as
+    ``logoVariants`` in the domain's theme, provided the domain still uses
+    the same logo, and the realm's ``logoUrl`` attribute is pointed at the
+    ``LOGO_LOGIN_WIDTH`` variant used by the login page.
+    """
+
+    def __init__(self, keycloak: KeycloakService, storage: StorageBackend):
+        self.keycloak = keycloak
+        self.storage = storage
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._tasks: set = set()
+
+    @staticmethod
+    def available() -> bool:
+        return Image is not None
+
+    async def start(self):
+        if self._executor is None:
+            # spawn: forking a process with a running event loop and open sockets is unsafe
+            self._executor = ProcessPoolExecutor(
+                max_workers=settings.LOGO_VARIANT_WORKERS,
+                mp_context=multiprocessing.get_context("spawn")
+            )
+
+    async def close(self):
+        for task in list(self._tasks):
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    def submit(self, domain_name: str, source_key: str):
+        """Schedule variant generation for a freshly stored logo"""
+        if self._executor is None or os.path.splitext(source_key)[1].lower() not in RASTER_EXTENSIONS:
+            return
+        task = asyncio.create_task(self._process(domain_name, source_key))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _process(self, domain_name: str, source_key: str):
+        stem = os.path.splitext(os.path.basename(source_key))[0]
+        workdir = await asyncio.to_thread(tempfile.mkdtemp, prefix="logo-variants-")
+        try:
+            async with self.storage.local_copy(source_key) as source_path:
+                variants = await asyncio.get_running_loop().run_in_executor(
+                    self._executor,
+                    render_variants,
+                    source_path,
+                    workdir,
+                    stem,
+                    list(settings.LOGO_VARIANT_WIDTHS),
+                    list(settings.LOGO_VARIANT_FORMATS),
+                )
+            manifest: dict = {}
+            for fmt, width, variant_name in variants:
+                key = f"{LOGO_KEY_PREFIX}{variant_name}"
+                if not await self.storage.exists(key):
+                    await self.storage.put_file(
+                        key, os.path.join(workdir, variant_name), content_type=logo_content_type(f".{fmt}")
+                    )
+                manifest.setdefault(fmt, {})[str(width)] = self.storage.url(key)
+        except Exception as e:
+            logger.error(f"Failed to render logo variants for domain {domain_name}: {e}")
+            return
+        finally:
+            await asyncio.to_thread(shutil.rmtree, workdir, True)
+        if not manifest:
+            return
+
+        source_url = self.storage.url(source_key)
+        async with SessionLocal() as db:
+            result = await db.execute(
+                update(Domain)
+                .where(
+                    Domain.name == domain_name,
+                    Domain.theme_config["logoUrl"].astext == source_url,
+                )
+                .values(theme_config=Domain.theme_config.op("||")(cast({"logoVariants": manifest}, JSONB)))
+                .execution_options(synchronize_session=False)
+            )
+            await db.commit()
+        if not result.rowcount:
+            logger.info(f"Logo of domain {domain_name} changed before its variants were ready")
+            return
+
+        login_logo = best_variant(manifest, settings.LOGO_LOGIN_WIDTH, "image/webp")
+        try:
+            await self.keycloak.update_theme(domain_name, {"logoUrl": login_logo})
+        except Exception as e:
+            logger.warning(f"Could not point realm {domain_name} at its resized logo: {e}")
+        logger.info(f"Generated {len(variants)} logo variants for domain {domain_name}")
@@ -0,0 +1,258 @@
+import asyncio
+import hashlib
+import json
+import time
+from datetime import datetime, timezone
+from typing import Optional
+
+from loguru import logger
+from sqlalchemy import select, update
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.database import SessionLocal
+from app.core.settings import settings
+from app.models.client import DomainClient
+from app.models.domain import Domain
+from app.models.identity_provider import DomainIdentityProvider
+from app.services.keycloak_service import KeycloakService
+
+
+def mirror_is_fresh(synced_at: Optional[datetime]) -> bool:
+    """Whether listings may be served from a domain's mirror reconciled at ``synced_at``.
+
+    Not when mirroring is disabled (nothing keeps the rows current) or the
+    last reconcile is older than ``MIRROR_MAX_STALENESS_SECONDS``.
+    """
+    if not settings.MIRROR_SYNC_ENABLED or synced_at is None:
+        return False
+    age = (datetime.now(timezone.utc) - synced_at).total_seconds()
+    return age <= settings.MIRROR_MAX_STALENESS_SECONDS
+
+
+def project_client(data: dict) -> dict:
+    """Map a Keycloak client representation onto the DomainClient columns"""
+    return {
+        "keycloak_id": data.get("id"),
+        "client_id": data.get("clientId"),
+        "name": data.get("name"),
+        "description": data.get("description"),
+        "enabled": data.get("enabled", True),
+        "public_client": data.get("publicClient", True),
+        "redirect_uris": data.get("redirectUris", []),
+        "root_url": data.get("rootUrl"),
+        "base_url": data.get("baseUrl"),
+        "admin_url": data.get("adminUrl"),
+    }
+
+
+def project_identity_provider(data: dict) -> dict:
+    """Map a Keycloak identity provider representation onto the DomainIdentityProvider columns"""
+    return {
+        "alias": data.get("alias"),
+        "internal_id": data.get("internalId"),
+        "display_name": data.get("displayName"),
+        "provider_id": data.get("providerId"),
+        "enabled": data.get("enabled", True),
+        "trust_email": data.get("trustEmail", False),
+        "store_token": data.get("storeToken", False),
+        "add_read_token_role_on_create": data.get("addReadTokenRoleOnCreate", False),
+        "first_broker_login_flow_alias": data.get("firstBrokerLoginFlowAlias"),
+        "config": data.get("config", {}),
+    }
+
+
+def content_hash(fields: dict) -> str:
+    return hashlib.sha256(json.dumps(fields, sort_keys=True, default=str).encode()).hexdigest()
+
+
+async def _diff_rows(db: AsyncSession, model, domain_id: int, key: str, snapshot: list, synced_at: datetime) -> int:
+    """Write only the rows of ``model`` that differ from ``snapshot``; returns the change count"""
+    incoming = {}
+    for fields in snapshot:
+        if fields.get(key):
+            incoming[fields[key]] = fields
+    result = await db.execute(select(model).where(model.domain_id == domain_id))
+    existing = {getattr(row, key): row for row in result.scalars()}
+    changes = 0
+    for identifier, row in existing.items():
+        if identifier not in incoming:
+            await db.delete(row)
+            changes += 1
+    for identifier, fields in incoming.items():
+        digest = content_hash(fields)
+        row = existing.get(identifier)
+        if row is None:
+            db.add(model(domain_id=domain_id, content_hash=digest, synced_at=synced_at, **fields))
+            changes += 1
+        elif row.content_hash != digest:
+            for column, value in fields.items():
+                setattr(row, column, value)
+            row.content_hash = digest
+            row.synced_at = synced_at
+            changes += 1
+    return changes
+
+
+async def apply_snapshot(db: AsyncSession, domain_id: int, clients: list, identity_providers: list) -> int:
+    """Reconcile the mirror tables of one domain against a fresh Keycloak snapshot"""
+    synced_at = datetime.now(timezone.utc)
+    changes = await _diff_rows(
+        db, DomainClient, domain_id, "keycloak_id",
+        [project_client(client) for client in clients], synced_at
+    )
+    changes += await _diff_rows(
+        db, DomainIdentityProvider, domain_id, "alias",
+        [project_identity_provider(idp) for idp in identity_providers], synced_at
+    )
+    await db.execute(
+        update(Domain).where(Domain.id == domain_id).values(mirror_synced_at=synced_at)
+    )
+    await db.commit()
+    return changes
+
+
+async def mark_identity_provider_state(db: AsyncSession, domain_name: str, alias: str, enabled: bool):
+    """Reflect a state change made through the API in the mirror immediately"""
+    await mark_identity_provider_states(db, [(domain_name, alias, enabled)])
+
+
+async def mark_identity_provider_states(db: AsyncSession, changes: list):
+    """Reflect many ``(domain_name, alias, enabled)`` state changes in one transaction"""
+    if not changes:
+        return
+    for domain_name, alias, enabled in changes:
+        domain_id = select(Domain.id).where(Domain.name == domain_name).scalar_subquery()
+        await db.execute(
+            update(DomainIdentityProvider)
+            .where(
+                DomainIdentityProvider.domain_id == domain_id,
+                DomainIdentityProvider.alias == alias,
+            )
+            .values(enabled=enabled)
+        )
+    await db.commit()
+
+
+async def record_clients(db: AsyncSession, domain_name: str, clients: list):
+    """Add clients created through the API to the mirror without waiting for a reconcile"""
+    domain = (await db.execute(
+        select(Domain.id, Domain.mirror_synced_at).where(Domain.name == domain_name)
+    )).first()
+    if not domain or not domain.mirror_synced_at or not clients:
+        return
+    synced_at = datetime.now(timezone.utc)
+    rows = []
+    for client in clients:
+        fields = project_client(client)
+        rows.append({**fields, "domain_id": domain.id, "content_hash": content_hash(fields), "synced_at": synced_at})
+    await db.execute(
+        insert(DomainClient).values(rows).on_conflict_do_nothing(
+            constraint="uq_domain_clients_domain_keycloak_id"
+        )
+    )
+    await db.commit()
+
+
+class MirrorReconciler:
+    """Periodically mirrors Keycloak clients and identity providers into Postgres.
+
+    A reconcile fetches a fresh snapshot of a domain (bypassing the read
+    cache), diffs it against the stored rows by content hash and writes
+    only the rows that were added, changed or removed. The list endpoints
+    are then served from the indexed local tables.
+
+    Every ``MIRROR_SYNC_INTERVAL_SECONDS`` only the domains that were never
+    mirrored, or that ``mark_dirty`` flagged (admin events touching clients
+    or identity providers, failed reconciles), are reconciled. Every domain
+    is reconciled at startup and then every
+    ``MIRROR_FULL_SYNC_INTERVAL_SECONDS``, which catches changes in realms
+    the admin event listener does not tail.
+    """
+
+    def __init__(self, keycloak: KeycloakService):
+        self.keycloak = keycloak
+        self._task: Optional[asyncio.Task] = None
+        self._semaphore = asyncio.Semaphore(settings.MIRROR_SYNC_CONCURRENCY)
+        self._dirty: set = set()
+
+    def mark_dirty(self, realm: str):
+        """Reconcile ``realm`` on the next tick"""
+        self._dirty.add(realm)
+
+    async def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def close(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self):
+        last_full_sync: Optional[float] = None
+        while True:
+            full = (
+                last_full_sync is None
+                or time.monotonic() - last_full_sync >= settings.MIRROR_FULL_SYNC_INTERVAL_SECONDS
+            )
+            try:
+                await self.reconcile_all(full=full)
+                if full:
+                    last_full_sync = time.monotonic()
+            except Exception as e:
+                logger.error(f"Keycloak mirror reconcile failed: {e}")
+            await asyncio.sleep(settings.MIRROR_SYNC_INTERVAL_SECONDS)
+
+    @staticmethod
+    async def _active_domains() -> list:
+        async with SessionLocal() as db:
+            result = await db.execute(
+                select(Domain.id, Domain.name, Domain.mirror_synced_at).where(Domain.is_active.is_(True))
+            )
+            return result.all()
+
+    async def reconcile_all(self, full: bool = True):
+        """Reconcile every active domain, or only the flagged and never-mirrored ones"""
+        domains = await self._active_domains()
+        dirty, self._dirty = self._dirty, set()
+        if not full:
+            domains = [domain for domain in domains if domain.name in dirty or domain.mirror_synced_at is None]
+        await asyncio.gather(*(self.reconcile_domain(domain.id, domain.name) for domain in domains))
+
+    @staticmethod
+    async def _fetch_all(fetch_page, realm: str, key: str) -> list:
+        """Read a full listing in bounded pages instead of one huge response.
+
+        Stops at a short page, or at a page that adds no new ``key`` (a
+        server ignoring ``first``/``max`` would otherwise be paged forever).
+        """
+        page_size = settings.MIRROR_SYNC_PAGE_SIZE
+        items: list = []
+        seen: set = set()
+        while True:
+            page = await fetch_page(realm, first=len(items), max_results=page_size)
+            fresh = [item for item in page if item.get(key) not in seen]
+            seen.update(item.get(key) for item in fresh)
+            items.extend(fresh)
+            if len(page) < page_size or not fresh:
+                return items
+
+    async def reconcile_domain(self, domain_id: int, realm: str):
+        async with self._semaphore:
+            try:
+                clients, idps = await asyncio.gather(
+                    self._fetch_all(self.keycloak.admin.get_clients, realm, "id"),
+                    self._fetch_all(self.keycloak.admin.get_idps, realm, "alias"),
+                )
+            except Exception as e:
+                logger.warning(f"Skipping mirror reconcile for realm {realm}: {e}")
+                self.mark_dirty(realm)
+                return
+            async with SessionLocal() as db:
+                changes = await apply_snapshot(db, domain_id, clients, idps)
+            if changes:
+                logger.info(f"Mirrored {changes} client/identity provider changes for realm {realm}")
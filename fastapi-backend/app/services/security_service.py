@@ -1,14 +1,32 @@
+import hashlib
+import time
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
 from jose import JWTError, jwt
-from pydantic import BaseModel
+from pydantic import BaseModel, PrivateAttr
 from typing import Optional
 from datetime import datetime, timedelta
+from app.core.cache import MISSING, TTLCache
+from app.core.permissions import Permissions, resolve_permissions
 from app.core.settings import settings
+from app.services.jwks_cache import JWKSCache
+
+# Asymmetric algorithms accepted for Keycloak-issued tokens
+KEYCLOAK_ALGORITHMS = ("RS256", "ES256")
+# typ claim of Keycloak access tokens (ID and refresh tokens carry "ID" and "Refresh")
+KEYCLOAK_ACCESS_TOKEN_TYPE = "Bearer"
 
 class TokenData(BaseModel):
     username: Optional[str] = None
     scopes: list[str] = []
+    _permissions: Optional[Permissions] = PrivateAttr(default=None)
+
+    @property
+    def permissions(self) -> Permissions:
+        """Scopes resolved for permission checks, computed once per token"""
+        if self._permissions is None:
+            self._permissions = resolve_permissions(self.scopes)
+        return self._permissions
 
 oauth2_scheme = OAuth2PasswordBearer(
     tokenUrl="token",
@@ -26,12 +44,128 @@ class SecurityService:
     - Verifying tokens and checking scopes
     - Managing token expiration
 
+    Besides the locally signed HS256 tokens, RS256/ES256 access tokens
+    issued by the realms in ``KEYCLOAK_JWT_REALMS`` to this API (see
+    ``_intended_for_us``) are accepted. They are verified offline against
+    the realm's keys held in ``self.jwks``, so no introspection call is
+    made per request.
+
+    Verified tokens are cached by SHA-256 digest until they expire (capped
+    at ``TOKEN_CACHE_MAX_TTL_SECONDS``), so a bearer token that is sent
+    again is not decoded and verified again. Revoked tokens are remembered
+    until they expire.
+
     Configuration is pulled from app settings.
     """
     def __init__(self):
         self.SECRET_KEY = settings.SECRET_KEY
         self.ALGORITHM = "HS256"
         self.ACCESS_TOKEN_EXPIRE_MINUTES = 30
+        self.jwks = JWKSCache()
+        self.token_cache = TTLCache(
+            maxsize=settings.TOKEN_CACHE_MAX_ENTRIES,
+            ttl=settings.TOKEN_CACHE_MAX_TTL_SECONDS
+        )
+        # digest -> expiry (time.time()); not an LRU, so revocations are never evicted early
+        self.revoked: dict[str, float] = {}
+
+    @staticmethod
+    def _digest(token: str) -> str:
+        return hashlib.sha256(token.encode()).hexdigest()
+
+    @staticmethod
+    def _remaining_lifetime(payload: dict) -> Optional[float]:
+        """Seconds until the token's ``exp``, or None if it has none"""
+        exp = payload.get("exp")
+        if exp is None:
+            return None
+        return float(exp) - time.time()
+
+    def _decode(self, token: str) -> dict:
+        """Verify a token's signature and claims and return its payload.
+
+        Raises:
+            JWTError: If the token is invalid, expired, from an untrusted
+                issuer or signed with a key that is not (yet) known
+        """
+        header = jwt.get_unverified_header(token)
+        algorithm = header.get("alg")
+        if algorithm == self.ALGORITHM:
+            return jwt.decode(token, self.SECRET_KEY, algorithms=[self.ALGORITHM])
+        if algorithm not in KEYCLOAK_ALGORITHMS:
+            raise JWTError(f"Unsupported token algorithm {algorithm}")
+
+        issuer = jwt.get_unverified_claims(token).get("iss") or ""
+        issuer_prefix = f"{str(settings.KEYCLOAK_ISSUER_URL or settings.KEYCLOAK_URL).rstrip('/')}/realms/"
+        realm = issuer[len(issuer_prefix):] if issuer.startswith(issuer_prefix) else None
+        if not realm or not self.jwks.trusts(realm):
+            raise JWTError(f"Untrusted token issuer {issuer}")
+        key = self.jwks.get_key(realm, header.get("kid"))
+        if key is None:
+            # Possibly a rotated key: fetch it in the background, never on the request path
+            self.jwks.request_refresh(realm)
+            raise JWTError(f"Unknown signing key for realm {realm}")
+        # The audience is checked below, against aud or azp
+        payload = jwt.decode(token, key, algorithms=[algorithm], issuer=issuer, options={"verify_aud": False})
+        if payload.get("typ") != KEYCLOAK_ACCESS_TOKEN_TYPE:
+            # ID and refresh tokens are signed with the same keys
+            raise JWTError(f"Not an access token: {payload.get('typ')}")
+        if not self._intended_for_us(payload):
+            raise JWTError(f"Token not issued for this API (azp {payload.get('azp')})")
+        return payload
+
+    @staticmethod
+    def _intended_for_us(payload: dict) -> bool:
+        """Whether a Keycloak token names ``KEYCLOAK_JWT_AUDIENCE`` in ``aud``
+        or one of ``KEYCLOAK_JWT_AUTHORIZED_PARTIES`` in ``azp``.
+
+        Fails closed: with neither configured no Keycloak token is accepted,
+        since any client of a trusted realm could otherwise use its tokens.
+        """
+        audience = payload.get("aud") or []
+        if isinstance(audience, str):
+            audience = [audience]
+        if settings.KEYCLOAK_JWT_AUDIENCE is not None and settings.KEYCLOAK_JWT_AUDIENCE in audience:
+            return True
+        return payload.get("azp") in settings.KEYCLOAK_JWT_AUTHORIZED_PARTIES
+
+    @staticmethod
+    def _token_data(payload: dict) -> Optional[TokenData]:
+        """Map a verified payload to TokenData; None if it names no user.
+
+        Local tokens carry a ``scopes`` list. For Keycloak tokens the
+        space-separated ``scope`` claim and the realm roles are used, so a
+        realm role named ``admin`` grants the ``admin`` scope.
+        """
+        username = payload.get("preferred_username") or payload.get("sub")
+        if username is None:
+            return None
+        scopes = payload.get("scopes")
+        if scopes is None:
+            scopes = payload.get("scope", "").split() + payload.get("realm_access", {}).get("roles", [])
+        return TokenData(username=username, scopes=scopes)
+
+    def revoke_token(self, token: str) -> bool:
+        """Reject a token from now on, even though its signature is valid.
+
+        Returns False if the token is not valid to begin with.
+        """
+        try:
+            payload = self._decode(token)
+        except JWTError:
+            return False
+        now = time.time()
+        for expired in [digest for digest, expires_at in self.revoked.items() if expires_at <= now]:
+            del self.revoked[expired]
+        digest = self._digest(token)
+        self.token_cache.delete(digest)
+        remaining = self._remaining_lifetime(payload)
+        self.revoked[digest] = now + remaining if remaining is not None else float("inf")
+        return True
+
+    def cache_stats(self) -> dict:
+        """Hit/miss counters of the verified-token cache"""
+        return {**self.token_cache.stats(), "revoked": len(self.revoked)}
 
     async def create_access_token(
         self, 
@@ -74,22 +208,27 @@ class SecurityService:
             detail="Could not validate credentials",
             headers={"WWW-Authenticate": "Bearer"},
         )
-        try:
-            payload = jwt.decode(token, self.SECRET_KEY, algorithms=[self.ALGORITHM])
-            username: str = payload.get("sub")
-            if username is None:
-                raise credentials_exception
-            token_scopes = payload.get("scopes", [])
-            token_data = TokenData(username=username, scopes=token_scopes)
-        except JWTError:
+        digest = self._digest(token)
+        if self.revoked and self.revoked.get(digest, 0) > time.time():
             raise credentials_exception
+        token_data = self.token_cache.get(digest)
+        if token_data is MISSING:
+            try:
+                payload = self._decode(token)
+            except JWTError:
+                raise credentials_exception
+            token_data = self._token_data(payload)
+            if token_data is None:
+                raise credentials_exception
+            remaining = self._remaining_lifetime(payload)
+            ttl = settings.TOKEN_CACHE_MAX_TTL_SECONDS if remaining is None else min(remaining, settings.TOKEN_CACHE_MAX_TTL_SECONDS)
+            if ttl > 0:
+                self.token_cache.set(digest, token_data, ttl=ttl)
 
-        if required_scopes:
-            for scope in required_scopes:
-                if scope not in token_data.scopes:
-                    raise HTTPException(
-                        status_code=status.HTTP_403_FORBIDDEN,
-                        detail="Not enough permissions",
-                        headers={"WWW-Authenticate": "Bearer"},
-                    )
+        if required_scopes and not token_data.permissions.has_scopes(frozenset(required_scopes)):
+            raise HTTPException(
+                status_code=status.HTTP_403_FORBIDDEN,
+                detail="Not enough permissions",
+                headers={"WWW-Authenticate": "Bearer"},
+            )
         return token_data
@@ -0,0 +1,254 @@
+import asyncio
+import base64
+import gzip
+import os
+import shutil
+import tempfile
+from abc import ABC, abstractmethod
+from contextlib import asynccontextmanager
+from pathlib import Path
+from typing import AsyncContextManager, AsyncIterator, Optional
+
+import aiofiles.os
+from loguru import logger
+from app.core.settings import settings
+
+try:
+    import brotli
+except ImportError:  # Optional: only gzip siblings are written without it
+    brotli = None
+
+try:
+    import boto3
+    from botocore.config import Config as BotoConfig
+    from botocore.exceptions import ClientError
+except ImportError:  # Only needed for STORAGE_BACKEND=s3
+    boto3 = None
+
+# Content-addressed objects never change, so clients and CDNs may keep them forever
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+# Content types worth pre-compressing (raster images are already compressed)
+COMPRESSIBLE_TYPES = ("image/svg+xml", "text/", "application/json", "application/javascript")
+
+
+def write_compressed_siblings(path: str):
+    """Write ``.gz`` (and ``.br`` if brotli is installed) copies next to ``path``.
+
+    Served by ``app.core.static_files`` to clients that accept them.
+    """
+    with open(path, "rb") as f:
+        data = f.read()
+    siblings = [(".gz", gzip.compress(data, compresslevel=9, mtime=0))]
+    if brotli is not None:
+        siblings.append((".br", brotli.compress(data)))
+    for suffix, compressed in siblings:
+        if len(compressed) < len(data):
+            tmp = f"{path}{suffix}.{os.getpid()}.tmp"
+            with open(tmp, "wb") as f:
+                f.write(compressed)
+            os.replace(tmp, path + suffix)
+
+
+class StorageBackend(ABC):
+    """Blob storage for theme assets (logos and their variants).
+
+    Keys are relative, ``/``-separated paths such as
+    ``logos/<sha256>.png``. Every replica must see the same objects, so
+    multi-replica deployments use a shared backend (S3) rather than the
+    local filesystem.
+    """
+
+    @abstractmethod
+    def url(self, key: str) -> str:
+        """Public URL of an object"""
+
+    @abstractmethod
+    async def exists(self, key: str) -> bool:
+        """Whether an object is stored under ``key``"""
+
+    @abstractmethod
+    async def size(self, key: str) -> Optional[int]:
+        """Size in bytes of an object, or None if it does not exist"""
+
+    @abstractmethod
+    async def put_file(self, key: str, path: str, content_type: Optional[str] = None):
+        """Store a local file under ``key``; the file is consumed (moved or deleted)"""
+
+    @abstractmethod
+    def local_copy(self, key: str) -> AsyncContextManager[str]:
+        """Async context manager yielding a local path holding the object's content"""
+
+    async def presign_upload(
+        self, key: str, content_type: str, content_length: int, sha256_hex: str
+    ) -> Optional[dict]:
+        """Describe a direct upload of exactly this content to ``key``.
+
+        Returns ``{"method", "url", "headers", "expires_in"}``, or None if
+        the backend cannot accept uploads that bypass the API.
+        """
+        return None
+
+
+class LocalStorage(StorageBackend):
+    """Objects stored as files below ``root`` and served from ``url_prefix``"""
+
+    def __init__(self, root: str, url_prefix: str):
+        self.root = Path(root)
+        self.url_prefix = url_prefix.rstrip("/")
+
+    def _path(self, key: str) -> Path:
+        path = (self.root / key).resolve()
+        if self.root.resolve() not in path.parents:
+            raise ValueError(f"Storage key escapes the storage root: {key}")
+        return path
+
+    def url(self, key: str) -> str:
+        return f"{self.url_prefix}/{key}"
+
+    async def exists(self, key: str) -> bool:
+        return await aiofiles.os.path.exists(self._path(key))
+
+    async def size(self, key: str) -> Optional[int]:
+        try:
+            return (await aiofiles.os.stat(self._path(key))).st_size
+        except FileNotFoundError:
+            return None
+
+    async def put_file(self, key: str, path: str, content_type: Optional[str] = None):
+        target = self._path(key)
+        await aiofiles.os.makedirs(target.parent, exist_ok=True)
+        # Unique per upload, so concurrent writers of one key never share a temp file
+        fd, tmp = tempfile.mkstemp(dir=target.parent, prefix=f".{target.name}.", suffix=".tmp")
+        os.close(fd)
+        try:
+            # move() copies across filesystems; replace() then publishes atomically
+            await asyncio.to_thread(shutil.move, path, tmp)
+            if content_type and content_type.startswith(COMPRESSIBLE_TYPES):
+                # Siblings first, so the file is never served without them
+                await asyncio.to_thread(write_compressed_siblings, tmp)
+                for suffix in (".gz", ".br"):
+                    if await aiofiles.os.path.exists(f"{tmp}{suffix}"):
+                        await aiofiles.os.replace(f"{tmp}{suffix}", f"{target}{suffix}")
+            await aiofiles.os.replace(tmp, target)
+        finally:
+            for leftover in (tmp, f"{tmp}.gz", f"{tmp}.br"):
+                if await aiofiles.os.path.exists(leftover):
+                    await aiofiles.os.remove(leftover)
+
+    @asynccontextmanager
+    async def local_copy(self, key: str) -> AsyncIterator[str]:
+        yield str(self._path(key))
+
+
+class S3Storage(StorageBackend):
+    """Objects stored in an S3-compatible bucket (AWS S3, MinIO, ...).
+
+    boto3 is synchronous, so calls run in worker threads. Reads are served
+    from ``public_url`` (the bucket URL, or a CDN in front of it), and
+    uploads can go straight to the bucket through presigned URLs.
+    """
+
+    def __init__(
+        self,
+        bucket: str,
+        public_url: str,
+        endpoint_url: Optional[str] = None,
+        region: Optional[str] = None,
+        access_key_id: Optional[str] = None,
+        secret_access_key: Optional[str] = None,
+        presign_expires_seconds: int = 900,
+    ):
+        if boto3 is None:
+            raise RuntimeError("boto3 is required for the S3 storage backend")
+        self.bucket = bucket
+        self.public_url = public_url.rstrip("/")
+        self.presign_expires_seconds = presign_expires_seconds
+        self.client = boto3.client(
+            "s3",
+            endpoint_url=endpoint_url,
+            region_name=region,
+            aws_access_key_id=access_key_id,
+            aws_secret_access_key=secret_access_key,
+            config=BotoConfig(signature_version="s3v4", s3={"addressing_style": "path"}),
+        )
+
+    def url(self, key: str) -> str:
+        return f"{self.public_url}/{key}"
+
+    async def _head(self, key: str) -> Optional[dict]:
+        try:
+            return await asyncio.to_thread(self.client.head_object, Bucket=self.bucket, Key=key)
+        except ClientError as e:
+            if e.response.get("Error", {}).get("Code") in ("404", "NoSuchKey", "NotFound"):
+                return None
+            raise
+
+    async def exists(self, key: str) -> bool:
+        return await self._head(key) is not None
+
+    async def size(self, key: str) -> Optional[int]:
+        head = await self._head(key)
+        return head["ContentLength"] if head else None
+
+    async def put_file(self, key: str, path: str, content_type: Optional[str] = None):
+        extra = {"CacheControl": IMMUTABLE_CACHE_CONTROL}
+        if content_type:
+            extra["ContentType"] = content_type
+        await asyncio.to_thread(self.client.upload_file, path, self.bucket, key, ExtraArgs=extra)
+        await aiofiles.os.remove(path)
+
+    @asynccontextmanager
+    async def local_copy(self, key: str) -> AsyncIterator[str]:
+        fd, path = tempfile.mkstemp(suffix=os.path.splitext(key)[1])
+        os.close(fd)
+        try:
+            await asyncio.to_thread(self.client.download_file, self.bucket, key, path)
+            yield path
+        finally:
+            await aiofiles.os.remove(path)
+
+    async def presign_upload(
+        self, key: str, content_type: str, content_length: int, sha256_hex: str
+    ) -> Optional[dict]:
+        # Length, type and checksum are signed: the bucket rejects any other content
+        checksum = base64.b64encode(bytes.fromhex(sha256_hex)).decode()
+        url = await asyncio.to_thread(
+            self.client.generate_presigned_url,
+            "put_object",
+            Params={
+                "Bucket": self.bucket,
+                "Key": key,
+                "ContentType": content_type,
+                "ContentLength": content_length,
+                "ChecksumSHA256": checksum,
+                "CacheControl": IMMUTABLE_CACHE_CONTROL,
+            },
+            ExpiresIn=self.presign_expires_seconds,
+        )
+        return {
+            "method": "PUT",
+            "url": url,
+            "headers": {
+                "Content-Type": content_type,
+                "Content-Length": str(content_length),
+                "x-amz-checksum-sha256": checksum,
+                "Cache-Control": IMMUTABLE_CACHE_CONTROL,
+            },
+            "expires_in": self.presign_expires_seconds,
+        }
+
+
+def build_storage() -> StorageBackend:
+    """Create the backend selected by ``STORAGE_BACKEND``"""
+    if settings.STORAGE_BACKEND == "s3":
+        logger.info(f"Storing theme assets in S3 bucket {settings.S3_BUCKET}")
+        return S3Storage(
+            bucket=settings.S3_BUCKET,
+            public_url=settings.S3_PUBLIC_URL,
+            endpoint_url=settings.S3_ENDPOINT_URL,
+            region=settings.S3_REGION,
+            access_key_id=settings.S3_ACCESS_KEY_ID,
+            secret_access_key=settings.S3_SECRET_ACCESS_KEY,
+            presign_expires_seconds=settings.STORAGE_PRESIGN_EXPIRES_SECONDS,
+        )
+    return LocalStorage(settings.STORAGE_LOCAL_ROOT, settings.STORAGE_LOCAL_URL_PREFIX)
@@ -0,0 +1,80 @@
+import asyncio
+import json
+
+import pytest
+
+import app.routes.domains as domains
+from app.schemas.domain import DomainBulkCreate
+
+class FakeKeycloak:
+    def __init__(self, rejected=()):
+        self.rejected = set(rejected)
+        self.created = []
+        self.deleted = []
+
+    async def create_realm(self, realm_name, display_name, realm_settings=None):
+        await asyncio.sleep(0)
+        if realm_name in self.rejected:
+            raise RuntimeError("realm rejected")
+        self.created.append(realm_name)
+
+    async def delete_realm(self, realm_name):
+        self.deleted.append(realm_name)
+
+class NoExistingDomains:
+    class Result:
+        def scalars(self):
+            return self
+
+        def all(self):
+            return []
+
+    async def execute(self, statement):
+        return self.Result()
+
+class FailingSession:
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        return False
+
+    async def execute(self, statement):
+        raise RuntimeError("connection lost")
+
+def payload(*names):
+    return DomainBulkCreate(domains=[{"name": name, "display_name": name.title()} for name in names])
+
+async def read_lines(response):
+    return [json.loads(chunk) async for chunk in response.body_iterator]
+
+@pytest.mark.asyncio
+async def test_failed_insert_removes_created_realms(monkeypatch):
+    monkeypatch.setattr(domains, "SessionLocal", FailingSession)
+    keycloak = FakeKeycloak()
+    response = await domains.bulk_create_domains(
+        payload("tenant-a", "tenant-b"), concurrency=2, db=NoExistingDomains(), keycloak=keycloak
+    )
+    lines = await read_lines(response)
+
+    assert sorted(keycloak.deleted) == ["tenant-a", "tenant-b"]
+    assert [line["status"] for line in lines[:-1]] == ["failed", "failed"]
+    assert "realm removed" in lines[0]["detail"]
+    assert lines[-1]["summary"]["failed"] == 2
+    assert lines[-1]["summary"]["created"] == 0
+
+@pytest.mark.asyncio
+async def test_abandoned_stream_removes_created_realms(monkeypatch):
+    monkeypatch.setattr(domains, "SessionLocal", FailingSession)
+    keycloak = FakeKeycloak(rejected={"tenant-b"})
+    response = await domains.bulk_create_domains(
+        payload("tenant-a", "tenant-b", "tenant-c"), concurrency=2, db=NoExistingDomains(), keycloak=keycloak
+    )
+    # Stop reading after the first failure, before the domains are recorded, as a disconnect would
+    first = json.loads(await response.body_iterator.__anext__())
+    await response.body_iterator.aclose()
+    await asyncio.gather(*domains._realm_cleanups)
+
+    assert first["status"] == "failed"
+    assert "tenant-b" not in keycloak.deleted
+    assert sorted(keycloak.deleted) == sorted(keycloak.created)
@@ -0,0 +1,53 @@
+import time
+
+from app.core.cache import MISSING, TTLCache
+
+def test_get_set_and_counters():
+    cache = TTLCache(maxsize=4, ttl=60)
+    assert cache.get(("realm-a", "clients")) is MISSING
+    cache.set(("realm-a", "clients"), [])
+    assert cache.get(("realm-a", "clients")) == []
+    stats = cache.stats()
+    assert stats["hits"] == 1
+    assert stats["misses"] == 1
+    assert stats["hit_ratio"] == 0.5
+
+def test_lru_eviction():
+    cache = TTLCache(maxsize=2, ttl=60)
+    cache.set(("a", "realm"), 1)
+    cache.set(("b", "realm"), 2)
+    cache.get(("a", "realm"))
+    cache.set(("c", "realm"), 3)
+    assert ("a", "realm") in cache
+    assert ("b", "realm") not in cache
+    assert cache.stats()["evictions"] == 1
+
+def test_expiry(monkeypatch):
+    cache = TTLCache(maxsize=2, ttl=10)
+    now = time.monotonic()
+    monkeypatch.setattr(time, "monotonic", lambda: now)
+    cache.set(("a", "realm"), 1)
+    cache.set(("a", "idp", "google"), 2, ttl=100)
+    monkeypatch.setattr(time, "monotonic", lambda: now + 11)
+    assert cache.get(("a", "realm")) is MISSING
+    assert cache.get(("a", "idp", "google")) == 2
+
+def test_invalidate_prefix():
+    cache = TTLCache()
+    cache.set(("a", "idps"), [])
+    cache.set(("a", "idp", "google"), {})
+    cache.set(("b", "idps"), [])
+    assert cache.invalidate_prefix("a", "idp") == 1
+    assert cache.invalidate_prefix("a") == 1
+    assert cache.realms() == {"b"}
+
+def test_generation_moves_on_invalidation_of_the_realm():
+    cache = TTLCache(maxsize=4, ttl=60)
+    before = cache.generation(("a", "clients"))
+    cache.invalidate_prefix("b")
+    assert cache.generation(("a", "clients")) == before
+    cache.invalidate_prefix("a", "idps")
+    assert cache.generation(("a", "clients")) > before
+    other = cache.generation(("b", "realm"))
+    cache.clear()
+    assert cache.generation(("b", "realm")) > other
@@ -0,0 +1,234 @@
+import asyncio
+from datetime import timedelta
+from types import SimpleNamespace
+
+import pytest
+from fastapi import FastAPI, HTTPException
+from httpx import AsyncClient
+
+import app.routes.domains as domains
+from sqlalchemy.dialects import postgresql
+
+from app.core.dependencies import get_db, security_service
+from app.core.etag import make_etag
+from app.core.settings import settings
+from app.models.domain import DEFAULT_THEME
+
+async def bearer(*scopes):
+    token = await security_service.create_access_token(
+        {"sub": "tester@example.com", "scopes": list(scopes)}, timedelta(minutes=5)
+    )
+    return {"Authorization": f"Bearer {token}"}
+
+def domain_app(keycloak, db=None):
+    app = FastAPI()
+    app.include_router(domains.router)
+    app.state.keycloak_service = keycloak
+
+    async def fake_db():
+        yield db
+
+    app.dependency_overrides[get_db] = fake_db
+    return app
+
+class ClientImportKeycloak:
+    """Reports one client per outcome of a partial import"""
+
+    def __init__(self):
+        self.imports = []
+
+    async def list_client_ids(self, realm):
+        return {"portal"}
+
+    async def import_resources(self, realm, clients, identity_providers):
+        self.imports.append([client["clientId"] for client in clients])
+        if any(client["clientId"] == "rejected" for client in clients):
+            raise HTTPException(status_code=400, detail="Keycloak rejected the import")
+        results = []
+        for client in clients:
+            if client["clientId"] == "raced":
+                results.append({"resourceType": "CLIENT", "resourceName": "raced", "action": "SKIPPED"})
+            elif client["clientId"] != "unreported":
+                results.append({
+                    "resourceType": "CLIENT", "resourceName": client["clientId"],
+                    "action": "ADDED", "id": f"id-{client['clientId']}",
+                })
+        return {"results": results}
+
+@pytest.mark.asyncio
+async def test_bulk_clients_report_every_import_outcome(monkeypatch):
+    recorded = []
+
+    async def record_clients(db, domain_name, clients):
+        recorded.extend(client["clientId"] for client in clients)
+
+    monkeypatch.setattr(domains, "record_clients", record_clients)
+    monkeypatch.setattr(settings, "BULK_CLIENT_IMPORT_CHUNK", 3)
+    keycloak = ClientImportKeycloak()
+    body = [
+        {"clientId": "portal"},      # already in the realm
+        {"clientId": "new-app"},
+        {"clientId": "raced"},       # created concurrently: skipped by the import
+        {"clientId": "unreported"},  # missing from the import results
+        {"clientId": "new-app"},
+        {"name": "no client id"},
+        {"clientId": "rejected"},    # its chunk fails as a whole
+    ]
+    async with AsyncClient(app=domain_app(keycloak), base_url="http://test") as client:
+        response = await client.post(
+            "/api/v1/domains/acme/clients", json=body, headers=await bearer("domain:acme:clients:write")
+        )
+
+    assert response.status_code == 200
+    statuses = [result["status"] for result in response.json()["results"]]
+    assert statuses == ["exists", "created", "exists", "failed", "duplicate", "invalid", "failed"]
+    assert response.json()["results"][1]["id"] == "id-new-app"
+    assert response.json()["summary"] == {"created": 1, "exists": 2, "duplicate": 1, "invalid": 1, "failed": 2}
+    assert keycloak.imports == [["new-app", "raced", "unreported"], ["rejected"]]
+    assert recorded == ["new-app"]
+
+class IdpStateKeycloak:
+    def __init__(self):
+        self.realms = []
+
+    async def set_identity_provider_states(self, realm, states, semaphore):
+        self.realms.append(realm)
+        return {alias: ("updated", None) for alias in states}
+
+@pytest.mark.asyncio
+async def test_bulk_idp_states_require_permission_on_every_realm(monkeypatch):
+    marked = []
+
+    async def mark_identity_provider_states(db, changes):
+        marked.extend(changes)
+
+    monkeypatch.setattr(domains, "mark_identity_provider_states", mark_identity_provider_states)
+    keycloak = IdpStateKeycloak()
+    body = {"changes": [
+        {"realm": "acme", "alias": "google", "enabled": False},
+        {"realm": "globex", "alias": "google", "enabled": False},
+        {"realm": "acme", "alias": "google", "enabled": True},
+    ]}
+    async with AsyncClient(app=domain_app(keycloak), base_url="http://test") as client:
+        denied = await client.patch(
+            "/api/v1/domains/identity-providers/state", json=body,
+            headers=await bearer("domain:acme:identity-providers:write")
+        )
+        assert denied.status_code == 403
+        assert "globex" in denied.json()["detail"]
+        assert keycloak.realms == []
+
+        allowed = await client.patch(
+            "/api/v1/domains/identity-providers/state", json=body,
+            headers=await bearer("domain:acme:identity-providers:write", "domain:globex:identity-providers:write")
+        )
+
+    assert allowed.status_code == 200
+    assert [result["status"] for result in allowed.json()["results"]] == ["updated", "updated", "duplicate"]
+    assert sorted(keycloak.realms) == ["acme", "globex"]
+    assert sorted(marked) == [("acme", "google", False), ("globex", "google", False)]
+
+class ThemeRow:
+    """One domains row shared by concurrent sessions, with its row lock"""
+
+    def __init__(self, theme_config):
+        self.theme_config = theme_config
+        self.lock = asyncio.Lock()
+
+class ThemeSession:
+    """Session stub applying the theme UPDATE the way Postgres would (jsonb ||)"""
+
+    def __init__(self, row):
+        self.row = row
+        self.statements = []
+        self.locked = False
+
+    async def execute(self, statement):
+        compiled = statement.compile(dialect=postgresql.dialect())
+        sql = str(compiled)
+        self.statements.append(sql)
+        if "FOR UPDATE" in sql:
+            await self.row.lock.acquire()
+            self.locked = True
+            return FirstResult(SimpleNamespace(theme_config=dict(self.row.theme_config)))
+        assert sql.startswith("UPDATE domains") and "||" in sql
+        changes = [value for value in compiled.params.values() if isinstance(value, dict)][-1]
+        await asyncio.sleep(0)  # let the other request interleave
+        self.row.theme_config = {**self.row.theme_config, **changes}
+        return FirstResult(SimpleNamespace(theme_config=dict(self.row.theme_config)))
+
+    async def commit(self):
+        self._release()
+
+    async def rollback(self):
+        self._release()
+
+    def _release(self):
+        if self.locked:
+            self.locked = False
+            self.row.lock.release()
+
+class FirstResult:
+    def __init__(self, row):
+        self.row = row
+
+    def first(self):
+        return self.row
+
+class ThemeKeycloak:
+    async def update_theme(self, realm, theme_config):
+        await asyncio.sleep(0)
+
+COLORS = {"primaryColor": "#112233", "secondaryColor": "#445566"}
+
+@pytest.mark.asyncio
+async def test_overlapping_theme_puts_merge_their_keys():
+    row = ThemeRow({"primaryColor": "#000000"})
+    sessions = []
+
+    async def session_per_request():
+        session = ThemeSession(row)
+        sessions.append(session)
+        yield session
+
+    app = domain_app(ThemeKeycloak())
+    app.dependency_overrides[get_db] = session_per_request
+    headers = await bearer("domain:acme:theme:write")
+    async with AsyncClient(app=app, base_url="http://test") as client:
+        first, second = await asyncio.gather(
+            client.put("/api/v1/domains/acme/theme", json={**COLORS, "loginTheme": "unilock"}, headers=headers),
+            client.put(
+                "/api/v1/domains/acme/theme",
+                json={**COLORS, "logoUrl": "https://cdn.example.com/logo.png"}, headers=headers
+            ),
+        )
+
+    assert first.status_code == second.status_code == 200
+    assert row.theme_config["loginTheme"] == "unilock"
+    assert row.theme_config["logoUrl"] == "https://cdn.example.com/logo.png"
+    # One UPDATE per request and no read-modify-write
+    assert all(len(session.statements) == 1 for session in sessions)
+
+@pytest.mark.asyncio
+async def test_theme_put_with_stale_if_match_is_refused_under_the_row_lock():
+    row = ThemeRow({**COLORS, "loginTheme": "old"})
+    session = ThemeSession(row)
+    headers = await bearer("domain:acme:theme:write")
+    async with AsyncClient(app=domain_app(ThemeKeycloak(), session), base_url="http://test") as client:
+        stale = await client.put(
+            "/api/v1/domains/acme/theme", json={**COLORS, "loginTheme": "new"},
+            headers={**headers, "If-Match": '"stale"'}
+        )
+        assert stale.status_code == 412
+        assert row.theme_config["loginTheme"] == "old"
+        assert "FOR UPDATE" in session.statements[0]
+        assert not row.lock.locked()
+
+        current = make_etag({**DEFAULT_THEME, **row.theme_config})
+        fresh = await client.put(
+            "/api/v1/domains/acme/theme", json={**COLORS, "loginTheme": "new"},
+            headers={**headers, "If-Match": current}
+        )
+    assert fresh.status_code == 200
+    assert row.theme_config["loginTheme"] == "new"
+    assert fresh.headers["ETag"] == make_etag({**DEFAULT_THEME, **row.theme_config})
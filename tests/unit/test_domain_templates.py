@@ -0,0 +1,147 @@
+import io
+from datetime import timedelta
+from pathlib import Path
+
+import pytest
+from fastapi import FastAPI
+from httpx import AsyncClient
+
+from app.core.dependencies import get_db, security_service
+from app.models.domain_template import DomainTemplate
+from app.routes import domain_templates, domains
+from app.services.keycloak_service import KeycloakService
+
+MIGRATIONS = Path(__file__).resolve().parents[2] / "fastapi-backend" / "alembic"
+
+def saas_template(**fields):
+    return DomainTemplate(
+        name="saas-tenant",
+        realm_settings={"sslRequired": "all", "attributes": {"tier": "gold"}},
+        clients=[{"clientId": "portal"}, {"clientId": "admin-ui"}],
+        identity_providers=[{"alias": "google", "providerId": "google"}],
+        theme={"primaryColor": "#112233", "loginTheme": "unilock"},
+        **fields,
+    )
+
+class RecordingAdmin:
+    """Admin client stub recording every call made through it"""
+
+    def __init__(self):
+        self.calls = []
+
+    async def create_realm(self, payload):
+        self.calls.append(("create_realm", payload))
+
+    async def partial_import(self, realm, payload):
+        self.calls.append(("partial_import", payload))
+        return {"added": len(payload["clients"]) + len(payload["identityProviders"]), "results": []}
+
+class Result:
+    def __init__(self, rows):
+        self.rows = rows
+
+    def first(self):
+        return self.rows[0] if self.rows else None
+
+    def scalars(self):
+        return self
+
+    def __iter__(self):
+        return iter(self.rows)
+
+class DomainSession:
+    """Session stub for POST /domains: no existing domain, one stored template"""
+
+    def __init__(self, template):
+        self.results = [Result([]), Result([template])]
+        self.added = []
+
+    async def execute(self, statement):
+        return self.results.pop(0)
+
+    def add(self, row):
+        self.added.append(row)
+
+    async def commit(self):
+        pass
+
+    async def refresh(self, row):
+        row.id = 1
+        row.is_active = True
+
+def test_realm_representation_carries_settings_and_theme():
+    representation = saas_template().realm_representation()
+    assert representation["sslRequired"] == "all"
+    assert representation["attributes"] == {"tier": "gold", "primaryColor": "#112233", "secondaryColor": "#6b7280"}
+    assert representation["loginTheme"] == "unilock"
+
+@pytest.mark.asyncio
+async def test_domain_from_template_takes_one_create_and_one_import():
+    keycloak = KeycloakService()
+    await keycloak.close()
+    keycloak.admin = RecordingAdmin()
+    session = DomainSession(saas_template())
+
+    app = FastAPI()
+    app.include_router(domains.router)
+    app.state.keycloak_service = keycloak
+
+    async def fake_db():
+        yield session
+
+    app.dependency_overrides[get_db] = fake_db
+    token = await security_service.create_access_token({"sub": "admin", "scopes": ["admin"]}, timedelta(minutes=5))
+    async with AsyncClient(app=app, base_url="http://test") as client:
+        response = await client.post(
+            "/api/v1/domains/",
+            json={"name": "tenant-a", "display_name": "Tenant A", "template": "saas-tenant"},
+            headers={"Authorization": f"Bearer {token}"},
+        )
+
+    assert response.status_code == 201, response.text
+    assert [name for name, _ in keycloak.admin.calls] == ["create_realm", "partial_import"]
+    realm = keycloak.admin.calls[0][1]
+    assert realm["realm"] == "tenant-a"
+    assert realm["loginTheme"] == "unilock"
+    imported = keycloak.admin.calls[1][1]
+    assert len(imported["clients"]) == 2
+    assert len(imported["identityProviders"]) == 1
+    assert session.added[0].theme_config["primaryColor"] == "#112233"
+
+@pytest.mark.asyncio
+async def test_template_without_resources_takes_only_the_realm_create():
+    keycloak = KeycloakService()
+    await keycloak.close()
+    keycloak.admin = RecordingAdmin()
+    template = DomainTemplate(name="bare", realm_settings={}, clients=[], identity_providers=[], theme=None)
+    await domains._provision_realm(keycloak, domains.DomainCreate(name="tenant-b", display_name="Tenant B"), template)
+    assert [name for name, _ in keycloak.admin.calls] == ["create_realm"]
+
+def test_template_routes_store_the_theme_as_plain_json():
+    update = domain_templates.DomainTemplateUpdate(
+        theme={"primaryColor": "#112233", "secondaryColor": "#445566", "logoUrl": "https://cdn.example.com/l.png"}
+    )
+    fields = domain_templates._template_fields(update)
+    assert fields["theme"]["logoUrl"] == "https://cdn.example.com/l.png"
+    assert fields["clients"] == [] and fields["realm_settings"] == {}
+
+def test_migration_matches_the_model():
+    from alembic.config import Config
+    from alembic.migration import MigrationContext
+    from alembic.operations import Operations
+    from alembic.script import ScriptDirectory
+
+    config = Config()
+    config.set_main_option("script_location", str(MIGRATIONS))
+    scripts = ScriptDirectory.from_config(config)
+    assert len(scripts.get_heads()) == 1
+
+    output = io.StringIO()
+    context = MigrationContext.configure(dialect_name="postgresql", opts={"as_sql": True, "output_buffer": output})
+    with Operations.context(context):
+        scripts.get_revision("d7f3c2b8e641").module.upgrade()
+    sql = output.getvalue()
+    assert "CREATE TABLE domain_templates" in sql
+    for column in DomainTemplate.__table__.columns:
+        assert column.name in sql
+    assert "CREATE UNIQUE INDEX ix_domain_templates_name" in sql
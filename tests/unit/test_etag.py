@@ -0,0 +1,34 @@
+import pytest
+from fastapi import HTTPException
+from starlette.requests import Request
+
+from app.core.etag import check_if_match, make_etag, not_modified
+
+def _request(**headers):
+    return Request({
+        "type": "http",
+        "headers": [(name.replace("_", "-").encode(), value.encode()) for name, value in headers.items()],
+    })
+
+def test_etag_is_stable_and_strong():
+    assert make_etag({"b": 1, "a": 2}) == make_etag({"a": 2, "b": 1})
+    assert make_etag({"a": 1}) != make_etag({"a": 2})
+    assert make_etag({"a": 1}).startswith('"')
+
+def test_if_none_match_returns_304():
+    etag = make_etag([1, 2, 3])
+    response = not_modified(_request(if_none_match=f'"other", W/{etag}'), etag)
+    assert response.status_code == 304
+    assert response.headers["etag"] == etag
+    assert not_modified(_request(if_none_match='"other"'), etag) is None
+    assert not_modified(_request(), etag) is None
+
+def test_if_match_mismatch_is_rejected():
+    etag = make_etag({"enabled": True})
+    check_if_match(etag, etag)
+    check_if_match("*", etag)
+    with pytest.raises(HTTPException) as exc:
+        check_if_match(make_etag({"enabled": False}), etag)
+    assert exc.value.status_code == 412
+    with pytest.raises(HTTPException):
+        check_if_match("*", None)
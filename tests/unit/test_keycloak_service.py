@@ -0,0 +1,179 @@
+import asyncio
+
+import pytest
+
+from app.services.keycloak_service import KeycloakService
+
+@pytest.mark.asyncio
+async def test_fetch_started_before_invalidation_is_not_cached():
+    service = KeycloakService()
+    release = asyncio.Event()
+
+    async def stale_loader():
+        await release.wait()
+        return "before write"
+
+    reader = asyncio.create_task(service._cached(("acme", "realm"), stale_loader))
+    await asyncio.sleep(0)
+    service.cache.delete(("acme", "realm"))  # a write lands while the read is in flight
+
+    async def fresh_loader():
+        return "after write"
+
+    # A reader arriving after the write does not join the stale fetch
+    assert await service._cached(("acme", "realm"), fresh_loader) == "after write"
+    release.set()
+    assert await reader == "before write"
+    assert service.cache.get(("acme", "realm")) == "after write"
+    await service.close()
+
+@pytest.mark.asyncio
+async def test_waiters_retry_when_the_loading_caller_is_cancelled():
+    service = KeycloakService()
+    calls = 0
+
+    async def loader():
+        nonlocal calls
+        calls += 1
+        if calls == 1:
+            await asyncio.sleep(3600)
+        return "loaded"
+
+    leader = asyncio.create_task(service._cached(("acme", "clients"), loader))
+    await asyncio.sleep(0)
+    waiter = asyncio.create_task(service._cached(("acme", "clients"), loader))
+    await asyncio.sleep(0)
+    leader.cancel()
+
+    assert await waiter == "loaded"
+    assert leader.cancelled()
+    assert calls == 2
+    await service.close()
+
+class _UnpagedAdmin:
+    """Admin client stub that ignores first/max and always returns the same full page"""
+
+    def __init__(self, page_size: int):
+        self.calls = 0
+        self.page = [{"clientId": f"client-{i}"} for i in range(page_size)]
+
+    async def get_clients(self, realm, first=None, max_results=None):
+        self.calls += 1
+        return self.page
+
+@pytest.mark.asyncio
+async def test_client_ids_are_paged_and_stop_when_paging_is_ignored():
+    from app.core.settings import settings
+
+    service = KeycloakService()
+    await service.close()
+    service.admin = _UnpagedAdmin(settings.MIRROR_SYNC_PAGE_SIZE)
+    client_ids = await service.list_client_ids("acme")
+    assert len(client_ids) == settings.MIRROR_SYNC_PAGE_SIZE
+    assert service.admin.calls == 2
+
+@pytest.mark.asyncio
+async def test_admin_event_polls_are_bounded(monkeypatch):
+    from app.core.settings import settings
+    from app.services.keycloak_events import AdminEventListener
+
+    monkeypatch.setattr(settings, "KEYCLOAK_ADMIN_EVENTS_CONCURRENCY", 2)
+    service = KeycloakService()
+    await service.close()
+    listener = AdminEventListener(service)
+    in_flight = peak = 0
+
+    async def events_since(realm, cursor):
+        nonlocal in_flight, peak
+        in_flight += 1
+        peak = max(peak, in_flight)
+        await asyncio.sleep(0.01)
+        in_flight -= 1
+        return []
+
+    monkeypatch.setattr(listener, "_events_since", events_since)
+    for i in range(6):
+        service.cache.set((f"realm-{i}", "realm"), {})
+    await listener.poll()
+    assert peak == 2
+
+class _IdpAdmin:
+    """Admin client stub recording identity provider updates and their peak concurrency"""
+
+    def __init__(self, idps):
+        self.idps = idps
+        self.updated = []
+        self.in_flight = 0
+        self.peak = 0
+
+    async def get_idps(self, realm):
+        return [dict(idp) for idp in self.idps]
+
+    async def update_idp(self, realm, alias, payload):
+        self.in_flight += 1
+        self.peak = max(self.peak, self.in_flight)
+        await asyncio.sleep(0.01)
+        self.in_flight -= 1
+        if alias == "broken":
+            raise RuntimeError("Keycloak said no")
+        self.updated.append((alias, payload["enabled"]))
+
+@pytest.mark.asyncio
+async def test_identity_provider_states_skip_no_ops_and_respect_the_semaphore():
+    service = KeycloakService()
+    await service.close()
+    idps = [{"alias": f"idp-{i}", "enabled": True} for i in range(6)]
+    service.admin = _IdpAdmin(idps + [{"alias": "already-off", "enabled": False}, {"alias": "broken", "enabled": True}])
+    states = {f"idp-{i}": False for i in range(6)}
+    states.update({"already-off": False, "broken": False, "missing": True})
+
+    results = await service.set_identity_provider_states("acme", states, asyncio.Semaphore(2))
+
+    assert results["already-off"] == ("unchanged", None)
+    assert results["missing"][0] == "not_found"
+    assert results["broken"][0] == "failed"
+    assert all(results[f"idp-{i}"] == ("updated", None) for i in range(6))
+    assert sorted(service.admin.updated) == [(f"idp-{i}", False) for i in range(6)]
+    assert service.admin.peak == 2
+
+class _EventAdmin:
+    """Admin client stub serving a fixed admin event feed (newest first)"""
+
+    def __init__(self):
+        self.events = []
+
+    async def get_admin_events(self, realm, **filters):
+        return list(self.events)
+
+@pytest.mark.asyncio
+async def test_admin_events_sharing_the_cursor_millisecond_are_applied_once():
+    from app.core.cache import MISSING
+    from app.services.keycloak_events import AdminEventListener
+
+    service = KeycloakService()
+    await service.close()
+    service.admin = _EventAdmin()
+    changed = []
+    listener = AdminEventListener(service, on_change=changed.append)
+    listener.cursors["acme"] = 900
+    first = {"id": "e1", "time": 1000, "resourceType": "CLIENT", "operationType": "CREATE", "resourcePath": "clients/a"}
+    # Same millisecond, no id (older Keycloak): told apart by content
+    second = {"time": 1000, "resourceType": "CLIENT", "operationType": "CREATE", "resourcePath": "clients/b"}
+
+    service.admin.events = [first]
+    await listener._poll_realm("acme")
+    assert listener.cursors["acme"] == 1000
+    assert changed == ["acme"]
+
+    # An event stored after the previous poll in the cursor's millisecond is not skipped
+    service.admin.events = [second, first]
+    service.cache.set(("acme", "clients", 0, 100), ["stale"])
+    await listener._poll_realm("acme")
+    assert service.cache.get(("acme", "clients", 0, 100)) is MISSING
+    assert changed == ["acme", "acme"]
+
+    # Nothing new: both events at the cursor are recognized as applied
+    service.cache.set(("acme", "clients", 0, 100), ["fresh"])
+    await listener._poll_realm("acme")
+    assert service.cache.get(("acme", "clients", 0, 100)) == ["fresh"]
+    assert changed == ["acme", "acme"]
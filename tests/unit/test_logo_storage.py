@@ -0,0 +1,50 @@
+import pytest
+from fastapi import HTTPException
+
+from app.services.logo_storage import logo_extension
+
+def test_raster_logo_types_are_accepted():
+    assert logo_extension("Logo.PNG") == ".png"
+    assert logo_extension("logo.webp") == ".webp"
+
+@pytest.mark.parametrize("filename", ["logo.svg", "logo.html", "logo"])
+def test_other_logo_types_are_rejected(filename):
+    with pytest.raises(HTTPException) as exc:
+        logo_extension(filename)
+    assert exc.value.status_code == 400
+
+@pytest.mark.asyncio
+async def test_oversized_upload_is_refused_before_it_is_read(monkeypatch):
+    from fastapi import APIRouter, FastAPI, File, UploadFile
+    from httpx import AsyncClient
+    from app.core.settings import settings
+    from app.services.logo_storage import LOGO_MULTIPART_OVERHEAD_BYTES, LogoUploadRoute
+
+    monkeypatch.setattr(settings, "LOGO_MAX_BYTES", 1024)
+    limit = 1024 + LOGO_MULTIPART_OVERHEAD_BYTES
+    router = APIRouter()
+    received = []
+
+    async def upload(logo: UploadFile = File(...)):
+        received.append(len(await logo.read()))
+        return {}
+
+    router.add_api_route("/logo", upload, methods=["POST"], route_class_override=LogoUploadRoute)
+    app = FastAPI()
+    app.include_router(router)
+
+    async def chunked(size):
+        boundary = b"--b\r\n"
+        yield boundary + b'Content-Disposition: form-data; name="logo"; filename="logo.png"\r\n\r\n'
+        for _ in range(size // 4096):
+            yield b"x" * 4096
+        yield b"\r\n--b--\r\n"
+
+    headers = {"Content-Type": "multipart/form-data; boundary=b"}
+    async with AsyncClient(app=app, base_url="http://test") as client:
+        assert (await client.post("/logo", files={"logo": ("logo.png", b"x" * 512)})).status_code == 200
+        declared = await client.post("/logo", files={"logo": ("logo.png", b"x" * (limit + 1))})
+        assert declared.status_code == 413
+        streamed = await client.post("/logo", content=chunked(limit + 8192), headers=headers)
+        assert streamed.status_code == 413
+    assert received == [512]
@@ -0,0 +1,33 @@
+import pytest
+
+from app.services.logo_variants import best_variant
+
+MANIFEST = {
+    "webp": {"64": "/static/logos/abc-64.webp", "256": "/static/logos/abc-256.webp"},
+    "png": {"64": "/static/logos/abc-64.png", "256": "/static/logos/abc-256.png"},
+}
+
+def test_smallest_variant_wide_enough():
+    assert best_variant(MANIFEST, 100, "image/webp,*/*") == "/static/logos/abc-256.webp"
+    assert best_variant(MANIFEST, 64, "image/webp") == "/static/logos/abc-64.webp"
+
+def test_png_without_webp_support_and_largest_by_default():
+    assert best_variant(MANIFEST, 32, "image/png") == "/static/logos/abc-64.png"
+    assert best_variant(MANIFEST, None, "") == "/static/logos/abc-256.png"
+    assert best_variant(MANIFEST, 1024, "") == "/static/logos/abc-256.png"
+
+def test_no_manifest():
+    assert best_variant(None, 64, "image/webp") is None
+
+def test_jpg_variants_are_encoded_as_jpeg(tmp_path):
+    Image = pytest.importorskip("PIL.Image")
+    from app.services.logo_variants import render_variants
+
+    source = tmp_path / "logo.png"
+    Image.new("RGBA", (300, 150), (255, 0, 0, 128)).save(source)
+    variants = render_variants(str(source), str(tmp_path), "abc", [64, 512], ["jpg", "png"])
+
+    assert variants == [("jpg", 64, "abc-64.jpg"), ("png", 64, "abc-64.png")]
+    with Image.open(tmp_path / "abc-64.jpg") as jpg:
+        assert jpg.format == "JPEG"
+        assert jpg.size == (64, 32)
@@ -0,0 +1,79 @@
+import pytest
+from fastapi import HTTPException
+from prometheus_client import REGISTRY
+
+from app.core.cache import TTLCache
+from app.core.metrics import CacheCollector, instrument_calls
+
+@instrument_calls
+class FakeService:
+    async def fetch(self, fail: bool = False):
+        if fail:
+            raise HTTPException(status_code=404, detail="missing")
+        return "value"
+
+    async def close(self):
+        return None
+
+def _sample(name, **labels):
+    return REGISTRY.get_sample_value(name, labels) or 0.0
+
+@pytest.mark.asyncio
+async def test_public_calls_are_counted_by_outcome():
+    service = FakeService()
+    ok_before = _sample("keycloak_calls_total", method="fetch", status="ok")
+    missing_before = _sample("keycloak_calls_total", method="fetch", status="404")
+
+    assert await service.fetch() == "value"
+    with pytest.raises(HTTPException):
+        await service.fetch(fail=True)
+
+    assert _sample("keycloak_calls_total", method="fetch", status="ok") == ok_before + 1
+    assert _sample("keycloak_calls_total", method="fetch", status="404") == missing_before + 1
+    assert _sample("keycloak_call_duration_seconds_count", method="fetch") >= 2
+    assert _sample("keycloak_calls_total", method="close", status="ok") == 0
+
+def test_cache_collector_reports_hit_ratio():
+    cache = TTLCache(maxsize=4, ttl=60)
+    cache.set("a", 1)
+    cache.get("a")
+    cache.get("b")
+    metrics = {family.name: family.samples for family in CacheCollector({"test": lambda: cache, "absent": lambda: None}).collect()}
+    assert metrics["cache_hit_ratio"][0].value == 0.5
+    assert metrics["cache_hit_ratio"][0].labels == {"cache": "test"}
+    assert len(metrics["cache_hits"]) == 1
+
+def _metrics_app():
+    from fastapi import FastAPI
+    from app.core.metrics import MetricsMiddleware
+
+    app = FastAPI()
+
+    @app.get("/domains/{domain_name}")
+    async def get_domain(domain_name: str):
+        return {"name": domain_name}
+
+    app.add_middleware(MetricsMiddleware)
+    return app
+
+@pytest.mark.asyncio
+async def test_middleware_labels_requests_with_route_template():
+    from httpx import AsyncClient
+
+    labels = {"method": "GET", "route": "/domains/{domain_name}", "status": "200"}
+    before = _sample("http_request_duration_seconds_count", **labels)
+    async with AsyncClient(app=_metrics_app(), base_url="http://test") as client:
+        assert (await client.get("/domains/acme")).status_code == 200
+        assert (await client.get("/domains/other")).status_code == 200
+    assert _sample("http_request_duration_seconds_count", **labels) == before + 2
+
+@pytest.mark.asyncio
+async def test_middleware_labels_unmatched_paths_without_the_raw_path():
+    from httpx import AsyncClient
+
+    labels = {"method": "GET", "route": "unmatched", "status": "404"}
+    before = _sample("http_request_duration_seconds_count", **labels)
+    async with AsyncClient(app=_metrics_app(), base_url="http://test") as client:
+        assert (await client.get("/no/such/path")).status_code == 404
+    assert _sample("http_request_duration_seconds_count", **labels) == before + 1
+    assert _sample("http_request_duration_seconds_count", method="GET", route="/no/such/path", status="404") == 0
@@ -0,0 +1,40 @@
+import pytest
+
+from app.core.settings import settings
+from app.services.mirror_service import MirrorReconciler
+
+@pytest.mark.asyncio
+async def test_fetch_all_stops_when_paging_is_ignored():
+    page = [{"id": f"client-{i}"} for i in range(settings.MIRROR_SYNC_PAGE_SIZE)]
+    calls = []
+
+    async def fetch_page(realm, first, max_results):
+        calls.append(first)
+        return page
+
+    items = await MirrorReconciler._fetch_all(fetch_page, "acme", "id")
+    assert items == page
+    assert calls == [0, len(page)]
+
+@pytest.mark.asyncio
+async def test_fetch_all_reads_every_page():
+    size = settings.MIRROR_SYNC_PAGE_SIZE
+    total = [{"alias": f"idp-{i}"} for i in range(size + 3)]
+
+    async def fetch_page(realm, first, max_results):
+        return total[first:first + max_results]
+
+    assert await MirrorReconciler._fetch_all(fetch_page, "acme", "alias") == total
+
+def test_mirror_is_served_only_while_synced_and_recent(monkeypatch):
+    from datetime import datetime, timedelta, timezone
+    from app.services.mirror_service import mirror_is_fresh
+
+    now = datetime.now(timezone.utc)
+    monkeypatch.setattr(settings, "MIRROR_MAX_STALENESS_SECONDS", 600.0)
+    assert mirror_is_fresh(now - timedelta(seconds=60))
+    assert not mirror_is_fresh(now - timedelta(seconds=601))
+    assert not mirror_is_fresh(None)
+
+    monkeypatch.setattr(settings, "MIRROR_SYNC_ENABLED", False)
+    assert not mirror_is_fresh(now)
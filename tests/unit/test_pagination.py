@@ -0,0 +1,21 @@
+import pytest
+from fastapi import HTTPException
+
+from app.core.pagination import decode_cursor, encode_cursor
+
+def test_cursor_round_trip():
+    cursor = encode_cursor({"order": "name", "after": "acme"})
+    assert "=" not in cursor
+    assert decode_cursor(cursor, order="name") == {"order": "name", "after": "acme"}
+
+def test_cursor_for_other_ordering_is_rejected():
+    cursor = encode_cursor({"order": "id", "after": 42})
+    with pytest.raises(HTTPException) as exc:
+        decode_cursor(cursor, order="name")
+    assert exc.value.status_code == 400
+
+@pytest.mark.parametrize("cursor", ["not-base64!", "bnVsbA", "W10"])
+def test_malformed_cursor_is_rejected(cursor):
+    with pytest.raises(HTTPException) as exc:
+        decode_cursor(cursor)
+    assert exc.value.status_code == 400
@@ -0,0 +1,67 @@
+import pytest
+
+from app.core.permissions import Action, compile_actions, resolve_permissions
+
+def test_domain_scopes_are_resolved_into_action_masks():
+    permissions = resolve_permissions(["user", "domain:acme:theme:write", "domain:acme:read", "domain:*:read"])
+    assert permissions.allows("acme", compile_actions(["theme:write", "read"]))
+    assert permissions.allows("other", Action.READ)
+    assert not permissions.allows("other", Action.THEME_WRITE)
+    assert permissions.has_scopes(frozenset({"user"}))
+    assert not permissions.has_scopes(frozenset({"admin"}))
+
+def test_admin_scope_allows_every_domain_action():
+    assert resolve_permissions(["admin"]).allows("acme", Action.ALL)
+
+def test_malformed_domain_scopes_grant_nothing():
+    permissions = resolve_permissions(["domain:acme", "domain::read", "domain:acme:fly"])
+    assert permissions.domain_actions == {}
+
+def test_unknown_action_fails_at_compile_time():
+    with pytest.raises(ValueError):
+        compile_actions(["theme:delete"])
+
+@pytest.mark.asyncio
+async def test_theme_write_scope_is_limited_to_its_domain():
+    from datetime import timedelta
+    from fastapi import Depends, FastAPI
+    from httpx import AsyncClient
+    from app.core.dependencies import security_service
+    from app.routes import domains
+
+    app = FastAPI()
+
+    @app.put("/domains/{domain_name}/theme", dependencies=[Depends(domains.theme_write_required)])
+    async def update_theme(domain_name: str):
+        return {"domain": domain_name}
+
+    token = await security_service.create_access_token(
+        {"sub": "designer@example.com", "scopes": ["domain:acme:theme:write"]}, timedelta(minutes=5)
+    )
+    headers = {"Authorization": f"Bearer {token}"}
+    async with AsyncClient(app=app, base_url="http://test") as client:
+        assert (await client.put("/domains/acme/theme", headers=headers)).status_code == 200
+        assert (await client.put("/domains/other/theme", headers=headers)).status_code == 403
+
+    # The real theme, logo and upload-url routes use the same dependency and no router-wide admin check
+    theme_routes = {
+        ("PUT", "/{domain_name}/theme"),
+        ("POST", "/{domain_name}/theme/logo"),
+        ("POST", "/{domain_name}/theme/logo/upload-url"),
+        ("POST", "/{domain_name}/theme/logo/complete"),
+    }
+    routes = [
+        r for r in domains.router.routes
+        if any(r.path.endswith(path) and method in r.methods for method, path in theme_routes)
+    ]
+    assert len(routes) == len(theme_routes)
+    for route in routes:
+        assert [d.dependency for d in route.dependencies] == [domains.theme_write_required]
+
+def test_authenticated_routes_take_no_body_from_the_auth_dependency():
+    from fastapi.dependencies.utils import get_flat_dependant
+    from app.routes import domains
+
+    for route in domains.router.routes:
+        body_params = {param.name for param in get_flat_dependant(route.dependant).body_params}
+        assert "required_scopes" not in body_params, route.path
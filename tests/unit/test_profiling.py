@@ -0,0 +1,60 @@
+import json
+from datetime import timedelta
+
+import pytest
+
+from app.core.profiling import ProfileStore
+
+def _meta(profile_id: str) -> dict:
+    return {"id": profile_id, "method": "GET", "path": "/health", "route": "/health",
+            "status": 200, "trigger": "header", "duration_ms": 1.0, "created_at": 0.0}
+
+def test_store_keeps_only_the_newest_profiles(tmp_path):
+    store = ProfileStore(str(tmp_path), max_profiles=2)
+    ids = [f"{1700000000000 + i:013d}-0000000{i}" for i in range(3)]
+    for profile_id in ids:
+        store.save(profile_id, '{"shared": {"frames": []}}', _meta(profile_id))
+
+    assert [entry["id"] for entry in store.entries()] == [ids[2], ids[1]]
+    assert store.path(ids[0]) is None
+    assert store.path(ids[2]).read_text() == '{"shared": {"frames": []}}'
+
+def test_store_rejects_ids_outside_the_ring(tmp_path):
+    store = ProfileStore(str(tmp_path), max_profiles=2)
+    assert store.path("../../etc/passwd") is None
+    assert not store.valid_id("1700000000000-XYZ")
+    assert store.valid_id(ProfileStore.new_id())
+
+def _profiled_app(store: ProfileStore):
+    from fastapi import FastAPI
+    from app.core.profiling import ProfilerMiddleware
+
+    app = FastAPI()
+
+    @app.get("/domains/{domain_name}")
+    async def get_domain(domain_name: str):
+        return {"name": domain_name}
+
+    app.add_middleware(ProfilerMiddleware, store=store)
+    return app
+
+@pytest.mark.asyncio
+async def test_admin_header_profiles_request_into_store(tmp_path):
+    from httpx import AsyncClient
+    from app.core.dependencies import security_service
+
+    pytest.importorskip("pyinstrument")
+    store = ProfileStore(str(tmp_path), max_profiles=5)
+    token = await security_service.create_access_token({"sub": "admin@example.com", "scopes": ["admin"]}, timedelta(minutes=5))
+    async with AsyncClient(app=_profiled_app(store), base_url="http://test") as client:
+        response = await client.get("/domains/acme", headers={"X-Profile": "1", "Authorization": f"Bearer {token}"})
+        unprofiled = await client.get("/domains/acme", headers={"X-Profile": "1"})
+    assert response.status_code == 200
+    assert "x-profile-id" not in unprofiled.headers
+
+    profile_id = response.headers["x-profile-id"]
+    [entry] = store.entries()
+    assert entry["id"] == profile_id
+    assert entry["route"] == "/domains/{domain_name}"
+    assert entry["status"] == 200
+    assert "shared" in json.loads(store.path(profile_id).read_text())
@@ -0,0 +1,126 @@
+from datetime import timedelta
+
+import pytest
+from fastapi import HTTPException
+
+from app.services.security_service import SecurityService
+
+@pytest.mark.asyncio
+async def test_verified_token_is_cached_until_revoked():
+    service = SecurityService()
+    token = await service.create_access_token({"sub": "admin@example.com", "scopes": ["admin"]}, timedelta(minutes=5))
+
+    first = await service.verify_token(token)
+    second = await service.verify_token(token)
+    assert second is first
+    stats = service.cache_stats()
+    assert stats["hits"] == 1
+    assert stats["misses"] == 1
+
+    assert service.revoke_token(token)
+    with pytest.raises(HTTPException) as exc:
+        await service.verify_token(token)
+    assert exc.value.status_code == 401
+
+@pytest.mark.asyncio
+async def test_cached_token_still_checks_scopes():
+    service = SecurityService()
+    token = await service.create_access_token({"sub": "user@example.com", "scopes": ["user"]}, timedelta(minutes=5))
+    await service.verify_token(token)
+    with pytest.raises(HTTPException) as exc:
+        await service.verify_token(token, required_scopes=["admin"])
+    assert exc.value.status_code == 403
+
+def test_invalid_token_cannot_be_revoked():
+    assert not SecurityService().revoke_token("not-a-jwt")
+
+def _keycloak_token(realm: str, kid: str = "key-1", **claims):
+    from cryptography.hazmat.primitives import serialization
+    from cryptography.hazmat.primitives.asymmetric import rsa
+    from jose import jwk, jwt
+    from app.core.settings import settings
+
+    private_key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    pem = private_key.private_bytes(
+        serialization.Encoding.PEM, serialization.PrivateFormat.PKCS8, serialization.NoEncryption()
+    )
+    public_pem = private_key.public_key().public_bytes(
+        serialization.Encoding.PEM, serialization.PublicFormat.SubjectPublicKeyInfo
+    )
+    public_jwk = {**jwk.construct(public_pem, "RS256").to_dict(), "kid": kid, "use": "sig"}
+    payload = {
+        "iss": f"{str(settings.KEYCLOAK_URL).rstrip('/')}/realms/{realm}",
+        "typ": "Bearer",
+        "azp": "unilock-api",
+        "sub": "3f1c",
+        "preferred_username": "admin",
+        "scope": "openid profile",
+        "realm_access": {"roles": ["admin"]},
+        **claims,
+    }
+    return jwt.encode(payload, pem, algorithm="RS256", headers={"kid": kid}), public_jwk
+
+@pytest.fixture
+def trusted_client(monkeypatch):
+    from app.core.settings import settings
+    monkeypatch.setattr(settings, "KEYCLOAK_JWT_AUTHORIZED_PARTIES", ["unilock-api"])
+
+@pytest.mark.asyncio
+async def test_keycloak_token_verified_with_cached_jwks(trusted_client):
+    service = SecurityService()
+    token, public_jwk = _keycloak_token("master", exp=2 ** 31)
+    service.jwks.keys["master"] = {"key-1": public_jwk}
+
+    token_data = await service.verify_token(token, required_scopes=["admin"])
+    assert token_data.username == "admin"
+    assert "openid" in token_data.scopes
+
+@pytest.mark.asyncio
+async def test_keycloak_token_with_unknown_kid_or_realm_is_rejected(trusted_client):
+    service = SecurityService()
+    token, _ = _keycloak_token("master", exp=2 ** 31)
+    with pytest.raises(HTTPException) as exc:
+        await service.verify_token(token)
+    assert exc.value.status_code == 401
+
+    untrusted, public_jwk = _keycloak_token("untrusted-realm", exp=2 ** 31)
+    service.jwks.keys["untrusted-realm"] = {"key-1": public_jwk}
+    with pytest.raises(HTTPException) as exc:
+        await service.verify_token(untrusted)
+    assert exc.value.status_code == 401
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("claims", [
+    {"typ": "ID"},
+    {"typ": "Refresh"},
+    {"azp": "other-client"},
+    {"azp": "other-client", "aud": "unilock-api"},
+])
+async def test_keycloak_token_of_wrong_type_or_client_is_rejected(trusted_client, claims):
+    service = SecurityService()
+    token, public_jwk = _keycloak_token("master", exp=2 ** 31, **claims)
+    service.jwks.keys["master"] = {"key-1": public_jwk}
+    with pytest.raises(HTTPException) as exc:
+        await service.verify_token(token)
+    assert exc.value.status_code == 401
+
+@pytest.mark.asyncio
+async def test_keycloak_token_accepted_by_audience(monkeypatch):
+    from app.core.settings import settings
+    service = SecurityService()
+    token, public_jwk = _keycloak_token("master", exp=2 ** 31, azp="other-client", aud=["account", "unilock-api"])
+    service.jwks.keys["master"] = {"key-1": public_jwk}
+
+    # Neither an audience nor authorized parties configured: fail closed
+    with pytest.raises(HTTPException) as exc:
+        await service.verify_token(token)
+    assert exc.value.status_code == 401
+
+    monkeypatch.setattr(settings, "KEYCLOAK_JWT_AUDIENCE", "unilock-api")
+    assert (await service.verify_token(token)).username == "admin"
+
+def test_equal_scope_requirements_share_one_dependency():
+    from app.core.dependencies import domain_permission_required, has_required_scopes
+
+    assert has_required_scopes(["admin", "user"]) is has_required_scopes(["user", "admin"])
+    assert domain_permission_required("theme:write") is domain_permission_required("theme:write")
@@ -0,0 +1,77 @@
+import gzip
+
+import pytest
+from httpx import AsyncClient
+
+from app.core.static_files import AssetFiles, _choose_encoding, _parse_range
+
+HASHED = "a" * 64
+
+@pytest.fixture
+async def client(tmp_path):
+    (tmp_path / "logos").mkdir()
+    (tmp_path / "logos" / f"{HASHED}.svg").write_bytes(b"<svg>" + b" " * 200 + b"</svg>")
+    (tmp_path / "logos" / f"{HASHED}.svg.gz").write_bytes(gzip.compress(b"<svg>" + b" " * 200 + b"</svg>"))
+    (tmp_path / "readme.txt").write_bytes(b"0123456789")
+    files = AssetFiles(str(tmp_path))
+    await files.load_index()
+    async with AsyncClient(app=files, base_url="http://test") as ac:
+        yield ac
+
+def test_parse_range():
+    assert _parse_range("bytes=0-3", 10) == (0, 3)
+    assert _parse_range("bytes=5-", 10) == (5, 9)
+    assert _parse_range("bytes=-4", 10) == (6, 9)
+    assert _parse_range("bytes=0-1,4-5", 10) is None
+    with pytest.raises(ValueError):
+        _parse_range("bytes=10-", 10)
+
+@pytest.mark.asyncio
+async def test_hashed_asset_is_immutable_and_revalidates(client):
+    response = await client.get(f"/logos/{HASHED}.svg")
+    assert response.status_code == 200
+    assert "immutable" in response.headers["cache-control"]
+    cached = await client.get(f"/logos/{HASHED}.svg", headers={"If-None-Match": response.headers["etag"]})
+    assert cached.status_code == 304
+
+@pytest.mark.asyncio
+async def test_precompressed_sibling_is_served(client):
+    response = await client.get(f"/logos/{HASHED}.svg", headers={"Accept-Encoding": "gzip"})
+    assert response.headers["content-encoding"] == "gzip"
+    assert response.headers["vary"] == "Accept-Encoding"
+    assert response.content.startswith(b"<svg>")
+
+def test_choose_encoding_honours_q_values():
+    both = {"br": ("a.br", None), "gzip": ("a.gz", None)}
+    assert _choose_encoding("gzip, br", both) == "br"
+    assert _choose_encoding("br;q=0, gzip", both) == "gzip"
+    assert _choose_encoding("br;q=0.5, gzip;q=0.8", both) == "gzip"
+    assert _choose_encoding("GZIP;Q=1", both) == "gzip"
+    assert _choose_encoding("*", both) == "br"
+    assert _choose_encoding("*;q=0", both) is None
+    assert _choose_encoding("*, br;q=0", both) == "gzip"
+    assert _choose_encoding("gzip;q=oops", both) is None
+    assert _choose_encoding("", both) is None
+    assert _choose_encoding("deflate, xgzip", both) is None
+
+@pytest.mark.asyncio
+async def test_refused_encoding_gets_the_identity_file(client):
+    response = await client.get(f"/logos/{HASHED}.svg", headers={"Accept-Encoding": "gzip;q=0"})
+    assert "content-encoding" not in response.headers
+    assert response.headers["vary"] == "Accept-Encoding"
+    assert response.content.startswith(b"<svg>")
+
+@pytest.mark.asyncio
+async def test_range_requests(client):
+    partial = await client.get("/readme.txt", headers={"Range": "bytes=2-5"})
+    assert partial.status_code == 206
+    assert partial.content == b"2345"
+    assert partial.headers["content-range"] == "bytes 2-5/10"
+    assert "immutable" not in partial.headers["cache-control"]
+    unsatisfiable = await client.get("/readme.txt", headers={"Range": "bytes=20-"})
+    assert unsatisfiable.status_code == 416
+
+@pytest.mark.asyncio
+async def test_missing_and_traversal(client):
+    assert (await client.get("/logos/missing.png")).status_code == 404
+    assert (await client.get("/../etc/passwd")).status_code == 404
@@ -0,0 +1,46 @@
+import asyncio
+
+import pytest
+
+from app.services.storage import LocalStorage
+
+@pytest.mark.asyncio
+async def test_local_put_exists_and_url(tmp_path):
+    storage = LocalStorage(str(tmp_path / "static"), "/static/")
+    source = tmp_path / "upload.png"
+    source.write_bytes(b"logo")
+
+    assert not await storage.exists("logos/abc.png")
+    await storage.put_file("logos/abc.png", str(source))
+    assert await storage.exists("logos/abc.png")
+    assert await storage.size("logos/abc.png") == 4
+    assert not source.exists()
+    assert storage.url("logos/abc.png") == "/static/logos/abc.png"
+    async with storage.local_copy("logos/abc.png") as path:
+        assert open(path, "rb").read() == b"logo"
+
+@pytest.mark.asyncio
+async def test_local_rejects_keys_outside_root(tmp_path):
+    storage = LocalStorage(str(tmp_path), "/static")
+    with pytest.raises(ValueError):
+        await storage.exists("../outside.png")
+
+@pytest.mark.asyncio
+async def test_local_has_no_direct_uploads(tmp_path):
+    storage = LocalStorage(str(tmp_path), "/static")
+    assert await storage.presign_upload("logos/abc.png", "image/png", 4, "0" * 64) is None
+
+@pytest.mark.asyncio
+async def test_local_concurrent_puts_of_one_key(tmp_path):
+    storage = LocalStorage(str(tmp_path / "static"), "/static")
+    sources = []
+    for i in range(5):
+        source = tmp_path / f"upload-{i}.svg"
+        source.write_bytes(b"<svg/>" * (i + 1))
+        sources.append(str(source))
+
+    await asyncio.gather(*(storage.put_file("logos/abc.svg", source, "image/svg+xml") for source in sources))
+
+    assert await storage.size("logos/abc.svg") in {6 * (i + 1) for i in range(5)}
+    leftovers = [path.name for path in (tmp_path / "static" / "logos").iterdir() if path.name.startswith(".")]
+    assert leftovers == []
@@ -0,0 +1,26 @@
+import pytest
+from pydantic import ValidationError
+
+from app.schemas.theme import ThemeConfigUpdate
+
+COLORS = {"primaryColor": "#3b82f6", "secondaryColor": "#6b7280"}
+
+@pytest.mark.parametrize("url", [
+    "https://cdn.example.com/logo.png",
+    "http://example.com/logo.webp",
+    f"/static/logos/{'a' * 64}.png",
+    f"/static/logos/{'a' * 64}-256.webp",
+])
+def test_logo_url_accepts_http_and_uploaded_logos(url):
+    assert ThemeConfigUpdate(**COLORS, logoUrl=url).logoUrl == url
+
+@pytest.mark.parametrize("url", [
+    "javascript:alert(1)",
+    "data:image/svg+xml;base64,PHN2Zz4=",
+    "/static/../secrets.png",
+    "/elsewhere/logo.png",
+    "logo.png",
+])
+def test_logo_url_rejects_anything_else(url):
+    with pytest.raises(ValidationError):
+        ThemeConfigUpdate(**COLORS, logoUrl=url)
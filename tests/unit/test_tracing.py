@@ -0,0 +1,66 @@
+import json
+
+import pytest
+from fastapi import FastAPI
+from httpx import AsyncClient
+from opentelemetry.sdk.trace.export.in_memory_span_exporter import InMemorySpanExporter
+
+from app.core import tracing
+
+@tracing.trace_calls
+class FakeService:
+    async def get_realm_info(self, realm: str):
+        return {"realm": realm}
+
+@pytest.fixture
+def exporter():
+    exporter = InMemorySpanExporter()
+    tracing.setup_tracing(exporter)
+    yield exporter
+    tracing.shutdown_tracing()
+
+def _app() -> FastAPI:
+    app = FastAPI()
+    service = FakeService()
+
+    @app.get("/domains/{domain_name}")
+    async def get_domain(domain_name: str):
+        return await service.get_realm_info(domain_name)
+
+    app.add_middleware(tracing.TracingMiddleware)
+    return app
+
+@pytest.mark.asyncio
+async def test_request_span_continues_incoming_trace(exporter):
+    trace_id = "4bf92f3577b34da6a3ce929d0e0e4736"
+    async with AsyncClient(app=_app(), base_url="http://test") as client:
+        response = await client.get(
+            "/domains/acme", headers={"traceparent": f"00-{trace_id}-00f067aa0ba902b7-01"}
+        )
+    assert response.status_code == 200
+
+    spans = {span.name: span for span in exporter.get_finished_spans()}
+    server = spans["GET /domains/{domain_name}"]
+    call = spans["FakeService.get_realm_info"]
+    assert format(server.context.trace_id, "032x") == trace_id
+    assert call.parent.span_id == server.context.span_id
+    assert server.attributes["http.status_code"] == 200
+
+@pytest.mark.asyncio
+async def test_calls_are_not_traced_when_disabled():
+    tracing.shutdown_tracing()
+    assert await FakeService().get_realm_info("acme") == {"realm": "acme"}
+
+@pytest.mark.asyncio
+async def test_file_exporter_writes_otlp_json(tmp_path):
+    path = tmp_path / "traces.jsonl"
+    tracing.setup_tracing(tracing.OTLPFileSpanExporter(str(path)))
+    try:
+        await FakeService().get_realm_info("acme")
+    finally:
+        tracing.shutdown_tracing()
+
+    request = json.loads(path.read_text().splitlines()[0])
+    span = request["resourceSpans"][0]["scopeSpans"][0]["spans"][0]
+    assert span["name"] == "FakeService.get_realm_info"
+    assert len(span["traceId"]) == 32